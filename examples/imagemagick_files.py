@@ -36,6 +36,7 @@ def main():
         ],
         command="convert",
         arguments=f"-delay 20 -loop 0 {curr_dir}/../tests/campaigns/imagesequence/*.jpg a.gif",
+        shell=True,
         logger=logger,
     )
 
@@ -35,6 +35,7 @@ def main():
         files=files,
         command="convert",
         arguments=["-delay", "20", "-loop", "0", "*.jpg", "a.gif"],
+        shell=True,
         logger=logger,
         # Uncomment if running on M1 Mac.
         env_vars={"PATH": "${PATH}:/opt/homebrew/bin"},
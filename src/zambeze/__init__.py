@@ -3,14 +3,42 @@
 # This program is free software: you can redistribute it and/or modify
 # it under the terms of the MIT License.
 
-from importlib.metadata import version
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from .campaign.campaign import Campaign
-from .campaign.shell_activity import ShellActivity
-from .campaign.transfer_activity import TransferActivity
+if TYPE_CHECKING:
+    from .campaign.campaign import Campaign
+    from .campaign.shell_activity import ShellActivity
+    from .campaign.transfer_activity import TransferActivity
+    from .orchestration.retry import RetryPolicy
 
 __author__ = "https://zambeze.org"
 __credits__ = "Oak Ridge National Laboratory"
-__version__ = version("zambeze")
 
-__all__ = ["Campaign", "ShellActivity", "TransferActivity"]
+__all__ = ["Campaign", "RetryPolicy", "ShellActivity", "TransferActivity"]
+
+# Public names, imported from their module on first access so that driver
+# scripts do not pay for what they do not use.
+_LAZY_ATTRIBUTES = {
+    "Campaign": ".campaign.campaign",
+    "RetryPolicy": ".orchestration.retry",
+    "ShellActivity": ".campaign.shell_activity",
+    "TransferActivity": ".campaign.transfer_activity",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    elif name == "__version__":
+        from importlib.metadata import version
+
+        value = version("zambeze")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES, "__version__"])
@@ -13,3 +13,7 @@ class Activity(Protocol):
     name: str
 
     def generate_message(self) -> AbstractMessage: ...
+
+    def to_record(self):
+        """The lean record of the activity that agents receive."""
+        ...
@@ -4,14 +4,14 @@
 # it under the terms of the MIT License.
 
 import logging
-import zmq
 import uuid
 
 from typing import Optional
 from .activity import Activity
-from .dag import DAG
-from zambeze.settings import ZambezeSettings
-from zambeze.auth import GlobusAuthenticator
+
+# ZeroMQ, networkx, dill, the Globus SDK and the settings are imported by
+# the methods using them, so that defining a campaign stays cheap for
+# driver scripts launched at scale.
 
 
 class Campaign:
@@ -73,6 +73,9 @@ class Campaign:
         """Package the graph in a way that is amenable to send to the
         Zambeze activity queues.
         """
+        from zambeze.auth import GlobusAuthenticator
+        from .dag import DAG
+
         # Create a DAG to organize activities
         last_activity = None
         token_obj = {}
@@ -103,7 +106,8 @@ class Campaign:
 
             dag.add_node(
                 activity.activity_id,
-                activity=activity,
+                # Agents get the lean record, not the builder.
+                activity=activity.to_record(),
                 campaign_id=self.campaign_id,
                 transfer_tokens=token_obj,
                 transfer_params=transfer_params,
@@ -137,6 +141,10 @@ class Campaign:
             - The method will log detailed error messages if it fails to send the DAG or does not receive a response within
               the expected time frame. It suggests possible actions to resolve such issues.
         """
+        import zmq
+
+        from zambeze.settings import ZambezeSettings
+
         self._logger.info(f"Number of activities to dispatch: {len(self.activities)}")
         zmq_context = zmq.Context()
         zmq_socket = zmq_context.socket(zmq.REQ)
@@ -193,3 +201,47 @@ class Campaign:
 
             except Exception as e:
                 self._logger.error(f"Error during cleanup: {str(e)}")
+
+    def cancel(self, activity_ids: Optional[list[str]] = None) -> None:
+        """Cancels dispatched activities of the campaign.
+
+        A CANCEL control message is broadcast to every agent for each
+        activity. The agent running an activity terminates it, an agent that
+        has not started it yet skips it, and the activity is reported as
+        failed.
+
+        Parameters
+        ----------
+        activity_ids : list[str], optional
+            IDs of the activities to cancel; all activities of the campaign
+            by default.
+        """
+        from zambeze.orchestration.queue_rmq import CANCEL_EXCHANGE, QueueRMQ
+        from zambeze.settings import ZambezeSettings
+
+        if activity_ids is None:
+            activity_ids = [activity.activity_id for activity in self.activities]
+
+        settings = ZambezeSettings()
+        queue_client = QueueRMQ(
+            {
+                "ip": settings.settings["rmq"]["host"],
+                "port": settings.settings["rmq"]["port"],
+            },
+            logger=self._logger,
+        )
+        queue_client.connect()
+        try:
+            for activity_id in activity_ids:
+                control_msg = {
+                    "status": "CANCEL",
+                    "activity_id": activity_id,
+                    "campaign_id": self.campaign_id,
+                    "msg": "CANCEL REQUESTED.",
+                }
+                queue_client.send(
+                    exchange=CANCEL_EXCHANGE, channel="", body=control_msg
+                )
+                self._logger.info(f"Requested cancellation of activity {activity_id}")
+        finally:
+            queue_client.close()
@@ -7,9 +7,11 @@ import logging
 import time
 import uuid
 
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import ClassVar
 from zambeze.orchestration.message.abstract_message import AbstractMessage
-from zambeze.orchestration.message.message_factory import MessageFactory
+from zambeze.orchestration.retry import RetryPolicy
 from zambeze.orchestration.zambeze_types import MessageType, ActivityType
 
 
@@ -39,11 +41,36 @@ class ShellActivity:
         ID of the agent where this activity was created.
     running_agent_ids : list[str]
         IDs of the agents that executed this activity.
+    cpus : int
+        Number of CPUs the command uses; 1 if not given.
+    memory : int
+        Bytes of memory the command needs at most; not limited if not given.
+    gpus : int
+        Number of GPUs the command uses; none if not given.
+    timeout : float
+        Seconds after which the command is terminated and the activity
+        fails; no limit if not given.
+    retry : RetryPolicy
+        When to try the activity again after it failed; never if not given.
+    attempt : int
+        Number of the current attempt, starting at 1.
+    cache : bool
+        Reuse the result of a past run with the same command, arguments,
+        environment variables and inputs instead of running again.
+    outputs : list[str]
+        Files the command produces, restored when its result is reused;
+        relative paths are in the agent's working directory.
+    shell : bool
+        Run the command line with the shell, for variables, globs, pipes or
+        redirections in the arguments; the command is executed directly
+        with the arguments as given otherwise.
 
     Methods
     -------
     generate_message
         Generate a message for the shell activity.
+    to_record
+        The ShellActivityRecord the agent receives for this activity.
     """
 
     def __init__(
@@ -58,6 +85,14 @@ class ShellActivity:
         message_id: str | None = None,
         origin_agent_id: str | None = None,
         running_agent_ids: list[str] | None = None,
+        cpus: int | None = None,
+        memory: int | None = None,
+        gpus: int | None = None,
+        timeout: float | None = None,
+        retry: RetryPolicy | None = None,
+        cache: bool = False,
+        outputs: list[str] | None = None,
+        shell: bool = False,
     ):
         self.name = name
         self.files = files
@@ -69,6 +104,17 @@ class ShellActivity:
         self.message_id = message_id
         self.origin_agent_id = origin_agent_id
 
+        # Resource hints the executor admits the activity by.
+        self.cpus = cpus
+        self.memory = memory
+        self.gpus = gpus
+        self.timeout = timeout
+        self.retry = retry
+        self.attempt = 1
+        self.cache = cache
+        self.outputs = outputs if outputs is not None else []
+        self.shell = shell
+
         self.running_agent_ids = (
             running_agent_ids if running_agent_ids is not None else []
         )
@@ -83,12 +129,39 @@ class ShellActivity:
                 "command": self.command,
                 "args": self.arguments,
                 "env_vars": self.env_vars,
+                "use_shell": self.shell,
             },
         }
 
+    def to_record(self) -> "ShellActivityRecord":
+        """The ShellActivityRecord the agent receives for this activity."""
+        return ShellActivityRecord(
+            activity_id=self.activity_id,
+            campaign_id=self.campaign_id,
+            name=self.name,
+            files=self.files,
+            command=self.command,
+            arguments=self.arguments,
+            env_vars=self.env_vars,
+            origin_agent_id=self.origin_agent_id,
+            running_agent_ids=self.running_agent_ids,
+            cpus=self.cpus,
+            memory=self.memory,
+            gpus=self.gpus,
+            timeout=self.timeout,
+            retry=self.retry,
+            attempt=self.attempt,
+            cache=self.cache,
+            outputs=self.outputs,
+            shell=self.shell,
+        )
+
     def generate_message(self) -> AbstractMessage:
         """Generate a message for the shell activity."""
 
+        # The message machinery is only needed once messages are generated.
+        from zambeze.orchestration.message.message_factory import MessageFactory
+
         factory = MessageFactory(logger=self.logger)
 
         template = factory.create_template(
@@ -96,7 +169,6 @@ class ShellActivity:
         )
 
         try:
-            print("<< try here >>", self.origin_agent_id)
             # These go into every activity.
             template[1].origin_agent_id = self.origin_agent_id
             template[1].running_agent_ids = self.running_agent_ids
@@ -114,7 +186,55 @@ class ShellActivity:
             template[1].body.parameters.args = self.arguments
             template[1].body.parameters.env_vars = self.env_vars
         except Exception as e:
-            print("<< except here >>")
             self.logger.info(f"Error is here: {e}")
 
         return factory.create(template)
+
+
+@dataclass(slots=True)
+class ShellActivityRecord:
+    """A shell activity as dispatched to and run by the agents.
+
+    ShellActivity builds activities in driver scripts; this is the lean,
+    slotted form a campaign sends in its DAG, without the builder's logger,
+    message plumbing and derived fields. See ShellActivity for the meaning
+    of each attribute.
+    """
+
+    activity_id: str
+    campaign_id: str | None
+    name: str
+    files: list[str]
+    command: str
+    arguments: list[str]
+    env_vars: dict[str, str] | None = None
+    origin_agent_id: str | None = None
+    running_agent_ids: list[str] = field(default_factory=list)
+    cpus: int | None = None
+    memory: int | None = None
+    gpus: int | None = None
+    timeout: float | None = None
+    retry: RetryPolicy | None = None
+    attempt: int = 1
+    cache: bool = False
+    outputs: list[str] = field(default_factory=list)
+    shell: bool = False
+
+    type: ClassVar[str] = "SHELL"
+
+    def __reduce__(self):
+        # Pickled as the field values alone, without their names.
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def plugin_args(self) -> dict:
+        """Arguments of the shell plugin, see ShellActivity."""
+        return {
+            "shell": "bash",
+            "parameters": {
+                "command": self.command,
+                "args": self.arguments,
+                "env_vars": self.env_vars,
+                "use_shell": self.shell,
+            },
+        }
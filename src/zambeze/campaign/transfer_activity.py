@@ -1,8 +1,11 @@
+import logging
 import uuid
 import time
 
+from dataclasses import dataclass, field
+from typing import ClassVar
 from zambeze.orchestration.message.abstract_message import AbstractMessage
-from zambeze.orchestration.message.message_factory import MessageFactory
+from zambeze.orchestration.retry import RetryPolicy
 from zambeze.orchestration.zambeze_types import MessageType, ActivityType
 
 
@@ -16,16 +19,30 @@ class TransferActivity:
     source_file : str
         Source file that will be transferred.
     dest_directory : str
-        Destination directory for the source file.
+        Destination directory for the source file, either a local path or a
+        globus://<endpoint>/<path> URL.
     override_existing : bool
         Overwrite files and/or directories at destination. Default is False.
     activity_id : str
         ID for the transfer activity.
+    files : list[str]
+        URIs of the files to transfer.
+    logger : logging.Logger
+        The logger where to log information/warning or errors.
+    timeout : float
+        Seconds after which unfinished transfers are cancelled and the
+        activity fails; no limit if not given.
+    retry : RetryPolicy
+        When to try the activity again after it failed; never if not given.
+    attempt : int
+        Number of the current attempt, starting at 1.
 
     Methods
     -------
     generate_message
         Generate a message for the transfer activity.
+    to_record
+        The TransferActivityRecord the agent receives for this activity.
     """
 
     def __init__(
@@ -34,18 +51,52 @@ class TransferActivity:
         source_file: str,
         dest_directory: str,
         override_existing: bool = False,
+        logger: logging.Logger | None = None,
+        campaign_id: str | None = None,
+        message_id: str | None = None,
+        origin_agent_id: str | None = None,
+        timeout: float | None = None,
+        retry: RetryPolicy | None = None,
     ):
         self.name = name
         self.source_file = source_file
         self.dest_directory = dest_directory
         self.override_existing = override_existing
+        self.files = [source_file]
+        self.logger = logging.getLogger(__name__) if logger is None else logger
+        self.campaign_id = campaign_id
+        self.message_id = message_id
+        self.origin_agent_id = origin_agent_id
+        self.running_agent_ids = []
+        self.timeout = timeout
+        self.retry = retry
+        self.attempt = 1
 
         self.name = "TRANSFER"
+        self.type = "TRANSFER"
         self.activity_id = str(uuid.uuid4())
 
+    def to_record(self) -> "TransferActivityRecord":
+        """The TransferActivityRecord the agent receives for this activity."""
+        return TransferActivityRecord(
+            activity_id=self.activity_id,
+            campaign_id=self.campaign_id,
+            source_file=self.source_file,
+            dest_directory=self.dest_directory,
+            override_existing=self.override_existing,
+            origin_agent_id=self.origin_agent_id,
+            running_agent_ids=self.running_agent_ids,
+            timeout=self.timeout,
+            retry=self.retry,
+            attempt=self.attempt,
+        )
+
     def generate_message(self) -> AbstractMessage:
         """Generate a message for the transfer activity."""
 
+        # The message machinery is only needed once messages are generated.
+        from zambeze.orchestration.message.message_factory import MessageFactory
+
         factory = MessageFactory(logger=self.logger)
 
         template = factory.create_template(
@@ -58,7 +109,7 @@ class TransferActivity:
             template[1].override_existing = self.override_existing
             template[1].activity_id = self.activity_id
             template[1].message_id = self.message_id
-            template[1].agent_id = self.agent_id
+            template[1].agent_id = self.origin_agent_id
             template[1].campaign_id = self.campaign_id
 
             # TODO: should probably fill this with globus token
@@ -75,3 +126,36 @@ class TransferActivity:
             self.logger.info(f"[oogily boogily] Error is here: {e}")
 
         return factory.create(template)
+
+
+@dataclass(slots=True)
+class TransferActivityRecord:
+    """A transfer activity as dispatched to and run by the agents.
+
+    TransferActivity builds activities in driver scripts; this is the lean,
+    slotted form a campaign sends in its DAG, without the builder's logger
+    and message plumbing. See TransferActivity for the meaning of each
+    attribute.
+    """
+
+    activity_id: str
+    campaign_id: str | None
+    source_file: str
+    dest_directory: str
+    override_existing: bool = False
+    origin_agent_id: str | None = None
+    running_agent_ids: list[str] = field(default_factory=list)
+    timeout: float | None = None
+    retry: RetryPolicy | None = None
+    attempt: int = 1
+
+    name: ClassVar[str] = "TRANSFER"
+    type: ClassVar[str] = "TRANSFER"
+
+    def __reduce__(self):
+        # Pickled as the field values alone, without their names.
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def files(self) -> list[str]:
+        return [self.source_file]
@@ -14,3 +14,34 @@ CREATE TABLE IF NOT EXISTS activity (
     
 
 );
+
+CREATE TABLE IF NOT EXISTS transfer_metric (
+
+    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT,
+    task_id TEXT NOT NULL,
+    scheme TEXT NOT NULL, -- globus, local or https
+    source_endpoint TEXT,
+    destination_endpoint TEXT,
+    status TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    queued_at INTEGER NOT NULL, -- ms since epoch, like activity timestamps
+    started_at INTEGER,
+    ended_at INTEGER
+
+);
+
+CREATE TABLE IF NOT EXISTS activity_result (
+
+    result_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT,
+    cache_key TEXT NOT NULL, -- digest of command, arguments, env and inputs
+    activity_id TEXT NOT NULL, -- activity that produced the result
+    manifest TEXT NOT NULL, -- JSON list of {path, digest, size, mode} outputs
+    result TEXT, -- JSON result of the shell plugin
+    created_at INTEGER NOT NULL
+
+);
+
+CREATE INDEX IF NOT EXISTS activity_result_cache_key ON activity_result (cache_key);
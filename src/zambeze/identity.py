@@ -1,6 +1,11 @@
 # Standard python imports
 import re
-from uuid import UUID
+
+# Canonical 8-4-4-4-12 form, capturing the version and variant digits.
+_UUID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-([0-9a-f])[0-9a-f]{3}-([0-9a-f])[0-9a-f]{3}-[0-9a-f]{12}",
+    re.IGNORECASE,
+)
 
 
 def valid_uuid(uuid_to_test: str, version=None) -> bool:
@@ -23,22 +28,18 @@ def valid_uuid(uuid_to_test: str, version=None) -> bool:
     >>> valid_uuid('c9bf9e58')
     False
 
-    Function was taken from
-    https://stackoverflow.com/questions/19989481/how-to-determine-if-a-string-
-    is-a-valid-v4-uuid
+    Only the canonical form is valid, in either case. With a version, the
+    UUID must also have that version and the RFC 4122 variant.
     """
     if not isinstance(uuid_to_test, str):
         raise Exception("UUID must be of type str")
 
-    uuid_obj = ""
-    try:
-        if version:
-            uuid_obj = UUID(uuid_to_test, version=version)
-        else:
-            uuid_obj = UUID(uuid_to_test)
-    except ValueError:
+    match = _UUID_PATTERN.fullmatch(uuid_to_test)
+    if match is None:
         return False
-    return str(uuid_obj).lower() == str(uuid_to_test).lower()
+    if version:
+        return match[1] == str(version) and match[2] in "89abAB"
+    return True
 
 
 def valid_email(email: str) -> bool:
@@ -9,12 +9,18 @@
 import logging
 import pathlib
 import threading
+from functools import partial
 from uuid import uuid4
 from typing import Optional
 
 from zambeze.orchestration.agent.message_handler import MessageHandler
 from zambeze.orchestration.db.dao.activity_dao import ActivityDAO
 from zambeze.orchestration.executor import Executor
+from zambeze.orchestration.metrics import (
+    MetricsServer,
+    agent_metrics,
+    transfer_metric_families,
+)
 from zambeze.settings import ZambezeSettings
 
 
@@ -30,6 +36,7 @@ class Agent:
         _settings (ZambezeSettings): Configuration settings for the agent.
         _executor (Executor): Executor thread that performs tasks.
         _msg_handler_thd (MessageHandler): MessageHandler thread for handling messages.
+        _metrics_server (MetricsServer): Serves the agent's metrics, when enabled.
 
     Args:
         conf_file (Optional[pathlib.Path]): Path to the configuration file.
@@ -50,10 +57,18 @@ class Agent:
             settings=self._settings, agent_id=self._agent_id, logger=self._logger
         )
         self._msg_handler_thd = self._init_message_handler()
+        self._register_metrics()
+        self._metrics_server = MetricsServer.from_settings(
+            self._settings, agent_metrics(), logger=self._logger
+        )
+        if self._metrics_server is not None:
+            self._metrics_server.start()
 
         self._start_thread(self.recv_activity_process_thd, name="ActivitySorterThread")
         self._start_thread(self.send_control_thd, name="ControlSenderThread")
         self._start_thread(self.recv_control_thd, name="ControlReceiverThread")
+        # Carries activities the executor puts back for another attempt.
+        self._start_thread(self.send_activity_thd, name="ActivitySenderThread")
 
         self._executor.start()
 
@@ -70,6 +85,47 @@ class Agent:
             self._logger.error("[agent] TERMINATING AGENT...")
             exit(1)
 
+    def _register_metrics(self):
+        """Export the depths of the internal queues, the running transfers
+        and the transfer measurements of the executor."""
+        metrics = agent_metrics()
+        queues = {
+            "executor.to_process_q": self._executor.to_process_q,
+            "executor.to_status_q": self._executor.to_status_q,
+            "executor.to_new_activity_q": self._executor.to_new_activity_q,
+            "executor.incoming_control_q": self._executor.incoming_control_q,
+            "message_handler.send_activity_q": (
+                self._msg_handler_thd.msg_handler_send_activity_q
+            ),
+            "message_handler.send_control_q": (
+                self._msg_handler_thd.msg_handler_send_control_q
+            ),
+            "message_handler.recv_control_q": self._msg_handler_thd.recv_control_q,
+            "message_handler.check_activity_q": self._msg_handler_thd.check_activity_q,
+        }
+        for name, queue in queues.items():
+            metrics.gauge("zambeze_queue_depth", queue.qsize, queue=name)
+
+        # The monitor comes and goes with campaigns.
+        def monitor_queue_depth(name):
+            monitor = self._executor.monitor
+            return None if monitor is None else getattr(monitor, name).qsize()
+
+        for name in ("to_monitor_q", "to_status_q"):
+            metrics.gauge(
+                "zambeze_queue_depth",
+                partial(monitor_queue_depth, name),
+                queue=f"monitor.{name}",
+            )
+        metrics.gauge(
+            "zambeze_active_workers",
+            lambda: self._executor.watched_transfers,
+            pool="transfer",
+        )
+        metrics.add_collector(
+            lambda: transfer_metric_families(self._executor.transfer_metrics)
+        )
+
     def _start_thread(self, target, name):
         """Starts a thread with the given target function and name."""
         thread = threading.Thread(target=target, name=name)
@@ -108,7 +164,9 @@ class Agent:
                 activ_to_sort = self._msg_handler_thd.check_activity_q.get()
                 self._logger.info(f"[agent] Received activity: {activ_to_sort}")
 
-                # Place the activity into the executor's processing queue.
+                # Start staging its inputs, then place the activity into the
+                # executor's processing queue.
+                self._executor.prefetch(activ_to_sort)
                 self._executor.to_process_q.put(activ_to_sort)
                 self._logger.debug(
                     "[agent] Put new activity into executor processing queue!"
@@ -134,8 +192,14 @@ class Agent:
                     f"[agent] Received control message: {control_to_sort}"
                 )
 
-                # TEMPORARY: update local dict for non-MONITOR / non-TERMINATOR controls
                 activity_id = control_to_sort["activity_id"]
+
+                # A CANCEL request is not a status; the executor acts on it.
+                if control_to_sort["status"] == "CANCEL":
+                    self._executor.cancel(activity_id)
+                    continue
+
+                # TEMPORARY: update local dict for non-MONITOR / non-TERMINATOR controls
                 if activity_id not in self._executor.control_dict:
                     self._executor.control_dict[activity_id] = dict()
 
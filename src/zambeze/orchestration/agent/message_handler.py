@@ -4,9 +4,10 @@ import time
 import zmq
 
 from queue import Queue
+from zambeze.orchestration.metrics import agent_metrics
 from zambeze.orchestration.db.model.activity_model import ActivityModel
 from zambeze.orchestration.db.dao.activity_dao import ActivityDAO
-from zambeze.orchestration.queue_rmq import QueueRMQ
+from zambeze.orchestration.queue_rmq import CANCEL_EXCHANGE, QueueRMQ
 from zambeze.campaign.dag import DAG
 
 activity_to_plugin_map = {"SHELL": "SHELL", "TRANSFER": "globus"}
@@ -65,6 +66,8 @@ class MessageHandler(threading.Thread):
         control_sender = threading.Thread(target=self.send_control, args=())
         # THREAD 5: send activity to RMQ
         activity_sender = threading.Thread(target=self.send_activity_dag, args=())
+        # THREAD 6: recv cancellations broadcast to every agent
+        cancel_listener = threading.Thread(target=self.recv_cancel, args=())
 
         if (
             "flowcept" in self._settings.settings
@@ -83,6 +86,7 @@ class MessageHandler(threading.Thread):
         control_listener.start()
         activity_sender.start()
         control_sender.start()
+        cancel_listener.start()
 
     def recv_activity_dag_from_campaign(self):
         """
@@ -156,6 +160,7 @@ class MessageHandler(threading.Thread):
             "[mh-recv-activity] Processing callback function for activity queue recv."
         )
         activity_node = DAG.deserialize_node(body)
+        agent_metrics().stage(activity_node[0], "received")
         self._logger.info(f"[mn-recv-activity] receiving activity...{activity_node}")
 
         plugins_are_configured = False
@@ -208,6 +213,7 @@ class MessageHandler(threading.Thread):
             if should_ack:
                 ch.basic_ack(delivery_tag=method.delivery_tag, multiple=False)
                 self._logger.debug("[recv activity] ACKED activity message.")
+                agent_metrics().stage(activity_node[0], "acked")
                 self.check_activity_q.put(activity_node)
                 self._logger.debug("nueve")
             else:
@@ -282,6 +288,25 @@ class MessageHandler(threading.Thread):
             channel_to_listen="CONTROL", callback_func=callback, should_auto_ack=True
         )
 
+    def recv_cancel(self):
+        """
+        Receive the CANCEL requests broadcast to every agent; the agent
+        running or holding the activity acts on it, the others ignore it.
+        """
+        self._logger.info("[mh] Connecting to RabbitMQ RECV CANCEL broker...")
+
+        queue_client = QueueRMQ(self.mq_args, logger=self._logger)
+        queue_client.connect()
+
+        def callback(_1, _2, _3, body):
+            cancel_msg = pickle.loads(body)
+            self._logger.info(" [x recv_cancel] Received %r" % cancel_msg)
+            self.recv_control_q.put(cancel_msg)
+
+        queue_client.listen_to_broadcasts(
+            callback_func=callback, exchange=CANCEL_EXCHANGE
+        )
+
     def send_control(self):
         """
         (from agent.py) input control message; send to "CONTROL" queue.
@@ -304,6 +329,12 @@ class MessageHandler(threading.Thread):
                 )
             else:
                 self._logger.info("[send_control] Successfully sent control message!")
+                if isinstance(activity_msg, dict) and "status" in activity_msg:
+                    agent_metrics().stage(activity_msg.get("activity_id"), "published")
+                    agent_metrics().inc(
+                        "zambeze_statuses_published_total",
+                        status=activity_msg["status"],
+                    )
 
     def message_to_plugin_validator(self, plugin, cmd):
         """Determine whether plugin can execute based on plugin input schema.
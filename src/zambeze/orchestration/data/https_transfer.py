@@ -0,0 +1,396 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Objects at least this large are downloaded as parallel HTTP Range requests.
+PARALLEL_DOWNLOAD_THRESHOLD = 64 * 1024**2
+RANGE_SIZE = 16 * 1024**2
+STREAM_CHUNK_SIZE = 1024**2
+
+# Suffixes of the partial download and of its resume state.
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+
+class HttpsTransferError(Exception):
+    """Custom exception class for HTTPS download errors."""
+
+
+@dataclass
+class HttpsTransferResult:
+    """Outcome of downloading a single object."""
+
+    url: str
+    destination: str
+    bytes: int
+    seconds: float
+    ranged: bool
+    checksum_verified: bool
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.seconds <= 0:
+            return float(self.bytes)
+        return self.bytes / self.seconds
+
+
+def parse_checksum(fragment: str) -> Optional[tuple[str, str]]:
+    """
+    Read an expected checksum from a URL fragment.
+
+    :Example:
+
+    >>> parse_checksum("sha256=9f86d081884c7d65")
+    ('sha256', '9f86d081884c7d65')
+    """
+    if "=" not in fragment:
+        return None
+    algorithm, digest = fragment.split("=", 1)
+    algorithm = algorithm.lower()
+    if algorithm not in hashlib.algorithms_available:
+        raise HttpsTransferError(f"Unsupported checksum algorithm: {algorithm}")
+    return algorithm, digest.lower()
+
+
+class HttpsDownloader:
+    """
+    Downloads objects from HTTP(S) data portals.
+
+    A pooled ``requests.Session`` is reused for every request. Objects of at
+    least ``parallel_threshold`` bytes on servers accepting byte ranges are
+    fetched as ``range_size`` Range requests on ``workers`` threads, written in
+    place into a ``.part`` file. Completed ranges are recorded next to it, so
+    a failed or interrupted download resumes where it stopped instead of
+    starting over. Smaller objects are streamed and, if the connection drops,
+    resumed with a Range request from the last byte written, including by a
+    later download of the same, unchanged object. Only objects with an ETag
+    or Last-Modified date are resumed, so a changed object is never spliced
+    onto an old one. Servers that reject HEAD
+    requests are probed with a one byte Range request instead.
+
+    :param workers: Number of concurrent Range requests per object
+    :type workers: int
+    :param retries: Attempts per range (or per stream) before giving up
+    :type retries: int
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        retries: int = 3,
+        range_size: int = RANGE_SIZE,
+        parallel_threshold: int = PARALLEL_DOWNLOAD_THRESHOLD,
+        timeout: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._workers = max(1, workers)
+        self._retries = max(1, retries)
+        self._range_size = range_size
+        self._parallel_threshold = parallel_threshold
+        self._timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._workers, pool_maxsize=self._workers
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def close(self) -> None:
+        self._session.close()
+
+    def download(self, url: str, destination, checksum=None) -> HttpsTransferResult:
+        """
+        Download ``url`` to ``destination``.
+
+        :param url: The object to download
+        :param destination: Path where the object is written
+        :param checksum: Optional (algorithm, hex digest) the object must match
+        :raises HttpsTransferError: If the download or its verification fails
+        """
+        destination = os.path.abspath(destination)
+        start = time.monotonic()
+
+        size, accepts_ranges, validator = self._probe(url)
+
+        ranged = accepts_ranges and size >= self._parallel_threshold
+        if ranged:
+            self._ranged_download(url, destination, size, validator)
+        else:
+            self._stream_download(url, destination, size, accepts_ranges, validator)
+
+        if checksum is not None:
+            self._verify(destination, *checksum)
+
+        result = HttpsTransferResult(
+            url=url,
+            destination=destination,
+            bytes=os.path.getsize(destination),
+            seconds=time.monotonic() - start,
+            ranged=ranged,
+            checksum_verified=checksum is not None,
+        )
+        self._logger.info(
+            f"[https-transfer] {url} -> {destination}: {result.bytes} bytes in"
+            f" {result.seconds:.3f}s ({result.bytes_per_second / 1024**2:.1f} MiB/s)"
+        )
+        return result
+
+    def _probe(self, url) -> tuple[int, bool, Optional[str]]:
+        """
+        Find out the size of an object, whether its server accepts byte
+        ranges and what identifies its current version.
+
+        :return: (size or -1 if unknown, accepts ranges, ETag or
+            Last-Modified)
+        """
+        try:
+            response = self._session.head(
+                url, allow_redirects=True, timeout=self._timeout
+            )
+        except requests.RequestException as e:
+            raise HttpsTransferError(f"HEAD {url} failed: {e}") from e
+        if response.status_code == 200:
+            size = int(response.headers.get("Content-Length", -1))
+            accepts_ranges = (
+                response.headers.get("Accept-Ranges", "").lower() == "bytes"
+            )
+            return size, accepts_ranges, self._validator(response)
+
+        # Many servers and CDNs reject HEAD; ask for the first byte instead.
+        self._logger.debug(
+            f"[https-transfer] HEAD {url} returned {response.status_code};"
+            " probing with a Range request."
+        )
+        try:
+            response = self._session.get(
+                url,
+                headers={"Range": "bytes=0-0"},
+                stream=True,
+                timeout=self._timeout,
+            )
+        except requests.RequestException as e:
+            raise HttpsTransferError(f"GET {url} failed: {e}") from e
+        with response:
+            if response.status_code == 206:
+                # Content-Range: bytes 0-0/<size>, the size being * if unknown
+                total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                size = int(total) if total.isdigit() else -1
+                return size, True, self._validator(response)
+            if response.status_code == 200:
+                # The server ignored the Range header and sends the whole object.
+                size = int(response.headers.get("Content-Length", -1))
+                return size, False, self._validator(response)
+        raise HttpsTransferError(f"GET {url} returned {response.status_code}")
+
+    @staticmethod
+    def _validator(response) -> Optional[str]:
+        return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+    def _ranged_download(self, url, destination, size, validator) -> None:
+        part_path = destination + PART_SUFFIX
+        state_path = destination + STATE_SUFFIX
+
+        done = self._load_state(state_path, part_path, size, validator)
+        if not done:
+            with open(part_path, "wb") as part:
+                part.truncate(size)
+
+        offsets = [
+            offset for offset in range(0, size, self._range_size) if offset not in done
+        ]
+        self._logger.debug(
+            f"[https-transfer] {url}: {len(offsets)} ranges left of"
+            f" {-(-size // self._range_size)}"
+        )
+
+        state_lock = threading.Lock()
+
+        def fetch(offset):
+            end = min(offset + self._range_size, size) - 1
+            self._with_retries(self._fetch_range, url, part_path, offset, end)
+            with state_lock:
+                done.add(offset)
+                self._save_state(state_path, size, validator, done)
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            # list() re-raises the first range that ran out of retries; the
+            # ranges completed so far stay recorded for the next attempt.
+            list(pool.map(fetch, offsets))
+
+        os.replace(part_path, destination)
+        os.unlink(state_path)
+
+    def _fetch_range(self, url, part_path, offset, end) -> None:
+        response = self._session.get(
+            url,
+            headers={"Range": f"bytes={offset}-{end}"},
+            stream=True,
+            timeout=self._timeout,
+        )
+        with response:
+            if response.status_code != 206:
+                raise HttpsTransferError(
+                    f"Range request {offset}-{end} of {url} returned"
+                    f" {response.status_code}"
+                )
+            fd = os.open(part_path, os.O_WRONLY)
+            try:
+                position = offset
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    os.pwrite(fd, chunk, position)
+                    position += len(chunk)
+            finally:
+                os.close(fd)
+
+        if position != end + 1:
+            raise HttpsTransferError(
+                f"Range {offset}-{end} of {url} ended early at {position}"
+            )
+
+    def _stream_download(
+        self, url, destination, size, accepts_ranges, validator
+    ) -> None:
+        part_path = destination + PART_SUFFIX
+        state_path = destination + STATE_SUFFIX
+
+        # What an earlier download of the same object left is kept and
+        # resumed from; anything else starts over.
+        state = self._read_state(state_path)
+        resumable = (
+            accepts_ranges
+            and validator is not None
+            and os.path.exists(part_path)
+            and state.get("mode") == "stream"
+            and state.get("size") == size
+            and state.get("validator") == validator
+        )
+        if resumable:
+            self._logger.debug(
+                f"[https-transfer] {url}: resuming at byte {os.path.getsize(part_path)}"
+            )
+        else:
+            with open(part_path, "wb"):
+                pass
+            self._save_state(state_path, size, validator, mode="stream")
+
+        def stream():
+            written = os.path.getsize(part_path)
+            headers = {}
+            if written > 0:
+                if not accepts_ranges or validator is None:
+                    # The server can only send the whole object again, or a
+                    # changed object could not be told from the one written.
+                    written = 0
+                    os.truncate(part_path, 0)
+                else:
+                    headers["Range"] = f"bytes={written}-"
+                    # The whole object is sent instead if it changed.
+                    headers["If-Range"] = validator
+
+            response = self._session.get(
+                url, headers=headers, stream=True, timeout=self._timeout
+            )
+            with response:
+                if response.status_code == 416:
+                    if written == size:
+                        # Written in full before an earlier attempt stopped.
+                        return
+                    os.truncate(part_path, 0)
+                    raise HttpsTransferError(
+                        f"GET {url} from byte {written} returned 416; restarting"
+                    )
+                if response.status_code not in (200, 206):
+                    raise HttpsTransferError(
+                        f"GET {url} returned {response.status_code}"
+                    )
+                if response.status_code == 200 and written > 0:
+                    os.truncate(part_path, 0)
+                with open(part_path, "ab") as part:
+                    part.writelines(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+
+        self._with_retries(stream)
+        os.replace(part_path, destination)
+        os.unlink(state_path)
+
+    def _with_retries(self, func, *args) -> None:
+        for attempt in range(1, self._retries + 1):
+            try:
+                func(*args)
+                return
+            except (requests.RequestException, HttpsTransferError, OSError) as e:
+                if attempt == self._retries:
+                    raise HttpsTransferError(
+                        f"Giving up after {attempt} attempts: {e}"
+                    ) from e
+                delay = min(2 ** (attempt - 1), 30)
+                self._logger.warning(
+                    f"[https-transfer] Attempt {attempt} failed ({e});"
+                    f" retrying in {delay}s."
+                )
+                time.sleep(delay)
+
+    @staticmethod
+    def _load_state(state_path, part_path, size, validator) -> set:
+        """Offsets already downloaded by an earlier attempt on the same object."""
+        # Without a validator, the object may have changed since.
+        if validator is None or not os.path.exists(part_path):
+            return set()
+        state = HttpsDownloader._read_state(state_path)
+        if (
+            state.get("mode") != "ranged"
+            or state.get("size") != size
+            or state.get("validator") != validator
+        ):
+            return set()
+        return set(state["done"])
+
+    @staticmethod
+    def _read_state(state_path) -> dict:
+        try:
+            with open(state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_state(state_path, size, validator, done=(), mode="ranged") -> None:
+        tmp_path = state_path + ".tmp"
+        state = {"mode": mode, "size": size, "validator": validator}
+        if mode == "ranged":
+            state["done"] = sorted(done)
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _verify(destination, algorithm, expected) -> None:
+        digest = hashlib.new(algorithm)
+        with open(destination, "rb") as f:
+            for block in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+                digest.update(block)
+        if digest.hexdigest() != expected:
+            os.unlink(destination)
+            raise HttpsTransferError(
+                f"{algorithm} checksum mismatch for {destination}: expected"
+                f" {expected}, got {digest.hexdigest()}"
+            )
@@ -0,0 +1,241 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import errno
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+# Ways a local file may be staged, from the most to the least isolated.
+LINK_POLICIES = ("copy", "hardlink", "symlink")
+# Policy inputs are staged with unless configured otherwise. A copy, or a
+# reflink where supported, keeps the user's file safe from activities that
+# modify their inputs in place; linking is opt-in.
+DEFAULT_LINK_POLICY = "copy"
+
+# Files at least this large are copied as several chunks in parallel.
+PARALLEL_COPY_THRESHOLD = 256 * 1024**2
+CHUNK_SIZE = 64 * 1024**2
+
+# ioctl request cloning a whole file on Linux (btrfs, XFS, ...).
+_FICLONE = 0x40049409
+
+# Errors meaning a zero-copy call is not available for this pair of files.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EBADF,
+}
+
+
+class LocalTransferError(Exception):
+    """Custom exception class for local staging errors."""
+
+
+@dataclass
+class LocalTransferResult:
+    """Outcome of staging a single local file."""
+
+    source: str
+    destination: str
+    bytes: int
+    seconds: float
+    method: str
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.seconds <= 0:
+            return float(self.bytes)
+        return self.bytes / self.seconds
+
+
+def stage_local_file(
+    source,
+    destination,
+    link_policy: str = "copy",
+    workers: int = 4,
+    parallel_threshold: int = PARALLEL_COPY_THRESHOLD,
+    logger: Optional[logging.Logger] = None,
+) -> LocalTransferResult:
+    """
+    Stage a file that is reachable from this node to ``destination``.
+
+    With the "copy" policy the data is cloned with a reflink when the file
+    system supports it, otherwise copied inside the kernel with
+    ``os.copy_file_range`` (in parallel chunks for large files) or
+    ``os.sendfile``, and only as a last resort through user space. The
+    "hardlink" and "symlink" policies link the file instead and fall back to
+    a copy when linking is not possible. Either way the file is staged next
+    to ``destination`` and then renamed over it, so a process still reading
+    an earlier file at that path keeps reading it intact.
+
+    :param source: Path of the file to stage
+    :param destination: Path the file should be available at
+    :param link_policy: One of LINK_POLICIES
+    :param workers: Number of parallel chunk copies for large files
+    :param parallel_threshold: Size from which chunks are copied in parallel
+    :param logger: The logger where to log information
+    :return: What was staged, how and how fast
+    :rtype: LocalTransferResult
+    """
+    logger = logging.getLogger(__name__) if logger is None else logger
+    if link_policy not in LINK_POLICIES:
+        raise LocalTransferError(
+            f"Unsupported link policy {link_policy}, expected one of {LINK_POLICIES}"
+        )
+
+    source = os.path.abspath(source)
+    destination = os.path.abspath(destination)
+    if not os.path.isfile(source):
+        raise LocalTransferError(f"Local file at {source} unable to be found.")
+
+    size = os.path.getsize(source)
+    start = time.monotonic()
+
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        method = "none"
+    else:
+        tmp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        try:
+            method = None
+            if link_policy == "hardlink":
+                method = _try_link(os.link, source, tmp_path, "hardlink", logger)
+            elif link_policy == "symlink":
+                method = _try_link(os.symlink, source, tmp_path, "symlink", logger)
+            if method is None:
+                method = _copy(source, tmp_path, size, workers, parallel_threshold)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            if os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    result = LocalTransferResult(
+        source=source,
+        destination=destination,
+        bytes=size,
+        seconds=time.monotonic() - start,
+        method=method,
+    )
+    logger.info(
+        f"[local-transfer] {source} -> {destination} via {method}: {size} bytes"
+        f" in {result.seconds:.3f}s ({result.bytes_per_second / 1024**2:.1f} MiB/s)"
+    )
+    return result
+
+
+def _try_link(link_func, source, destination, method, logger):
+    try:
+        link_func(source, destination)
+    except OSError as e:
+        logger.debug(f"[local-transfer] {method} not possible ({e}); copying.")
+        return None
+    return method
+
+
+def _copy(source, destination, size, workers, parallel_threshold) -> str:
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+
+        if _reflink(src_fd, dst_fd):
+            method = "reflink"
+        elif size >= parallel_threshold and workers > 1 and _copy_file_range_ok():
+            _parallel_copy_file_range(source, destination, size, workers)
+            method = "copy_file_range"
+        elif _copy_file_range_ok() and _copy_range(src_fd, dst_fd, 0, size):
+            method = "copy_file_range"
+        elif hasattr(os, "sendfile") and _sendfile(src_fd, dst_fd, size):
+            method = "sendfile"
+        else:
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            method = "copy"
+
+    shutil.copymode(source, destination)
+    return method
+
+
+def _reflink(src_fd, dst_fd) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+
+    import fcntl
+
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError:
+        return False
+    return True
+
+
+def _copy_file_range_ok() -> bool:
+    return hasattr(os, "copy_file_range")
+
+
+def _copy_range(src_fd, dst_fd, offset, count) -> bool:
+    """
+    Copy ``count`` bytes at ``offset`` inside the kernel.
+
+    Returns False, before anything was written, if copy_file_range is not
+    supported between these files.
+    """
+    copied = 0
+    while copied < count:
+        try:
+            n = os.copy_file_range(
+                src_fd, dst_fd, count - copied, offset + copied, offset + copied
+            )
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if n == 0:
+            break
+        copied += n
+    return True
+
+
+def _parallel_copy_file_range(source, destination, size, workers) -> None:
+    """Copy a large file as CHUNK_SIZE ranges on several threads."""
+    with open(destination, "r+b") as dst:
+        dst.truncate(size)
+
+    def copy_chunk(offset):
+        count = min(CHUNK_SIZE, size - offset)
+        with open(source, "rb") as src, open(destination, "r+b") as dst:
+            if not _copy_range(src.fileno(), dst.fileno(), offset, count):
+                src.seek(offset)
+                dst.seek(offset)
+                dst.write(src.read(count))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first error of any chunk.
+        list(pool.map(copy_chunk, range(0, size, CHUNK_SIZE)))
+
+
+def _sendfile(src_fd, dst_fd, size) -> bool:
+    copied = 0
+    while copied < size:
+        try:
+            n = os.sendfile(dst_fd, src_fd, copied, size - copied)
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if n == 0:
+            break
+        copied += n
+    return True
@@ -0,0 +1,245 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import hashlib
+import logging
+import os
+import pathlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from zambeze.orchestration.data.local_transfer import (
+    LocalTransferError,
+    stage_local_file,
+)
+
+DEFAULT_CACHE_MAX_BYTES = 20 * 1024**3
+
+
+class StagingCache:
+    """
+    Content-addressed cache of input files staged onto an agent.
+
+    Entries are keyed by a digest of where a file came from and what it looked
+    like there (endpoint, path, size, modification time and/or checksum), so a
+    changed source file never matches an old entry. Files are hardlinked into
+    and out of the cache, falling back to a reflink or an in-kernel copy
+    across file systems, so an entry may share its inode with an activity's
+    copy. The size and modification time of every entry are therefore
+    recorded when it is admitted, and an entry that no longer matches them
+    is dropped instead of being served. The least recently used entries are
+    evicted once the cache grows past ``max_bytes``. Files are linked or
+    copied without holding the cache's lock, which only guards its index.
+
+    Args:
+        cache_dir (str | pathlib.Path): Directory holding the cached files.
+        max_bytes (int): Size cap of the cache in bytes.
+        logger (logging.Logger): The logger where to log information.
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._cache_dir = pathlib.Path(cache_dir).expanduser()
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # key -> (size in bytes, mtime in ns), least recently used first.
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._load()
+
+    @classmethod
+    def from_settings(cls, settings, logger=None):
+        """
+        Create the agent's cache from the ``staging_cache`` settings section.
+
+        Returns:
+            Optional[StagingCache]: None when the cache is disabled.
+        """
+        cache_settings = settings.settings.get("staging_cache", {})
+        if not cache_settings.get("enabled", False):
+            return None
+
+        return cls(
+            cache_settings["directory"],
+            max_bytes=int(cache_settings.get("max_bytes", DEFAULT_CACHE_MAX_BYTES)),
+            logger=logger,
+        )
+
+    @staticmethod
+    def make_key(endpoint, path, size=None, mtime=None, checksum=None) -> str:
+        """
+        Build the cache key of a source file.
+
+        At least one of size/mtime or checksum should be given, otherwise a
+        file that changed at its source would still match its old entry.
+        """
+        fields = [endpoint, path, size, mtime, checksum]
+        digest = hashlib.sha256("\0".join(str(field) for field in fields).encode())
+        return digest.hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def materialize(self, key, dest_path) -> bool:
+        """
+        Place the cached file for ``key`` at ``dest_path``.
+
+        Returns:
+            bool: True on a cache hit, False if ``key`` is not cached.
+        """
+        entry_path = self._entry_path(key)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            if not self._is_intact(key, entry_path):
+                self._logger.warning(
+                    f"[staging-cache] Entry {key[:12]} changed since it was"
+                    " admitted; dropping it."
+                )
+                self._drop(key)
+                return False
+            self._entries.move_to_end(key)
+            mtime_ns = self._entries[key][1]
+
+        try:
+            stage_local_file(
+                entry_path, dest_path, link_policy="hardlink", logger=self._logger
+            )
+            # Persist recency in the access time so LRU order survives agent
+            # restarts; the modification time is what entries are checked by.
+            os.utime(entry_path, ns=(time.time_ns(), mtime_ns))
+        except (OSError, LocalTransferError) as e:
+            # Evicted by another thread in the meantime.
+            self._logger.debug(f"[staging-cache] Unable to use {key[:12]}: {e}")
+            return False
+
+        self._logger.info(f"[staging-cache] Hit {key[:12]} -> {dest_path}")
+        return True
+
+    def admit(self, key, src_path) -> None:
+        """
+        Add the freshly staged file at ``src_path`` to the cache.
+
+        Files larger than the whole cache are not admitted.
+        """
+        src_path = pathlib.Path(src_path)
+        src_stat = src_path.stat()
+        size = src_stat.st_size
+        if size > self._max_bytes:
+            self._logger.debug(
+                f"[staging-cache] {src_path} ({size} bytes) exceeds the cache size."
+            )
+            return
+
+        entry_path = self._entry_path(key)
+        if self._hit(key, entry_path):
+            return
+
+        # Staged aside, so that concurrent admissions of the same key do not
+        # collide, and published under the lock once complete.
+        tmp_path = entry_path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        stage_local_file(
+            src_path, tmp_path, link_policy="hardlink", logger=self._logger
+        )
+        with self._lock:
+            if self._hit(key, entry_path, locked=True):
+                tmp_path.unlink()
+                return
+            if key in self._entries:
+                self._drop(key)
+            os.replace(tmp_path, entry_path)
+            entry_stat = entry_path.stat()
+            self._stat_path(key).write_text(
+                f"{entry_stat.st_size} {entry_stat.st_mtime_ns}"
+            )
+
+            self._entries[key] = (entry_stat.st_size, entry_stat.st_mtime_ns)
+            self._total_bytes += entry_stat.st_size
+            self._evict()
+
+        self._logger.info(f"[staging-cache] Admitted {src_path} as {key[:12]}")
+
+    def _hit(self, key, entry_path, locked=False) -> bool:
+        """Whether an intact entry is cached for ``key``; marks it as used."""
+        if not locked:
+            with self._lock:
+                return self._hit(key, entry_path, locked=True)
+        if key in self._entries and self._is_intact(key, entry_path):
+            self._entries.move_to_end(key)
+            return True
+        return False
+
+    def _entry_path(self, key) -> pathlib.Path:
+        return self._cache_dir / key
+
+    def _stat_path(self, key) -> pathlib.Path:
+        return self._cache_dir / f"{key}.stat"
+
+    def _is_intact(self, key, entry_path) -> bool:
+        """Whether the entry still has the size and mtime it was admitted with."""
+        try:
+            entry_stat = entry_path.stat()
+        except FileNotFoundError:
+            return False
+        return (entry_stat.st_size, entry_stat.st_mtime_ns) == self._entries[key]
+
+    def _drop(self, key) -> None:
+        size, _ = self._entries.pop(key)
+        self._entry_path(key).unlink(missing_ok=True)
+        self._stat_path(key).unlink(missing_ok=True)
+        self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its cap."""
+        while self._total_bytes > self._max_bytes and self._entries:
+            key = next(iter(self._entries))
+            size = self._entries[key][0]
+            self._drop(key)
+            self._logger.debug(f"[staging-cache] Evicted {key[:12]} ({size} bytes)")
+
+    def _load(self) -> None:
+        """Index the entries left by a previous agent, oldest first."""
+        entries = []
+        for entry_path in self._cache_dir.iterdir():
+            if entry_path.suffix == ".stat":
+                continue
+            stat_path = self._stat_path(entry_path.name)
+            if entry_path.suffix == ".tmp" or not stat_path.exists():
+                entry_path.unlink(missing_ok=True)
+                continue
+            try:
+                size, mtime_ns = map(int, stat_path.read_text().split())
+            except ValueError:
+                entry_path.unlink(missing_ok=True)
+                stat_path.unlink(missing_ok=True)
+                continue
+            entry_stat = entry_path.stat()
+            entries.append((entry_stat.st_atime_ns, entry_path.name, size, mtime_ns))
+
+        for _, key, size, mtime_ns in sorted(entries):
+            self._entries[key] = (size, mtime_ns)
+            self._total_bytes += size
+        # Entries whose file is gone leave their stat file behind.
+        for stat_path in self._cache_dir.glob("*.stat"):
+            if stat_path.stem not in self._entries:
+                stat_path.unlink(missing_ok=True)
+        self._evict()
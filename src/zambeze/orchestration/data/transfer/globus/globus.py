@@ -3,13 +3,17 @@
 # Local imports
 from ..abstract_plugin import Plugin
 from .globus_common import (
+    group_items_by_endpoints,
     local_endpoint_exists,
+    DEFAULT_SYNC_LEVEL,
     SUPPORTED_ACTIONS,
 )
 from .globus_uri_separator import GlobusURISeparator
 from ..file_uri_separator import FileURISeparator
 from .globus_message_validator import GlobusMessageValidator
 from ...network import externalNetworkConnectionDetected
+from zambeze.orchestration.data.local_transfer import stage_local_file
+from zambeze.orchestration.data.transfer_client import make_transfer_client
 
 # Third party imports
 from globus_sdk.authorizers import GlobusAuthorizer
@@ -17,6 +21,7 @@ from globus_sdk.authorizers import GlobusAuthorizer
 import globus_sdk
 
 # Standard imports
+from copy import deepcopy
 import os
 from os.path import basename
 from os.path import exists
@@ -27,7 +32,6 @@ from typing import Optional, Any
 import json
 import logging
 import pickle
-import shutil
 
 
 class Globus(Plugin):
@@ -221,6 +225,7 @@ class Globus(Plugin):
 
         {
             "type": "synchronous",
+            "sync_level": "checksum",
             "items": [
                         {
                             "source": "globus://XXXXXXXX-...XXXXXXXXXXXX/file1.txt",
@@ -233,52 +238,63 @@ class Globus(Plugin):
             ]
         }
 
-        If the type is asynchrouns a runTransfer will return a callback action
-        that can be executed to check the status of the generated task
-        """
-        transfer_result = dict()
+        Items are grouped by (source, destination) endpoint pair and a single
+        Globus task is submitted per pair. "sync_level" is optional; it
+        defaults to "checksum" and may be any of SYNC_LEVELS.
 
-        for item in transfer["items"]:
-            source_globus_uri = self.__globus_uri_separator.separate(
-                item["source"], self.__default_endpoint
-            )
-            dest_globus_uri = self.__globus_uri_separator.separate(
-                item["destination"], self.__default_endpoint
-            )
+        If the type is synchronous, runTransfer waits for all tasks and
+        returns their final status. If it is asynchronous, runTransfer returns
+        a callback action per task that can be executed to check its status;
+        "callback" and "result" hold those of the first task.
+        """
+        sync_level = transfer.get("sync_level", DEFAULT_SYNC_LEVEL)
+        groups = group_items_by_endpoints(
+            transfer["items"],
+            lambda uri: self.__globus_uri_separator.separate(
+                uri, self.__default_endpoint
+            ),
+        )
 
+        submitted = []
+        for (source_uuid, dest_uuid), items in groups.items():
             tdata = globus_sdk.TransferData(
-                self.__tc,
-                source_globus_uri["uuid"],
-                dest_globus_uri["uuid"],
+                source_endpoint=source_uuid,
+                destination_endpoint=dest_uuid,
                 label="Zambeze Workflow",
-                sync_level="checksum",
+                sync_level=sync_level,
             )
+            for source_file_path, dest_file_path in items:
+                tdata.add_item(source_file_path, dest_file_path)
 
-            source_file_path = source_globus_uri["path"]
-            source_file_path += source_globus_uri["file_name"]
-
-            dest_file_path = dest_globus_uri["path"]
-            dest_file_path += dest_globus_uri["file_name"]
-            tdata.add_item(source_file_path, dest_file_path)
-
-            self._logger.info("Packet to be transferred by Globus.")
-            self._logger.info(json.dumps(dict(tdata), indent=4))
-            if "synchronous" == transfer["type"].lower():
-                transfer_result = self.__tc.submit_transfer(tdata)
-                self._logger.info(transfer_result)
-                task_id = transfer_result["task_id"]
+            self._logger.info(
+                f"Packet of {len(items)} items to be transferred by Globus."
+            )
+            self._logger.debug(json.dumps(dict(tdata), indent=4))
+            result = self.__tc.submit_transfer(tdata)
+            self._logger.info(result)
+            submitted.append(result)
+
+        if "synchronous" == transfer["type"].lower():
+            tasks = []
+            for result in submitted:
+                task_id = result["task_id"]
                 while not self.__tc.task_wait(task_id, timeout=60):
                     self._logger.info(
                         "Another minute went by without {0} terminating".format(task_id)
                     )
-            elif "asynchronous" == transfer["type"].lower():
-                result = self.__tc.submit_transfer(tdata)
-                self._logger.info(result)
-                transfer_result = {
-                    "callback": {"get_task_status": {"task_id": result["task_id"]}},
-                    "result": {"status": result["code"], "message": result["message"]},
-                }
-
+                task = self.__tc.get_task(task_id)
+                tasks.append({"task_id": task_id, "status": task["status"]})
+            return {"tasks": tasks}
+
+        tasks = [
+            {
+                "callback": {"get_task_status": {"task_id": result["task_id"]}},
+                "result": {"status": result["code"], "message": result["message"]},
+            }
+            for result in submitted
+        ]
+        transfer_result = dict(tasks[0]) if tasks else {}
+        transfer_result["tasks"] = tasks
         return transfer_result
 
     def __run_get_task_status(self, action_package: dict):
@@ -354,7 +370,7 @@ class Globus(Plugin):
                     if isfile(source_path):
                         destination_path = destination_path + basename(source_path)
 
-            shutil.copyfile(source_path, destination_path)
+            stage_local_file(source_path, destination_path, logger=self._logger)
 
     def __run_move_from_globus_collection(self, action_package: dict):
         """Method is designed to move a local file from a Globus collection
@@ -408,7 +424,7 @@ class Globus(Plugin):
                     if isfile(source_path):
                         destination_path = destination_path + source_file_name
 
-            shutil.copyfile(source_path, destination_path)
+            stage_local_file(source_path, destination_path, logger=self._logger)
 
     def __run_transfer_sanity_check(self, action_package: dict) -> tuple[bool, str]:
         """Checks to ensure that the action_package has the right format and
@@ -553,6 +569,16 @@ class Globus(Plugin):
         """
         self._valid_config(config)
 
+        if config.get("simulator", {}).get("enabled", False):
+            # Offline mode: the Transfer API is replaced by local copies, so no
+            # authentication or access to the Globus cloud is needed.
+            self.__tc = make_transfer_client(config, logger=self._logger)
+            self.__access_to_globus_cloud = True
+            self.__flow = "simulator"
+            self.__endpoints = deepcopy(config.get("local_endpoints", []))
+            self.__default_endpoint = config.get("default_endpoint")
+            self.__valid_actions()
+
         # TODO: BRING THIS BACK!
         # print("Config is")
         # print(config)
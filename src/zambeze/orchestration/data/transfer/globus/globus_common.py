@@ -11,6 +11,11 @@ SUPPORTED_ACTIONS = {
     "get_task_status": False,
 }
 
+# Globus sync levels, from the cheapest to the most thorough comparison of an
+# existing destination file with its source.
+SYNC_LEVELS = ("exists", "size", "mtime", "checksum")
+DEFAULT_SYNC_LEVEL = "checksum"
+
 
 def local_endpoint_exists(globus_uuid: str, endpoint_list: list[dict]) -> bool:
     for item in endpoint_list:
@@ -98,6 +103,52 @@ def check_transfer_endpoint(action_package: dict) -> tuple[bool, str]:
     return True, ""
 
 
+def check_sync_level(action_package: dict) -> tuple[bool, str]:
+    """Makes sure the optional 'sync_level' of a transfer is supported"""
+    sync_level = action_package.get("sync_level", DEFAULT_SYNC_LEVEL)
+    if sync_level not in SYNC_LEVELS:
+        return (
+            False,
+            f"Unsupported 'sync_level' {sync_level}, expected one of {SYNC_LEVELS}",
+        )
+    return True, ""
+
+
+def group_items_by_endpoints(items: list[dict], separate) -> dict:
+    """Groups transfer items by their (source, destination) endpoint pair
+
+    :param items: The 'items' of a 'transfer' action package
+    :type items: list[dict]
+    :param separate: Splits a globus URI into a dict with 'uuid', 'path' and
+        'file_name', e.g. a configured GlobusURISeparator's separate method
+    :return: Maps (source uuid, destination uuid) to the (source path,
+        destination path) pairs to transfer between them, in item order
+
+    :Example:
+
+    items = [
+        {"source": "globus://XXXX...XXXX/file1.txt",
+         "destination": "globus://YYYY...YYYY/dest/file1.txt"},
+        {"source": "globus://XXXX...XXXX/file2.txt",
+         "destination": "globus://YYYY...YYYY/dest/file2.txt"}
+    ]
+    groups = group_items_by_endpoints(items, separator.separate)
+    # {("XXXX...XXXX", "YYYY...YYYY"): [("/file1.txt", "/dest/file1.txt"),
+    #                                   ("/file2.txt", "/dest/file2.txt")]}
+    """
+    groups = {}
+    for item in items:
+        source = separate(item["source"])
+        destination = separate(item["destination"])
+        groups.setdefault((source["uuid"], destination["uuid"]), []).append(
+            (
+                source["path"] + source["file_name"],
+                destination["path"] + destination["file_name"],
+            )
+        )
+    return groups
+
+
 def get_mapped_collections(config: dict) -> list[str]:
     """Returns a list of the UUIDs that are mapped collections
 
@@ -1,6 +1,7 @@
 # Local imports
 from ..abstract_plugin_message_validator import PluginMessageValidator
 from .globus_common import (
+    check_sync_level,
     check_transfer_endpoint,
     check_all_items_have_valid_endpoints,
     SUPPORTED_ACTIONS,
@@ -27,6 +28,7 @@ class GlobusMessageValidator(PluginMessageValidator):
 
         {
             "type": "synchronous",
+            "sync_level": "checksum",
             "items": [
                 {
                    "source": "globus://XXXXXXXX-XX...X-XXXXXXXXXXXX/file1.txt",
@@ -53,6 +55,10 @@ class GlobusMessageValidator(PluginMessageValidator):
             synchronous and asynchronous you have specified {action_package['type']}",
                 )
 
+        valid, msg = check_sync_level(action_package)
+        if not valid:
+            return valid, msg
+
         return check_transfer_endpoint(action_package)
 
     def __run_move_to_globus_validation_check(
@@ -0,0 +1,309 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Optional, Protocol
+
+import globus_sdk
+
+from zambeze.orchestration.data.local_transfer import (
+    LocalTransferError,
+    stage_local_file,
+)
+
+
+class TransferClient(Protocol):
+    """
+    The part of ``globus_sdk.TransferClient`` Zambeze relies on.
+
+    TransferHippo and the Globus plugin only talk to a transfer service
+    through these calls, so anything implementing them, such as
+    LocalTransferSimulator, can stand in for the Globus Transfer API.
+    """
+
+    def submit_transfer(self, data) -> Any: ...
+
+    def get_task(self, task_id: str) -> Any: ...
+
+    def task_list(self, filter: str = "", limit: int = 10) -> Iterable: ...
+
+    def task_wait(
+        self, task_id: str, timeout: int = 10, polling_interval: int = 10
+    ) -> bool: ...
+
+    def cancel_task(self, task_id: str) -> Any: ...
+
+    def operation_ls(
+        self, endpoint_id: str, path: str = "/", filter: str = ""
+    ) -> Any: ...
+
+
+# One simulator per configuration, so every activity of an agent shares its
+# concurrency limit the way they would share a Globus account.
+_simulators = {}
+_simulators_lock = threading.Lock()
+
+
+def make_transfer_client(
+    globus_config: dict,
+    access_token: Optional[str] = None,
+    authorizer=None,
+    logger: Optional[logging.Logger] = None,
+) -> TransferClient:
+    """
+    Create the transfer client described by the Globus plugin configuration.
+
+    A LocalTransferSimulator is returned when ``globus_config`` holds an
+    enabled ``simulator`` section, otherwise a ``globus_sdk.TransferClient``
+    authorized with ``authorizer`` or, failing that, ``access_token``.
+
+    :Example: Simulator configuration
+
+    "simulator": {
+        "enabled": True,
+        "endpoints": {"<endpoint uuid>": "/tmp/sim/endpoint_a"},
+        "latency": 0.5,
+        "bandwidth": 104857600,
+        "failure_rate": 0.05,
+        "max_active_tasks": 4,
+        "seed": 42
+    }
+    """
+    simulator_config = globus_config.get("simulator", {})
+    if simulator_config.get("enabled", False):
+        key = json.dumps(simulator_config, sort_keys=True)
+        with _simulators_lock:
+            if key not in _simulators:
+                _simulators[key] = LocalTransferSimulator.from_config(
+                    simulator_config, logger=logger
+                )
+            return _simulators[key]
+
+    if authorizer is None:
+        authorizer = globus_sdk.AccessTokenAuthorizer(access_token)
+    return globus_sdk.TransferClient(authorizer=authorizer)
+
+
+def _globus_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class LocalTransferSimulator:
+    """
+    Stand-in for the Globus Transfer API that copies files on this machine.
+
+    Endpoints are mapped to local root directories; paths on endpoints that
+    are not mapped are used as they are. Every submitted task waits
+    ``latency`` seconds, copies its items for real and is then held back
+    until it took at least as long as ``bandwidth`` bytes per second allows.
+    A task fails if a source file is missing, if it is cancelled, or at
+    random with probability ``failure_rate``. At most ``max_active_tasks``
+    tasks run at once, the others stay queued as ACTIVE.
+
+    Task documents carry the fields of real ones Zambeze reads: task_id,
+    status, nice_status, files, bytes_transferred, request_time and
+    completion_time.
+
+    :param endpoints: Maps endpoint IDs to local root directories
+    :type endpoints: Optional[dict]
+    :param latency: Seconds every task waits before copying
+    :type latency: float
+    :param bandwidth: Bytes per second per task; 0 means unlimited
+    :type bandwidth: float
+    :param failure_rate: Probability that a task fails on purpose
+    :type failure_rate: float
+    :param max_active_tasks: Number of tasks copying at the same time
+    :type max_active_tasks: int
+    :param seed: Seed of the failure injection
+    :type seed: Optional[int]
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[dict] = None,
+        latency: float = 0.0,
+        bandwidth: float = 0,
+        failure_rate: float = 0.0,
+        max_active_tasks: int = 4,
+        seed: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._endpoints = dict(endpoints or {})
+        self._latency = latency
+        self._bandwidth = bandwidth
+        self._failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        # task_id -> task document
+        self._tasks = {}
+        # task_id -> Event set once the task reached a final status
+        self._done = {}
+        self._cancelled = set()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_active_tasks), thread_name_prefix="SimTransfer"
+        )
+
+    @classmethod
+    def from_config(cls, config: dict, logger=None):
+        return cls(
+            endpoints=config.get("endpoints"),
+            latency=float(config.get("latency", 0.0)),
+            bandwidth=float(config.get("bandwidth", 0)),
+            failure_rate=float(config.get("failure_rate", 0.0)),
+            max_active_tasks=int(config.get("max_active_tasks", 4)),
+            seed=config.get("seed"),
+            logger=logger,
+        )
+
+    def _local_path(self, endpoint_id, path) -> str:
+        root = self._endpoints.get(endpoint_id)
+        if root is None:
+            return path
+        return os.path.join(root, path.lstrip("/"))
+
+    def submit_transfer(self, data) -> dict:
+        data = dict(data)
+        task_id = str(uuid.uuid4())
+        items = [
+            (
+                self._local_path(data["source_endpoint"], item["source_path"]),
+                self._local_path(
+                    data["destination_endpoint"], item["destination_path"]
+                ),
+            )
+            for item in data.get("DATA", [])
+        ]
+        with self._lock:
+            fail_on_purpose = self._random.random() < self._failure_rate
+            self._tasks[task_id] = {
+                "task_id": task_id,
+                "type": "TRANSFER",
+                "label": data.get("label"),
+                "status": "ACTIVE",
+                "nice_status": "Queued",
+                "source_endpoint_id": data["source_endpoint"],
+                "destination_endpoint_id": data["destination_endpoint"],
+                "files": len(items),
+                "files_transferred": 0,
+                "bytes_transferred": 0,
+                "request_time": _globus_time(time.time()),
+                "completion_time": None,
+            }
+            self._done[task_id] = threading.Event()
+
+        self._pool.submit(self._run_task, task_id, items, fail_on_purpose)
+        self._logger.debug(f"[transfer-sim] Accepted task {task_id}: {items}")
+        return {
+            "task_id": task_id,
+            "code": "Accepted",
+            "message": "The transfer has been accepted and a task has been created",
+        }
+
+    def _run_task(self, task_id, items, fail_on_purpose) -> None:
+        start = time.monotonic()
+        self._update(task_id, nice_status="OK")
+        time.sleep(self._latency)
+
+        status, nice_status = "SUCCEEDED", "OK"
+        try:
+            for source, destination in items:
+                if task_id in self._cancelled:
+                    status, nice_status = "FAILED", "CANCELED"
+                    break
+                os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+                result = stage_local_file(source, destination, logger=self._logger)
+                with self._lock:
+                    task = self._tasks[task_id]
+                    task["files_transferred"] += 1
+                    task["bytes_transferred"] += result.bytes
+        except (OSError, LocalTransferError) as e:
+            self._logger.debug(f"[transfer-sim] Task {task_id} failed: {e}")
+            status, nice_status = "FAILED", "FILE_NOT_FOUND"
+
+        if status == "SUCCEEDED" and fail_on_purpose:
+            status, nice_status = "FAILED", "SIMULATED_FAILURE"
+
+        if self._bandwidth > 0:
+            nbytes = self._tasks[task_id]["bytes_transferred"]
+            elapsed = time.monotonic() - start - self._latency
+            time.sleep(max(0.0, nbytes / self._bandwidth - elapsed))
+
+        self._update(
+            task_id,
+            status=status,
+            nice_status=nice_status,
+            completion_time=_globus_time(time.time()),
+        )
+        self._done[task_id].set()
+
+    def _update(self, task_id, **fields) -> None:
+        with self._lock:
+            self._tasks[task_id].update(fields)
+
+    def get_task(self, task_id: str) -> dict:
+        with self._lock:
+            if task_id not in self._tasks:
+                raise KeyError(f"Unknown task {task_id}")
+            return dict(self._tasks[task_id])
+
+    def task_list(self, filter: str = "", limit: int = 10) -> list[dict]:
+        """Supports the ``task_id:<id>,<id>`` filter TransferHippo uses."""
+        task_ids = None
+        for clause in filter.split("/"):
+            if clause.startswith("task_id:"):
+                task_ids = set(clause.split(":", 1)[1].split(","))
+
+        with self._lock:
+            tasks = [
+                dict(task)
+                for task_id, task in self._tasks.items()
+                if task_ids is None or task_id in task_ids
+            ]
+        return tasks[:limit]
+
+    def task_wait(
+        self, task_id: str, timeout: int = 10, polling_interval: int = 10
+    ) -> bool:
+        return self._done[task_id].wait(timeout)
+
+    def cancel_task(self, task_id: str) -> dict:
+        with self._lock:
+            self._cancelled.add(task_id)
+        return {"code": "Canceled", "message": "The task has been cancelled."}
+
+    def operation_ls(self, endpoint_id: str, path: str = "/", filter: str = ""):
+        """Supports the ``name:<file name>`` filter TransferHippo uses."""
+        directory = self._local_path(endpoint_id, path)
+        name = filter.split(":", 1)[1] if filter.startswith("name:") else None
+
+        listing = []
+        for entry in os.scandir(directory):
+            if name is not None and entry.name != name:
+                continue
+            entry_stat = entry.stat()
+            listing.append(
+                {
+                    "name": entry.name,
+                    "type": "dir" if entry.is_dir() else "file",
+                    "size": entry_stat.st_size,
+                    "last_modified": _globus_time(entry_stat.st_mtime),
+                }
+            )
+        return listing
@@ -0,0 +1,79 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+
+class TransferCoordinatorError(Exception):
+    """Raised to activities waiting on a transfer that did not succeed."""
+
+
+class TransferCoordinator:
+    """
+    Merges identical transfers requested by concurrent activities of an agent.
+
+    The first TransferHippo to claim a transfer owns it: it submits the
+    transfer and later resolves the claim with the path where the file
+    landed, or fails it. Every later claim of the same transfer while it is
+    in flight receives the owner's Future instead of submitting its own task,
+    so a fan-out campaign reading one input costs a single Globus task.
+
+    Once resolved or failed a transfer is no longer in flight; later requests
+    for it are served by the staging cache or transferred again.
+
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._lock = threading.Lock()
+        # key -> Future of the path the owner transferred the file to.
+        self._inflight = {}
+        # Number of claims merged into an in-flight transfer.
+        self.merged = 0
+
+    @staticmethod
+    def make_key(source_ep, source_path, dest_ep) -> tuple:
+        return (source_ep, source_path, dest_ep)
+
+    def claim(self, key) -> tuple[Future, bool]:
+        """
+        Claim the transfer identified by ``key``.
+
+        :return: The Future of the transfer and whether the caller owns it,
+            in which case it must eventually call resolve() or fail().
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                return future, True
+            self.merged += 1
+
+        self._logger.info(f"[transfer-coord] Merged into in-flight transfer {key}")
+        return future, False
+
+    def resolve(self, key, path) -> None:
+        """Complete an owned transfer; ``path`` is where the file landed."""
+        with self._lock:
+            future = self._inflight.pop(key)
+        future.set_result(path)
+
+    def fail(self, key, reason) -> None:
+        """Complete an owned transfer that did not succeed."""
+        with self._lock:
+            future = self._inflight.pop(key)
+        future.set_exception(TransferCoordinatorError(f"{key}: {reason}"))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._inflight)
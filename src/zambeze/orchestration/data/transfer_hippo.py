@@ -3,8 +3,35 @@ import pathlib
 import time
 import globus_sdk
 
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urlparse
 from zambeze.identity import valid_uuid
+from zambeze.orchestration.data.https_transfer import (
+    HttpsDownloader,
+    HttpsTransferError,
+    parse_checksum,
+)
+from zambeze.orchestration.data.local_transfer import (
+    DEFAULT_LINK_POLICY,
+    LocalTransferError,
+    stage_local_file,
+)
+from zambeze.orchestration.data.staging_cache import StagingCache
+from zambeze.orchestration.data.transfer_client import make_transfer_client
+from zambeze.orchestration.data.transfer_coordinator import TransferCoordinatorError
+from zambeze.orchestration.data.transfer_metrics import (
+    TransferRecord,
+    globus_timestamp,
+)
+
+# Globus task statuses after which a task will no longer change.
+GLOBUS_TERMINAL_STATUSES = ("SUCCEEDED", "FAILED")
+# Largest number of task IDs queried in a single task_list call.
+GLOBUS_POLL_BATCH_SIZE = 50
+# Schemes of files that are reachable from the agent's file system.
+LOCAL_SCHEMES = ("file", "local")
+# Schemes of files downloaded directly from HTTP(S) servers.
+HTTPS_SCHEMES = ("https", "http")
 
 
 class TransferHippoError(Exception):
@@ -13,6 +40,11 @@ class TransferHippoError(Exception):
     pass
 
 
+class InvalidTransferFilesError(TransferHippoError):
+    """Raised when the files of an activity failed validation; trying
+    again does not help."""
+
+
 class TransferHippo:
     """
     TransferHippo is the handler for all data movement in Zambeze. It handles:
@@ -26,18 +58,87 @@ class TransferHippo:
     Supported source types are:
     A. Local file: 'local'.
     B. Globus-accessible file: 'globus'.
+    C. File served over HTTP(S): 'https' (or 'http').
+
+    Local files are staged into the destination directory with the zero-copy
+    local transfer engine. They are copied with a reflink, copy_file_range or
+    sendfile by default, so activities modifying their inputs leave the
+    user's files untouched, and linked when the ``local_staging`` settings
+    ask for a hardlink or symlink.
+
+    HTTP(S) files are downloaded in the background while Globus transfers are
+    in flight, as parallel Range requests over a pooled session when the
+    server allows it. A checksum given as a URL fragment, for example
+    ``https://host/data.h5#sha256=<hex>``, is verified once downloaded.
+
+    An optional StagingCache shared across TransferHippo instances lets
+    repeated Globus inputs be linked from the agent's cache instead of being
+    transferred again.
+
+    An optional TransferCoordinator shared across TransferHippo instances
+    merges identical Globus transfers in flight at the same time: only the
+    first requester submits a task, the others wait for it and stage the file
+    locally from where it landed.
+
+    When a TransferMetrics collector is attached, every finished Globus task,
+    download and local staging is reported to it with its size, timing and
+    outcome.
     """
 
-    def __init__(self, agent_id, settings, logger, tokens=None):
+    def __init__(
+        self,
+        agent_id,
+        settings,
+        logger,
+        tokens=None,
+        staging_cache=None,
+        dest_dir=None,
+        coordinator=None,
+        metrics=None,
+    ):
         self._logger = logger
         self._settings = settings
         self._agent_id = agent_id
         self.tokens = tokens
+        self._staging_cache = staging_cache
+        # Where files land; the current working directory if not given. A
+        # globus:// URL sends Globus files to a directory on another endpoint.
+        self._dest_dir = dest_dir
+        self._dest_endpoint = None
+        if dest_dir is not None:
+            dest_url = urlparse(dest_dir)
+            if dest_url.scheme == "globus":
+                self._dest_endpoint = dest_url.netloc
+                self._dest_dir = dest_url.path
+        self._coordinator = coordinator
+        self._metrics = metrics
+        # When the files were requested, the start of their queue time.
+        self._requested_at = time.time()
 
         self.file_objects = {}
-        self._supported_schemes = ["local", "globus"]
+        self._supported_schemes = ["local", "globus", "https", "http"]
         self.globus_transfer_client = None  # Globus-specific tooling.
         self.globus_task_ids = []
+        # task_id -> {"source_endpoint", "destination_endpoint", "files"}
+        self.globus_tasks = {}
+        # task_id -> final status ("SUCCEEDED", "FAILED" or "TIMEOUT")
+        self.task_outcomes = {}
+        # Destination paths satisfied from the staging cache.
+        self.cache_hits = []
+        # LocalTransferResult of every staged local file.
+        self.local_transfers = []
+        # dest_path -> staging cache key, for files to admit once transferred.
+        self._cache_keys = {}
+        # URL -> Future of its HttpsTransferResult.
+        self.https_downloads = {}
+        # HttpsTransferResult of every completed download.
+        self.https_transfers = []
+        self._https_pool = None
+        self._https_downloader = None
+        # dest_path -> coordinator key of the transfers this hippo owns.
+        self._claims = {}
+        # source URL -> (Future, dest_path) of transfers owned by another hippo.
+        self.merged_transfers = {}
 
     def load(self, raw_file_paths):
         """
@@ -54,6 +155,7 @@ class TransferHippo:
             raise TransferHippoError(
                 "TransferHippo can only be loaded once... Aborting!"
             )
+        self._requested_at = time.time()
 
         for raw_file_path in raw_file_paths:
             file_url = urlparse(raw_file_path)
@@ -86,6 +188,13 @@ class TransferHippo:
                 self._logger.error(err + err2)
                 return False
 
+            if self._dest_endpoint is not None and file_url.scheme != "globus":
+                self._logger.error(
+                    f"[th-validate] File at {file_path_resolved} can not be sent"
+                    f" to Globus endpoint {self._dest_endpoint}."
+                )
+                return False
+
             if (
                 file_url.scheme == "local"
                 and not pathlib.Path(file_path_resolved).exists()
@@ -112,6 +221,19 @@ class TransferHippo:
                     self._logger.error("[th-validate] Globus path to file is empty.")
                     return False
 
+            if file_url.scheme in HTTPS_SCHEMES:
+                if not file_url.netloc or not os.path.basename(file_url.path):
+                    self._logger.error(
+                        f"[th-validate] URL {file_url.geturl()} has no host or file name."
+                    )
+                    return False
+
+                try:
+                    parse_checksum(file_url.fragment)
+                except HttpsTransferError as e:
+                    self._logger.error(f"[th-validate] {e}")
+                    return False
+
         return True
 
     def check_auth(self):
@@ -127,14 +249,202 @@ class TransferHippo:
     def start_transfer(self):
         """
         Start the transfer process for files loaded into the TransferHippo.
+
+        Globus files are grouped by (source endpoint, destination endpoint)
+        and one Globus task is submitted per group. Submissions for different
+        groups run in parallel, and each resulting task is tracked separately
+        in ``globus_tasks``. When a staging cache is attached, files it already
+        holds are linked into place instead of being transferred. HTTP(S)
+        downloads are started in the background; transfer_wait collects them.
+
+        Raises:
+            TransferHippoError: If a local file could not be staged or if one
+                or more of the groups could not be submitted. Groups that were
+                submitted remain tracked.
+        """
+        self._stage_local_files()
+        self._start_https_downloads()
+
+        globus_files = self._collect_globus_files()
+        if not globus_files:
+            return
+
+        # The local simulator when configured, the Globus Transfer API otherwise.
+        self.globus_transfer_client = make_transfer_client(
+            self._settings.settings["plugins"]["globus"],
+            access_token=(self.tokens or {}).get("globus", {}).get("access_token"),
+            logger=self._logger,
+        )
+
+        # Both link files into place locally, which a remote destination rules out.
+        remote_dest = self._dest_endpoint is not None
+        if self._staging_cache is not None and not remote_dest:
+            globus_files = self._stage_from_cache(globus_files)
+
+        if self._coordinator is not None and not remote_dest:
+            globus_files = self._claim_transfers(globus_files)
+
+        globus_groups = {}
+        for source_ep, dest_ep, source_path, dest_path in globus_files:
+            globus_groups.setdefault((source_ep, dest_ep), []).append(
+                (source_path, dest_path)
+            )
+        if not globus_groups:
+            return
+
+        max_workers = min(len(globus_groups), self._max_parallel_submissions())
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                endpoints: pool.submit(self._submit_globus_group, *endpoints, items)
+                for endpoints, items in globus_groups.items()
+            }
+
+        failed_groups = []
+        for (source_ep, dest_ep), future in futures.items():
+            items = globus_groups[(source_ep, dest_ep)]
+            try:
+                transfer_task_id = future.result()
+            except Exception as e:
+                self._logger.error(
+                    f"[th-start] unable to submit transfer {source_ep} -> {dest_ep}:"
+                    f" {type(e).__name__}: {e}"
+                )
+                failed_groups.append((source_ep, dest_ep))
+                self._release_claims(items, "FAILED")
+                continue
+
+            s = f"[th-start] submitted transfer {len(items)} files"
+            s2 = f" ({source_ep} -> {dest_ep}): task_id={transfer_task_id}"
+            self._logger.info(s + s2)
+            self.globus_task_ids.append(transfer_task_id)
+            self.globus_tasks[transfer_task_id] = {
+                "source_endpoint": source_ep,
+                "destination_endpoint": dest_ep,
+                "files": items,
+                "submitted_at": time.time(),
+            }
+
+        if failed_groups:
+            # Nobody waits on this hippo's tasks after an error, so do not
+            # leave other activities waiting on them either.
+            self.abandon_claims("ABANDONED")
+            raise TransferHippoError(
+                f"Unable to submit Globus transfers for endpoint pairs: {failed_groups}"
+            )
+
+    def _stage_local_files(self):
+        """
+        Stage the loaded local files into the destination directory.
+
+        Raises:
+            TransferHippoError: If any local file could not be staged.
+        """
+        local_files = [
+            file_path_resolved
+            for file_path_resolved, file_data in self.file_objects.items()
+            if file_data["file_url"].scheme in LOCAL_SCHEMES
+        ]
+        if not local_files:
+            return
+
+        local_settings = self._settings.settings.get("local_staging", {})
+        link_policy = local_settings.get("link_policy", DEFAULT_LINK_POLICY)
+        workers = max(1, int(local_settings.get("workers", 4)))
+        dest_dir = self._dest_dir or os.getcwd()
+
+        def stage(source):
+            started_at = time.time()
+            try:
+                result = stage_local_file(
+                    source,
+                    os.path.join(dest_dir, os.path.basename(source)),
+                    link_policy=link_policy,
+                    workers=workers,
+                    logger=self._logger,
+                )
+            except (OSError, LocalTransferError):
+                self._record_transfer(
+                    source, "local", "local", "FAILED", 1, 0, started_at
+                )
+                raise
+            self._record_transfer(
+                source, "local", "local", "SUCCEEDED", 1, result.bytes, started_at
+            )
+            return result
+
+        with ThreadPoolExecutor(max_workers=min(len(local_files), workers)) as pool:
+            futures = {source: pool.submit(stage, source) for source in local_files}
+
+        failed_files = []
+        for source, future in futures.items():
+            try:
+                self.local_transfers.append(future.result())
+            except (OSError, LocalTransferError) as e:
+                self._logger.error(f"[th-local] Unable to stage {source}: {e}")
+                failed_files.append(source)
+
+        if failed_files:
+            raise TransferHippoError(f"Unable to stage local files: {failed_files}")
+
+    def _start_https_downloads(self):
+        """
+        Start downloading the loaded HTTP(S) files into the destination
+        directory, one file per thread of the pool.
+        """
+        https_files = [
+            file_data["file_url"]
+            for file_data in self.file_objects.values()
+            if file_data["file_url"].scheme in HTTPS_SCHEMES
+        ]
+        if not https_files:
+            return
+
+        https_settings = self._settings.settings.get("https_staging", {})
+        workers = max(1, int(https_settings.get("workers", 4)))
+        self._https_downloader = HttpsDownloader(
+            workers=workers,
+            retries=int(https_settings.get("retries", 3)),
+            logger=self._logger,
+        )
+        self._https_pool = ThreadPoolExecutor(
+            max_workers=min(len(https_files), workers),
+            thread_name_prefix="HttpsDownload",
+        )
+
+        def download(url, host, dest_path, checksum):
+            started_at = time.time()
+            try:
+                result = self._https_downloader.download(url, dest_path, checksum)
+            except Exception:
+                self._record_transfer(url, "https", host, "FAILED", 1, 0, started_at)
+                raise
+            self._record_transfer(
+                url, "https", host, "SUCCEEDED", 1, result.bytes, started_at
+            )
+            return result
+
+        dest_dir = self._dest_dir or os.getcwd()
+        for file_url in https_files:
+            url = file_url._replace(fragment="").geturl()
+            dest_path = os.path.join(dest_dir, os.path.basename(file_url.path))
+            self.https_downloads[url] = self._https_pool.submit(
+                download,
+                url,
+                file_url.netloc,
+                dest_path,
+                parse_checksum(file_url.fragment),
+            )
+            self._logger.info(f"[th-https] Downloading {url} -> {dest_path}")
+
+    def _collect_globus_files(self):
         """
-        globus_init = False
-        globus_counter = 0
-        task_data = None
+        List the loaded Globus files together with where they should land.
 
-        # TODO: Make this generic; Create transfer holder for each type. Then
-        # pack the files in each in a loop. at the end, start each of the
-        # transfers.
+        Returns:
+            list[tuple[str, str, str, str]]: (source_ep, dest_ep, source_path,
+            dest_path) for every Globus file.
+        """
+        globus_files = []
         for resolved_file_url, file_data in self.file_objects.items():
             file_url_obj = file_data["file_url"]
 
@@ -147,59 +457,472 @@ class TransferHippo:
             ]:  # TODO: should just be 'local'.
                 continue
 
-            if not globus_init:
-                globus_init = True
-                source_ep = file_url_obj.netloc
-                dest_ep = self._settings.settings["plugins"]["globus"]["local_ep"]
+            if file_url_obj.scheme in HTTPS_SCHEMES:
+                continue
+
+            source_ep = file_url_obj.netloc
+            dest_ep = (
+                self._dest_endpoint
+                or self._settings.settings["plugins"]["globus"]["local_ep"]
+            )
 
-                self._logger.info(f"EXTOKENS: {self.tokens}")
-                self.globus_transfer_client = globus_sdk.TransferClient(
-                    authorizer=globus_sdk.AccessTokenAuthorizer(
-                        self.tokens["globus"]["access_token"]
-                    )
+            filename = os.path.basename(resolved_file_url)
+            dest_filename = os.path.join(self._dest_dir or os.getcwd(), filename)
+            globus_files.append((source_ep, dest_ep, file_url_obj.path, dest_filename))
+
+        return globus_files
+
+    def _stage_from_cache(self, globus_files):
+        """
+        Link every Globus file the staging cache already holds into place.
+
+        Returns:
+            list: The Globus files that still need to be transferred.
+        """
+        directories = {}
+        for source_ep, _, source_path, _ in globus_files:
+            directories.setdefault(
+                (source_ep, os.path.dirname(source_path)), set()
+            ).add(os.path.basename(source_path))
+
+        max_workers = min(len(directories), self._max_parallel_submissions())
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            listings = dict(
+                zip(
+                    directories,
+                    pool.map(
+                        lambda item: self._list_globus_directory(*item[0], item[1]),
+                        directories.items(),
+                    ),
                 )
-                task_data = globus_sdk.TransferData(
-                    self.globus_transfer_client,
-                    source_endpoint=source_ep,
-                    destination_endpoint=dest_ep,
+            )
+
+        remaining = []
+        for globus_file in globus_files:
+            source_ep, _, source_path, dest_path = globus_file
+            entry = listings[(source_ep, os.path.dirname(source_path))].get(
+                os.path.basename(source_path)
+            )
+            if entry is not None:
+                key = StagingCache.make_key(
+                    source_ep,
+                    source_path,
+                    size=entry["size"],
+                    mtime=entry["last_modified"],
                 )
+                if self._staging_cache.materialize(key, dest_path):
+                    self.cache_hits.append(dest_path)
+                    continue
+                self._cache_keys[dest_path] = key
+            remaining.append(globus_file)
 
-            filename = os.path.basename(resolved_file_url)
-            dest_filename = os.path.join(os.getcwd(), filename)
-            task_data.add_item(file_url_obj.path, dest_filename)
-            globus_counter += 1
+        return remaining
+
+    def _claim_transfers(self, globus_files):
+        """
+        Claim every Globus file with the transfer coordinator.
+
+        Returns:
+            list: The Globus files this hippo owns and has to transfer; the
+            others are tracked in ``merged_transfers``.
+        """
+        owned = []
+        for source_ep, dest_ep, source_path, dest_path in globus_files:
+            key = self._coordinator.make_key(source_ep, source_path, dest_ep)
+            future, owner = self._coordinator.claim(key)
+            if owner:
+                self._claims[dest_path] = key
+                owned.append((source_ep, dest_ep, source_path, dest_path))
+            else:
+                source_url = f"globus://{source_ep}{source_path}"
+                self.merged_transfers[source_url] = (future, dest_path)
+        return owned
+
+    def _release_claims(self, items, status):
+        """Complete the coordinator claims held on transferred items."""
+        for _, dest_path in items:
+            key = self._claims.pop(dest_path, None)
+            if key is None:
+                continue
+            if status == "SUCCEEDED":
+                self._coordinator.resolve(key, dest_path)
+            else:
+                self._coordinator.fail(key, status)
 
-        if task_data and globus_counter > 0:
-            transfer_task_id = self.globus_transfer_client.submit_transfer(task_data)[
-                "task_id"
+    def abandon_claims(self, status="FAILED"):
+        """
+        Fail the coordinator claims this hippo still holds.
+
+        Activities merged onto this hippo's transfers wait on its claims; once
+        it stops following its transfers, e.g. after an error, they have to
+        be released for those activities to fail instead of waiting forever.
+        Claims already resolved are left alone.
+
+        Args:
+            status (str): Reason the merged activities are failed with.
+        """
+        self._release_claims([(None, path) for path in list(self._claims)], status)
+
+    def _list_globus_directory(self, endpoint, directory, names):
+        """
+        List the files ``names`` of a directory on a Globus endpoint with a
+        single call, for their size and modification time.
+
+        Returns:
+            dict: Listing entries by file name; files that could not be
+            listed are missing and bypass the cache.
+        """
+        # The name filter spares listing a whole directory for a single file.
+        ls_filter = f"name:{next(iter(names))}" if len(names) == 1 else ""
+        try:
+            listing = self.globus_transfer_client.operation_ls(
+                endpoint, path=directory, filter=ls_filter
+            )
+            return {entry["name"]: entry for entry in listing if entry["name"] in names}
+        except Exception as e:
+            self._logger.debug(
+                f"[th-cache] Unable to list {endpoint}:{directory}; not caching"
+                f" its files. {e}"
+            )
+            return {}
+
+    def _admit_to_cache(self, task_id):
+        """Add the files of a succeeded Globus task to the staging cache."""
+        for _, dest_path in self.globus_tasks[task_id]["files"]:
+            key = self._cache_keys.pop(dest_path, None)
+            if key is None:
+                continue
+            try:
+                self._staging_cache.admit(key, dest_path)
+            except OSError as e:
+                self._logger.error(f"[th-cache] Unable to cache {dest_path}: {e}")
+
+    def _record_transfer(
+        self, task_id, scheme, source, status, files, nbytes, started_at
+    ):
+        """Report a local staging or HTTP(S) download that just ended."""
+        if self._metrics is None:
+            return
+        self._metrics.record(
+            TransferRecord(
+                task_id=task_id,
+                scheme=scheme,
+                source_endpoint=source,
+                destination_endpoint="local",
+                status=status,
+                files=files,
+                bytes=nbytes,
+                queued_at=self._requested_at,
+                started_at=started_at,
+                ended_at=time.time(),
+            )
+        )
+
+    def _record_globus_task(self, task_id, task, status):
+        """Report a finished Globus task from its task document."""
+        if self._metrics is None:
+            return
+        tracked = self.globus_tasks[task_id]
+        self._metrics.record(
+            TransferRecord(
+                task_id=task_id,
+                scheme="globus",
+                source_endpoint=tracked["source_endpoint"],
+                destination_endpoint=tracked["destination_endpoint"],
+                status=status,
+                files=task.get("files", len(tracked["files"])),
+                bytes=task.get("bytes_transferred", 0),
+                queued_at=self._requested_at,
+                started_at=tracked["submitted_at"],
+                ended_at=globus_timestamp(task.get("completion_time"), time.time()),
+            )
+        )
+
+    def _submit_globus_group(self, source_ep, dest_ep, items):
+        """
+        Submit a single Globus task for all items of an endpoint pair.
+
+        Args:
+            source_ep (str): Source Globus endpoint/collection ID.
+            dest_ep (str): Destination Globus endpoint/collection ID.
+            items (list[tuple[str, str]]): (source_path, dest_path) pairs.
+
+        Returns:
+            str: The Globus task ID.
+        """
+        task_data = globus_sdk.TransferData(
+            source_endpoint=source_ep,
+            destination_endpoint=dest_ep,
+        )
+        for source_path, dest_path in items:
+            task_data.add_item(source_path, dest_path)
+
+        return self.globus_transfer_client.submit_transfer(task_data)["task_id"]
+
+    def _max_parallel_submissions(self):
+        """Maximum number of Globus tasks submitted concurrently."""
+        globus_settings = self._settings.settings["plugins"].get("globus", {})
+        return max(1, int(globus_settings.get("max_parallel_submissions", 8)))
+
+    def transfer_wait(
+        self, timeout=-1, initial_interval=1.0, max_interval=60.0, backoff=2.0
+    ):
+        """
+        Wait for all submitted transfers to complete.
+
+        Every round polls all outstanding tasks at once, then sleeps for an
+        interval that starts at ``initial_interval`` and grows by ``backoff``
+        up to ``max_interval``, so short transfers are noticed quickly while
+        long ones cost few API calls. HTTP(S) downloads are awaited within the
+        same deadline and reported under their URL.
+
+        Args:
+            timeout (int): Overall deadline in seconds; -1 waits forever.
+            initial_interval (float): Seconds to sleep after the first round.
+            max_interval (float): Upper bound on the sleep between rounds.
+            backoff (float): Multiplier applied to the interval every round.
+
+        Returns:
+            dict: Maps each task ID (or URL) to "SUCCEEDED", "FAILED", or
+            "TIMEOUT" if the task was still running when the deadline passed.
+
+        Raises:
+            Exception: Whatever polling the Globus tasks raised; the claims
+                of the tasks still running are failed first.
+        """
+        deadline = None if timeout == -1 else time.monotonic() + timeout
+        try:
+            self._wait_globus_tasks(deadline, initial_interval, max_interval, backoff)
+        finally:
+            # Only left after an error: every task that finished or timed out
+            # already released its claims.
+            self.abandon_claims()
+
+        self._wait_https_downloads(deadline)
+        self._wait_merged_transfers(deadline)
+
+        return self._outcomes()
+
+    def _wait_globus_tasks(self, deadline, initial_interval, max_interval, backoff):
+        """Poll the outstanding Globus tasks until they finish or time out."""
+        outstanding = self._outstanding_globus_tasks()
+        interval = initial_interval
+        while outstanding:
+            outstanding = self._update_globus_tasks(outstanding)
+            if not outstanding:
+                break
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._logger.error(
+                        f"[th-wait] Timed out waiting for tasks: {sorted(outstanding)}"
+                    )
+                    for task_id in outstanding:
+                        self.task_outcomes[task_id] = "TIMEOUT"
+                        self._release_claims(
+                            self.globus_tasks[task_id]["files"], "TIMEOUT"
+                        )
+                        self._record_globus_task(task_id, {}, "TIMEOUT")
+                    break
+                time.sleep(min(interval, remaining))
+            else:
+                time.sleep(interval)
+            interval = min(interval * backoff, max_interval)
+
+    def cancel(self):
+        """
+        Cancel the transfers that have not finished yet.
+
+        Outstanding Globus tasks are cancelled on the service and downloads
+        that have not started are dropped; a transfer_wait or poll afterwards
+        reports them as failed once the service confirms the cancellation.
+        """
+        for task_id in sorted(self._outstanding_globus_tasks()):
+            try:
+                self.globus_transfer_client.cancel_task(task_id)
+                self._logger.info(f"[th-cancel] Cancelled task {task_id}")
+            except Exception as e:
+                self._logger.error(f"[th-cancel] Unable to cancel {task_id}: {e}")
+
+        for url, future in self.https_downloads.items():
+            if future.cancel():
+                self._logger.info(f"[th-cancel] Dropped download of {url}")
+
+    def poll(self):
+        """
+        Check once, without blocking, whether all transfers have completed.
+
+        Lets a single watcher thread follow the transfers of many hippos
+        instead of dedicating a thread to each transfer_wait.
+
+        Returns:
+            Optional[dict]: The transfer_wait result once every transfer has
+            finished, None while some are still running.
+        """
+        outstanding = self._outstanding_globus_tasks()
+        if outstanding and self._update_globus_tasks(outstanding):
+            return None
+
+        pending = [future for future in self.https_downloads.values()]
+        pending += [future for future, _ in self.merged_transfers.values()]
+        if not all(future.done() for future in pending):
+            return None
+
+        self._wait_https_downloads(None)
+        self._wait_merged_transfers(None)
+        return self._outcomes()
+
+    def _outstanding_globus_tasks(self):
+        return {
+            task_id
+            for task_id in self.globus_task_ids
+            if task_id not in self.task_outcomes
+        }
+
+    def _update_globus_tasks(self, outstanding):
+        """
+        Poll the outstanding Globus tasks once and settle the finished ones.
+
+        Returns:
+            set: The tasks still running.
+        """
+        outstanding = set(outstanding)
+        for task_id, task in self._poll_globus_tasks(outstanding).items():
+            if task["status"] in GLOBUS_TERMINAL_STATUSES:
+                self.task_outcomes[task_id] = task["status"]
+                outstanding.discard(task_id)
+                if task["status"] == "SUCCEEDED" and self._staging_cache is not None:
+                    self._admit_to_cache(task_id)
+                self._release_claims(
+                    self.globus_tasks[task_id]["files"], task["status"]
+                )
+                self._record_globus_task(task_id, task, task["status"])
+                self._logger.info(
+                    f"[th-wait] task_id={task_id} finished: {task['status']}"
+                )
+        return outstanding
+
+    def _outcomes(self):
+        return {
+            task_id: self.task_outcomes[task_id]
+            for task_id in [
+                *self.globus_task_ids,
+                *self.https_downloads,
+                *self.merged_transfers,
             ]
-            s = f"[th-start] submitted transfer {globus_counter} files: task_id={transfer_task_id}"
-            self._logger.info(s)
-            self.globus_task_ids.append(transfer_task_id)
+        }
 
-    def transfer_wait(self, timeout=-1):
+    def _wait_merged_transfers(self, deadline):
+        """
+        Wait for the transfers other hippos own on behalf of this one, and
+        stage each file from where it landed into this hippo's destination.
+        """
+        pending = {
+            source_url: merged
+            for source_url, merged in self.merged_transfers.items()
+            if source_url not in self.task_outcomes
+        }
+        if not pending:
+            return
+
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        wait([future for future, _ in pending.values()], timeout=remaining)
+
+        local_settings = self._settings.settings.get("local_staging", {})
+        for source_url, (future, dest_path) in pending.items():
+            if not future.done():
+                self._logger.error(f"[th-wait] Timed out waiting for {source_url}")
+                self.task_outcomes[source_url] = "TIMEOUT"
+                continue
+            try:
+                landed_path = future.result()
+                if os.path.abspath(landed_path) != os.path.abspath(dest_path):
+                    self.local_transfers.append(
+                        stage_local_file(
+                            landed_path,
+                            dest_path,
+                            link_policy=local_settings.get(
+                                "link_policy", DEFAULT_LINK_POLICY
+                            ),
+                            logger=self._logger,
+                        )
+                    )
+                self.task_outcomes[source_url] = "SUCCEEDED"
+            except (OSError, LocalTransferError, TransferCoordinatorError) as e:
+                self._logger.error(f"[th-wait] Unable to obtain {source_url}: {e}")
+                self.task_outcomes[source_url] = "FAILED"
+
+    def _wait_https_downloads(self, deadline):
+        """Record the outcome of every HTTP(S) download started so far."""
+        pending = {
+            url: future
+            for url, future in self.https_downloads.items()
+            if url not in self.task_outcomes
+        }
+        if not pending:
+            return
+
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        wait(pending.values(), timeout=remaining)
+
+        for url, future in pending.items():
+            if future.cancelled():
+                self.task_outcomes[url] = "FAILED"
+                continue
+            if not future.done():
+                # The download keeps running; its file may still show up.
+                self._logger.error(f"[th-wait] Timed out downloading {url}")
+                self.task_outcomes[url] = "TIMEOUT"
+                continue
+            try:
+                self.https_transfers.append(future.result())
+                self.task_outcomes[url] = "SUCCEEDED"
+            except (OSError, HttpsTransferError) as e:
+                self._logger.error(f"[th-wait] Unable to download {url}: {e}")
+                self.task_outcomes[url] = "FAILED"
+
+        if all(future.done() for future in self.https_downloads.values()):
+            self._https_pool.shutdown()
+            self._https_downloader.close()
+
+    def _poll_globus_tasks(self, task_ids):
         """
-        Wait for the transfer to complete.
+        Fetch the task documents of several Globus tasks in as few calls as
+        possible.
 
         Args:
-            timeout (int): Time in seconds to wait before timing out.
+            task_ids (Iterable[str]): IDs of the tasks to query.
 
         Returns:
-            bool: True if transfer is completed or False if timed out.
+            dict: Maps task ID to its Globus task document.
+        """
+        task_ids = sorted(task_ids)
+        tasks = {}
+        for i in range(0, len(task_ids), GLOBUS_POLL_BATCH_SIZE):
+            batch = task_ids[i : i + GLOBUS_POLL_BATCH_SIZE]
+            response = self.globus_transfer_client.task_list(
+                filter=f"task_id:{','.join(batch)}", limit=len(batch)
+            )
+            for task in response:
+                tasks[task["task_id"]] = task
+
+        # Anything the listing did not return is looked up individually.
+        for task_id in task_ids:
+            if task_id not in tasks:
+                tasks[task_id] = self.globus_transfer_client.get_task(task_id)
+
+        return tasks
+
+    @staticmethod
+    def all_succeeded(outcomes):
         """
+        Check whether every task in a transfer_wait result succeeded.
 
-        # TODO: generalize
-        if len(self.globus_task_ids) == 0:
-            return True
+        Args:
+            outcomes (dict): Result of transfer_wait.
 
-        wait_start_t = time.time()
-        while True:
-            for task_id in self.globus_task_ids:
-                status = self.globus_transfer_client.get_task(task_id)["status"]
-                if status in ["SUCCEEDED", "FAILED"]:
-                    return True
-                if timeout != -1 and time.time() - wait_start_t > timeout:
-                    self._logger.error("TIMEOUT CONDITION ACHIEVED!")
-                    return False
-                time.sleep(2)
-            time.sleep(0.5)
+        Returns:
+            bool: True if no task failed or timed out.
+        """
+        return all(status == "SUCCEEDED" for status in outcomes.values())
@@ -0,0 +1,187 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from zambeze.orchestration.db.model.transfer_metric_model import TransferMetricModel
+
+# Number of most recent transfers aggregated per endpoint pair.
+DEFAULT_WINDOW = 100
+
+
+@dataclass
+class TransferRecord:
+    """
+    Measurements of one transfer: a Globus task, an HTTP(S) download or a
+    local file staging. Timestamps are seconds since the epoch.
+    """
+
+    task_id: str
+    scheme: str
+    source_endpoint: str
+    destination_endpoint: str
+    status: str
+    files: int
+    bytes: int
+    # When the activity asked for the transfer.
+    queued_at: float
+    # When data started moving (submission accepted for Globus tasks).
+    started_at: float
+    ended_at: float
+
+    @property
+    def queue_seconds(self) -> float:
+        return max(0.0, self.started_at - self.queued_at)
+
+    @property
+    def seconds(self) -> float:
+        return max(0.0, self.ended_at - self.started_at)
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.seconds <= 0:
+            return float(self.bytes)
+        return self.bytes / self.seconds
+
+    @property
+    def latency_per_file(self) -> float:
+        """Seconds from the request until the transfer ended, per file."""
+        return (self.ended_at - self.queued_at) / max(1, self.files)
+
+    def to_model(self, agent_id=None) -> TransferMetricModel:
+        return TransferMetricModel(
+            agent_id=agent_id,
+            task_id=self.task_id,
+            scheme=self.scheme,
+            source_endpoint=self.source_endpoint,
+            destination_endpoint=self.destination_endpoint,
+            status=self.status,
+            files=self.files,
+            bytes=self.bytes,
+            queued_at=int(self.queued_at * 1000),
+            started_at=int(self.started_at * 1000),
+            ended_at=int(self.ended_at * 1000),
+        )
+
+
+def globus_timestamp(value, default: float) -> float:
+    """
+    Convert a Globus task document timestamp to seconds since the epoch.
+
+    :Example:
+
+    >>> globus_timestamp("2024-01-01T00:00:00+00:00", 0.0)
+    1704067200.0
+    """
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class TransferMetrics:
+    """
+    Agent-wide collector of transfer measurements.
+
+    Every TransferHippo reports its finished transfers here. The most recent
+    ``window`` transfers of each (source, destination) endpoint pair are kept
+    in memory for snapshot(); each record is also written to the local DB
+    when a DAO is given, so slow endpoint pairs can be found after the fact.
+
+    :param agent_id: Agent the transfers belong to.
+    :param dao: Optional TransferMetricDAO persisting every record.
+    :param window: Number of recent transfers aggregated per endpoint pair.
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        agent_id=None,
+        dao=None,
+        window: int = DEFAULT_WINDOW,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._agent_id = agent_id
+        self._dao = dao
+        self._window = window
+        self._lock = threading.Lock()
+        # (scheme, source_endpoint, destination_endpoint) -> recent records
+        self._recent = {}
+        # Totals since the agent started.
+        self._totals = {"transfers": 0, "failures": 0, "files": 0, "bytes": 0}
+
+    def record(self, record: TransferRecord) -> None:
+        pair = (record.scheme, record.source_endpoint, record.destination_endpoint)
+        with self._lock:
+            self._recent.setdefault(pair, deque(maxlen=self._window)).append(record)
+            self._totals["transfers"] += 1
+            self._totals["failures"] += record.status != "SUCCEEDED"
+            self._totals["files"] += record.files
+            self._totals["bytes"] += record.bytes
+
+        self._logger.info(
+            f"[transfer-metrics] {record.scheme} {record.task_id} {record.status}:"
+            f" {record.files} files, {record.bytes} bytes in {record.seconds:.3f}s"
+            f" ({record.bytes_per_second / 1024**2:.1f} MiB/s),"
+            f" queued {record.queue_seconds:.3f}s"
+        )
+
+        if self._dao is not None:
+            try:
+                self._dao.insert(record.to_model(self._agent_id))
+            except SQLAlchemyError as e:
+                self._logger.error(f"[transfer-metrics] Unable to store record: {e}")
+
+    def snapshot(self) -> dict:
+        """
+        Aggregate the recent transfers of every endpoint pair.
+
+        :return: {"totals": {...}, "pairs": [{...}, ...]}; a pair entry holds
+            its scheme, endpoints, transfer/failure/file/byte counts, the
+            aggregate rate and the mean and median queue time and per-file
+            latency over the window.
+        """
+        with self._lock:
+            totals = dict(self._totals)
+            recent = {pair: list(records) for pair, records in self._recent.items()}
+
+        pairs = []
+        for (scheme, source, destination), records in recent.items():
+            seconds = sum(record.seconds for record in records)
+            moved = sum(record.bytes for record in records)
+            queue = [record.queue_seconds for record in records]
+            latency = [record.latency_per_file for record in records]
+            pairs.append(
+                {
+                    "scheme": scheme,
+                    "source_endpoint": source,
+                    "destination_endpoint": destination,
+                    "transfers": len(records),
+                    "failures": sum(r.status != "SUCCEEDED" for r in records),
+                    "files": sum(record.files for record in records),
+                    "bytes": moved,
+                    "bytes_per_second": moved / seconds if seconds > 0 else 0.0,
+                    "queue_seconds_mean": statistics.fmean(queue),
+                    "queue_seconds_median": statistics.median(queue),
+                    "latency_per_file_mean": statistics.fmean(latency),
+                    "latency_per_file_median": statistics.median(latency),
+                }
+            )
+
+        return {"totals": totals, "pairs": pairs}
@@ -2,7 +2,14 @@ from abc import ABCMeta, abstractmethod
 from typing import Optional, Any
 import logging
 
-from zambeze.orchestration.db.dao.dao_utils import get_db_engine
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from zambeze.orchestration.db.dao.dao_utils import (
+    get_db_engine,
+    get_insert_stmt,
+    get_update_stmt,
+)
 from zambeze.orchestration.db.model.abstract_entity import AbstractEntity
 
 
@@ -26,3 +33,49 @@ class AbstractDAO(object, metaclass=ABCMeta):
     @abstractmethod
     def update(self, entity: AbstractEntity) -> None:
         raise NotImplementedError()
+
+
+class TransactionalDAO(AbstractDAO):
+    """DAO whose inserts and updates each commit in their own transaction."""
+
+    def insert(self, entity: AbstractEntity) -> None:
+        self.insert_and_return_id(entity)
+
+    def insert_and_return_id(self, entity: AbstractEntity) -> int:
+        values = entity.get_all_values()
+        insert_stmt = get_insert_stmt(entity)
+
+        self._logger.debug(f"Saving entity: {insert_stmt}")
+
+        try:
+            with self._engine.begin() as conn:
+                result = conn.execute(text(insert_stmt), values)
+                _id = result.lastrowid
+        except SQLAlchemyError as e:
+            msg = f"Insert error with the local db. Exception was {e}"
+            self._logger.error(msg)
+            raise
+
+        return _id
+
+    def update(self, entity: AbstractEntity) -> None:
+        values = entity.get_values_without_id()
+        update_stmt = get_update_stmt(entity)
+
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(text(update_stmt), values)
+        except SQLAlchemyError as e:
+            msg = f"Update error with the local db. Exception was {e}"
+            self._logger.error(msg)
+            raise
+
+    def _select(self, stmt: str, params: dict) -> list[dict]:
+        try:
+            with self._engine.connect() as conn:
+                rows = conn.execute(text(stmt), params)
+                return [dict(row._mapping) for row in rows]
+        except SQLAlchemyError as e:
+            msg = f"Select error with the local db. Exception was {e}"
+            self._logger.error(msg)
+            raise
@@ -0,0 +1,10 @@
+from zambeze.orchestration.db.dao.abstract_dao import TransactionalDAO
+
+
+class ActivityResultDAO(TransactionalDAO):
+    def select_by_cache_key(self, cache_key: str) -> list[dict]:
+        stmt = (
+            "SELECT * FROM activity_result WHERE cache_key = :cache_key"
+            " ORDER BY result_id DESC"
+        )
+        return self._select(stmt, {"cache_key": cache_key})
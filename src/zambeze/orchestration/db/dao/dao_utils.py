@@ -12,8 +12,11 @@ def create_local_db() -> None:
     with open(LOCAL_DB_SCHEMA) as f:
         ff = f.read()
 
-    with eng.connect() as conn:
-        conn.execute(text(ff))
+    # SQLite runs a single statement per execute() call.
+    with eng.begin() as conn:
+        for stmt in ff.split(";"):
+            if stmt.strip():
+                conn.execute(text(stmt))
 
 
 def get_db_engine():
@@ -30,7 +33,7 @@ def get_db_engine():
 
 def get_update_stmt(entity: AbstractEntity) -> str:
     field_names = entity.FIELD_NAMES.split(", ")
-    x = [f"{name}=:{name}" for name in field_names if name != "activity_id"]
+    x = [f"{name}=:{name}" for name in field_names if name != entity.ID_FIELD_NAME]
     names = ", ".join(x)
 
     id_value = entity.__getattribute__(entity.ID_FIELD_NAME)
@@ -0,0 +1,7 @@
+from zambeze.orchestration.db.dao.abstract_dao import TransactionalDAO
+
+
+class TransferMetricDAO(TransactionalDAO):
+    def select_by_task_id(self, task_id: str) -> list[dict]:
+        stmt = "SELECT * FROM transfer_metric WHERE task_id = :task_id"
+        return self._select(stmt, {"task_id": task_id})
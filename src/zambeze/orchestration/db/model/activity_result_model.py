@@ -0,0 +1,43 @@
+from zambeze.orchestration.db.model.abstract_entity import AbstractEntity
+
+
+class ActivityResultModel(AbstractEntity):
+    ID_FIELD_NAME = "result_id"
+    FIELD_NAMES = (
+        "result_id, agent_id, cache_key, activity_id, manifest, result, created_at"
+    )
+    ENTITY_NAME = "activity_result"
+
+    def __init__(
+        self,
+        result_id=None,
+        agent_id=None,
+        cache_key=None,
+        activity_id=None,
+        manifest=None,
+        result=None,
+        created_at=None,
+    ):
+        self.result_id = result_id
+        self.agent_id = agent_id
+        self.cache_key = cache_key
+        self.activity_id = activity_id
+        self.manifest = manifest
+        self.result = result
+        self.created_at = created_at
+
+    def get_all_values(self) -> dict:
+        vals = {"result_id": self.result_id}
+        vals.update(self.get_values_without_id())
+        return vals
+
+    def get_values_without_id(self) -> dict:
+        vals = {
+            "agent_id": self.agent_id,
+            "cache_key": self.cache_key,
+            "activity_id": self.activity_id,
+            "manifest": self.manifest,
+            "result": self.result,
+            "created_at": self.created_at,
+        }
+        return vals
@@ -0,0 +1,60 @@
+from zambeze.orchestration.db.model.abstract_entity import AbstractEntity
+
+
+class TransferMetricModel(AbstractEntity):
+    ID_FIELD_NAME = "metric_id"
+    FIELD_NAMES = (
+        "metric_id, agent_id, task_id, scheme, source_endpoint,"
+        " destination_endpoint, status, files, bytes, queued_at, started_at,"
+        " ended_at"
+    )
+    ENTITY_NAME = "transfer_metric"
+
+    def __init__(
+        self,
+        metric_id=None,
+        agent_id=None,
+        task_id=None,
+        scheme=None,
+        source_endpoint=None,
+        destination_endpoint=None,
+        status=None,
+        files=0,
+        bytes=0,
+        queued_at=None,
+        started_at=None,
+        ended_at=None,
+    ):
+        self.metric_id = metric_id
+        self.agent_id = agent_id
+        self.task_id = task_id
+        self.scheme = scheme
+        self.source_endpoint = source_endpoint
+        self.destination_endpoint = destination_endpoint
+        self.status = status
+        self.files = files
+        self.bytes = bytes
+        self.queued_at = queued_at
+        self.started_at = started_at
+        self.ended_at = ended_at
+
+    def get_all_values(self) -> dict:
+        vals = {"metric_id": self.metric_id}
+        vals.update(self.get_values_without_id())
+        return vals
+
+    def get_values_without_id(self) -> dict:
+        vals = {
+            "agent_id": self.agent_id,
+            "task_id": self.task_id,
+            "scheme": self.scheme,
+            "source_endpoint": self.source_endpoint,
+            "destination_endpoint": self.destination_endpoint,
+            "status": self.status,
+            "files": self.files,
+            "bytes": self.bytes,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+        }
+        return vals
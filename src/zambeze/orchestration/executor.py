@@ -5,17 +5,49 @@
 
 import logging
 import os
-import requests
 import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from queue import Queue, Empty
 from typing import Optional
+from urllib.parse import urlparse
 
+from zambeze.orchestration.metrics import agent_metrics
 from zambeze.orchestration.monitor import Monitor
+from zambeze.orchestration.resource_ledger import ResourceLedger, ResourceLedgerError
+from zambeze.orchestration.result_cache import ResultCache
+from zambeze.orchestration.retry import (
+    CANCELLED,
+    COMMAND,
+    PERMANENT,
+    TIMEOUT,
+    classify_exception,
+)
+from zambeze.orchestration.transfer_watcher import MAX_PENDING_CANCELS, TransferWatcher
 from zambeze.settings import ZambezeSettings
 from zambeze.orchestration.message.message_factory import MessageFactory
-from zambeze.orchestration.data.transfer_hippo import TransferHippo
+from zambeze.orchestration.data.local_transfer import LocalTransferError
+from zambeze.orchestration.data.staging_cache import StagingCache
+from zambeze.orchestration.data.transfer_coordinator import TransferCoordinator
+from zambeze.orchestration.data.transfer_metrics import TransferMetrics
+from zambeze.orchestration.db.dao.activity_result_dao import ActivityResultDAO
+from zambeze.orchestration.db.dao.transfer_metric_dao import TransferMetricDAO
+from zambeze.orchestration.data.transfer_hippo import (
+    InvalidTransferFilesError,
+    TransferHippo,
+    TransferHippoError,
+)
+
+
+# Status message of shell activities that did not exit by themselves.
+_SHELL_FAILURE_MSGS = {
+    "TIMEOUT": "ACTIVITY TIMED OUT.",
+    "CANCELLED": "ACTIVITY CANCELLED.",
+}
+# Failure class of a shell command by how it ended.
+_SHELL_FAILURE_CLASSES = {"TIMEOUT": TIMEOUT, "CANCELLED": CANCELLED}
 
 
 class Executor(threading.Thread):
@@ -25,6 +57,8 @@ class Executor(threading.Thread):
     :type settings: ZambezeSettings
     :param logger: The logger where to log information/warning or errors.
     :type logger: Optional[logging.Logger]
+    :param prefetch_workers: Number of threads staging inputs ahead of execution.
+    :type prefetch_workers: int
     """
 
     def __init__(
@@ -32,6 +66,7 @@ class Executor(threading.Thread):
         settings: ZambezeSettings,
         logger: Optional[logging.Logger] = None,
         agent_id: Optional[str] = None,
+        prefetch_workers: int = 4,
     ) -> None:
         """Create an object that represents a distributed agent."""
         threading.Thread.__init__(self)
@@ -52,22 +87,84 @@ class Executor(threading.Thread):
 
         self.control_dict = dict()
 
+        self._working_dir = self._settings.settings["plugins"]["All"][
+            "default_working_directory"
+        ]
+
+        # Agent-wide cache of staged input files, shared by every activity.
+        self._staging_cache = None
+        # Outputs and results of past shell activities, by their inputs.
+        self._result_cache = None
+        # Merges identical transfers requested by concurrent activities.
+        self._transfer_coordinator = TransferCoordinator(logger=self._logger)
+        # Follows submitted TRANSFER activities so this thread does not block.
+        self._transfer_watcher = TransferWatcher(self.to_status_q, logger=self._logger)
+
+        # CPUs, memory and GPUs of the node; shell activities run side by
+        # side on the shell pool as long as they fit.
+        self._resource_ledger = ResourceLedger.from_settings(
+            self._settings, logger=self._logger
+        )
+        self._shell_pool = ThreadPoolExecutor(
+            max_workers=self._resource_ledger.cpus, thread_name_prefix="ShellThread"
+        )
+        # activity_id -> Event set to cancel the activity. Cancelling an
+        # activity that has not started yet leaves an Event already set.
+        self._cancel_events = {}
+        self._cancel_lock = threading.Lock()
+
+        # Inputs of queued activities are staged in the background so that
+        # they are already local once the activity becomes ready.
+        # activity_id -> (Future of the staging, files staged).
+        self._prefetched = {}
+        # activity_id -> input files of every activity that was prefetched or
+        # staged and has not finished yet; their staged copies stay in place.
+        self._staged_inputs = {}
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_pool = ThreadPoolExecutor(
+            max_workers=prefetch_workers, thread_name_prefix="PrefetchThread"
+        )
+
+        transfer_metric_dao = None
         try:
             self._msg_factory = MessageFactory(logger=self._logger)
             self._transfer_hippo = TransferHippo(
                 agent_id=self._agent_id, logger=self._logger, settings=self._settings
             )
+            self._staging_cache = StagingCache.from_settings(
+                self._settings, logger=self._logger
+            )
+            self._result_cache = ResultCache.from_settings(
+                self._settings,
+                ActivityResultDAO(self._logger),
+                agent_id=agent_id,
+                logger=self._logger,
+            )
+            transfer_metric_dao = TransferMetricDAO(self._logger)
         except Exception as e:
             self._logger.error(str(e))
 
+        # Size, rate and timing of every transfer, stored in the local DB
+        # when it could be opened. The agent's metrics collector reads them.
+        self.transfer_metrics = TransferMetrics(
+            agent_id=agent_id, dao=transfer_metric_dao, logger=self._logger
+        )
+
         # Initially we don't have a monitor. This can become a Monitor Thread object.
         # It can revert to None.
         self.monitor = None
+        self._metrics = agent_metrics()
         self._logger.info("[executor] Successfully initialized Executor!")
 
+    @property
+    def watched_transfers(self) -> int:
+        """Number of TRANSFER activities whose transfers are running."""
+        return self._transfer_watcher.watching
+
     def run(self):
         """Override the Thread 'run' method to instead run our
         process when Thread.start() is called!"""
+        self._transfer_watcher.start()
         # Create persisent "__process()"
         self.__process()
 
@@ -81,9 +178,7 @@ class Executor(threading.Thread):
         self._logger.info("eins")
 
         # Change to the agent's desired working directory.
-        default_working_dir = self._settings.settings["plugins"]["All"][
-            "default_working_directory"
-        ]
+        default_working_dir = self._working_dir
         self._logger.info(
             f"[executor] Moving to working directory {default_working_dir}"
         )
@@ -107,7 +202,6 @@ class Executor(threading.Thread):
 
         while True:
             self._logger.info("[exec] Retrieving a message! ")
-            self._logger.info(f" SIZE OF QUEUE: {self.to_process_q.qsize()}")
             dag_msg = self.to_process_q.get()
 
             self._logger.debug(f"[exec] Retrieved message! {dag_msg}...")
@@ -226,6 +320,18 @@ class Executor(threading.Thread):
                     if total_completed == len(pred_track_dict):
                         break
 
+            if self._cancelled(dag_msg[0]):
+                status_msg = {
+                    "status": "FAILED",
+                    "activity_id": dag_msg[0],
+                    "msg": "ACTIVITY CANCELLED.",
+                }
+                self.to_status_q.put(status_msg)
+                self._forget_cancel_event(dag_msg[0])
+                self._discard_prefetch(dag_msg[0])
+                self._logger.info(f"[exec] Skipping cancelled activity {dag_msg[0]}")
+                continue
+
             if activity_msg.type.upper() == "SHELL":
                 self._logger.info("[exec] SHELL message received:")
 
@@ -253,7 +359,7 @@ class Executor(threading.Thread):
                                 "msg": "UNABLE TO ACQUIRE FILES.",
                                 "details": e,
                             }
-                            self.to_status_q.put(status_msg)
+                            self._fail(dag_msg, status_msg, classify_exception(e))
                             self._logger.error(
                                 f"[exec] Unable to acquire files. Caught {e}"
                             )
@@ -278,44 +384,60 @@ class Executor(threading.Thread):
                 # checked_result = self._settings.plugins.check(activity_msg.data.body)
                 # self._logger.debug(f"[EXECUTOR] Checked result: {checked_result}")
 
-                # TODO: handle failures from the SHELL activity.
-                try:
-                    self._settings.plugins.run(activity_msg)
-                except Exception as e:
-                    self._logger.error(f"[vierzehn] caught: {e}")
-
                 # if checked_result.error_detected() is False:
                 #     self._settings.plugins.run(activity_msg)
                 # else:
                 #     self._logger.debug(
                 #         "Skipping run - error detected when running " "plugin check"
                 #     )
-            elif activity_msg.data.body.type == "TRANSFER":
-                source_file = activity_msg.data
-
-                transfer_hippo = TransferHippo(
-                    agent_id=self._agent_id,
-                    settings=self._settings,
-                    logger=self._logger,
-                    tokens=transfer_tokens,
-                )
 
-                # Load all files into the TransferHippo.
-                self._logger.info("[exec] Loading files into TransferHippo.")
-                transfer_hippo.load(source_file)
-                # Validate that all files are accessible.
-                self._logger.info("[exec] Validating file accessibility.")
-                transfer_hippo.validate()
-                # Ensure that all authentication is achieved.
-                self._logger.info("[exec] Checking user auth.")
-                transfer_hippo.check_auth()
-                # Submit the transfer
-                self._logger.info("[exec] Submit the transfer.")
-                transfer_hippo.start_transfer()
-                # BLOCK: wait for transfer to finish
-                self._logger.info("[exec] Wait for transfer...")
-                transfer_hippo.transfer_wait()
-                self._logger.info("[exec] File transfer finished!")
+                # An identical past run makes running the activity unnecessary.
+                cache_key = self._result_cache_key(activity_msg)
+                if cache_key is not None and self._restore_result(dag_msg, cache_key):
+                    continue
+
+                # Wait until the activity fits next to the running ones.
+                try:
+                    allocation = self._resource_ledger.acquire(
+                        dag_msg[0], ResourceLedger.request_for(activity_msg)
+                    )
+                except ResourceLedgerError as e:
+                    status_msg = {
+                        "status": "FAILED",
+                        "activity_id": dag_msg[0],
+                        "msg": "INSUFFICIENT RESOURCES.",
+                        "details": str(e),
+                    }
+                    self._fail(dag_msg, status_msg, PERMANENT)
+                    self._logger.error(f"[exec] Unable to admit activity: {e}")
+                    continue
+
+                self._metrics.stage(dag_msg[0], "admitted")
+                self._shell_pool.submit(
+                    self._run_shell_activity, dag_msg, allocation, cache_key
+                )
+                continue
+            elif activity_msg.type.upper() == "TRANSFER":
+                try:
+                    self._start_transfer_activity(
+                        activity_msg,
+                        transfer_tokens,
+                        on_failure=partial(self._fail, dag_msg),
+                    )
+                except Exception as e:
+                    status_msg = {
+                        "status": "FAILED",
+                        "activity_id": dag_msg[0],
+                        "msg": "FILE TRANSFER FAILED.",
+                        "details": e,
+                    }
+                    self._fail(dag_msg, status_msg, classify_exception(e))
+                    self._logger.error(f"[exec] Unable to start transfer: {e}")
+                    continue
+
+                # The transfer watcher reports the status once it is done.
+                self._logger.info("[exec] Transfer submitted; moving on.")
+                continue
 
             # If we get here, it should be because nothing failed
             status_msg = {
@@ -328,6 +450,338 @@ class Executor(threading.Thread):
 
             self._logger.info("[exec] Waiting for messages")
 
+    def _run_shell_activity(self, dag_msg, allocation, cache_key=None) -> None:
+        """
+        Run an admitted SHELL activity within its allocation and report its
+        status; runs on the shell pool. With a ``cache_key`` the outputs and
+        result of a successful run are kept in the result cache.
+        """
+        activity_id, activity_msg = dag_msg[0], dag_msg[1]["activity"]
+        arguments = {
+            "limits": allocation.limits(track_gpus=self._resource_ledger.gpus > 0),
+            "timeout": activity_msg.timeout,
+            "cancel": self._cancel_event(activity_id),
+        }
+        self._metrics.stage(activity_id, "started")
+        self._metrics.inc("zambeze_active_workers", pool="shell")
+        try:
+            result = self._settings.plugins.run(activity_msg, arguments)
+        except Exception as e:
+            self._logger.error(f"[exec] Shell activity raised {type(e).__name__}: {e}")
+            status_msg = {
+                "status": "FAILED",
+                "activity_id": activity_id,
+                "msg": "SHELL ACTIVITY FAILED.",
+                "details": str(e),
+            }
+            self._fail(dag_msg, status_msg, classify_exception(e))
+            return
+        finally:
+            self._resource_ledger.release(allocation)
+            self._forget_cancel_event(activity_id)
+            with self._prefetch_lock:
+                self._staged_inputs.pop(activity_id, None)
+            self._metrics.inc("zambeze_active_workers", -1, pool="shell")
+            self._metrics.stage(activity_id, "finished")
+
+        failed = [cmd for cmd in result or [] if cmd["returncode"] != 0]
+        if failed:
+            status_msg = {
+                "status": "FAILED",
+                "activity_id": activity_id,
+                "msg": _SHELL_FAILURE_MSGS.get(
+                    failed[0].get("outcome"), "SHELL COMMAND FAILED."
+                ),
+                "details": failed,
+            }
+            self._logger.error(
+                f"[exec] Shell command exited with {failed[0]['returncode']}:"
+                f" {failed[0]['stderr_tail']}"
+            )
+            outcome = failed[0].get("outcome")
+            self._fail(
+                dag_msg, status_msg, _SHELL_FAILURE_CLASSES.get(outcome, COMMAND)
+            )
+            return
+
+        if cache_key is not None:
+            try:
+                self._result_cache.store(
+                    cache_key, activity_id, self._output_paths(activity_msg), result
+                )
+            except (OSError, LocalTransferError) as e:
+                self._logger.error(
+                    f"[exec] Unable to cache result of {activity_id}: {e}"
+                )
+
+        status_msg = {
+            "status": "SUCCEEDED",
+            "activity_id": activity_id,
+            "msg": "SUCCESSFULLY COMPLETED TASK.",
+            "result": result,
+        }
+        self.to_status_q.put(status_msg)
+
+    def _result_cache_key(self, activity_msg) -> Optional[str]:
+        """
+        Key of a shell activity in the result cache, once its inputs are
+        staged; None if the activity did not opt in or the cache is disabled.
+        """
+        if self._result_cache is None or not getattr(activity_msg, "cache", False):
+            return None
+        try:
+            return self._result_cache.make_key(
+                activity_msg, self._input_paths(activity_msg.files)
+            )
+        except OSError as e:
+            self._logger.warning(f"[exec] Unable to hash inputs, not caching: {e}")
+            return None
+
+    def _restore_result(self, dag_msg, cache_key) -> bool:
+        """
+        Restore the outputs of an identical past run and report its result.
+
+        :return: False if there is no usable past run and the activity has
+            to be run
+        """
+        entry = self._result_cache.lookup(cache_key)
+        if entry is None:
+            return False
+        try:
+            self._result_cache.restore(entry)
+        except (OSError, LocalTransferError) as e:
+            self._logger.warning(f"[exec] Unable to restore cached result: {e}")
+            return False
+
+        self._forget_cancel_event(dag_msg[0])
+        self._discard_prefetch(dag_msg[0])
+        status_msg = {
+            "status": "SUCCEEDED",
+            "activity_id": dag_msg[0],
+            "msg": "RESTORED CACHED RESULT.",
+            "result": entry["result"],
+            "cached_from": entry["activity_id"],
+        }
+        self.to_status_q.put(status_msg)
+        return True
+
+    def _input_paths(self, files: list[str]) -> list[str]:
+        """Where the input files of an activity are staged."""
+        return [
+            os.path.join(self._working_dir, os.path.basename(urlparse(uri).path))
+            for uri in files
+        ]
+
+    def _output_paths(self, activity_msg) -> list[str]:
+        return [
+            os.path.join(self._working_dir, path)
+            for path in getattr(activity_msg, "outputs", [])
+        ]
+
+    def _fail(self, dag_msg, status_msg: dict, failure: str) -> None:
+        """
+        Report a failed attempt of an activity.
+
+        If the activity's retry policy allows another attempt for this class
+        of failure, the activity is put back on the ACTIVITIES queue once the
+        policy's delay passed and no status is reported, so it stays
+        PROCESSING; otherwise ``status_msg`` is reported along with the
+        failure class and the number of attempts made.
+        """
+        activity = dag_msg[1]["activity"]
+        policy = getattr(activity, "retry", None)
+        attempt = getattr(activity, "attempt", 1)
+        if policy is not None and policy.should_retry(attempt, failure):
+            delay = policy.delay(attempt)
+            activity.attempt = attempt + 1
+            self._logger.warning(
+                f"[exec] Attempt {attempt} of {dag_msg[0]} failed ({failure});"
+                f" retrying in {delay:.1f} s."
+            )
+            timer = threading.Timer(delay, self.to_new_activity_q.put, args=(dag_msg,))
+            timer.daemon = True
+            timer.start()
+            return
+
+        self._forget_cancel_event(dag_msg[0])
+        self._discard_prefetch(dag_msg[0])
+        status_msg["failure"] = failure
+        status_msg["attempts"] = attempt
+        self.to_status_q.put(status_msg)
+
+    def _start_transfer_activity(
+        self, activity_msg, tokens=None, on_failure=None
+    ) -> None:
+        """
+        Submit the transfers of a TRANSFER activity and hand them to the
+        transfer watcher, without waiting for them to finish.
+
+        :param on_failure: Passed on to TransferWatcher.watch()
+
+        :raises InvalidTransferFilesError: If the files are invalid
+        :raises TransferHippoError: If the files could not be submitted
+        """
+        transfer_hippo = TransferHippo(
+            agent_id=self._agent_id,
+            settings=self._settings,
+            logger=self._logger,
+            tokens=tokens,
+            staging_cache=self._staging_cache,
+            dest_dir=activity_msg.dest_directory or self._working_dir,
+            coordinator=self._transfer_coordinator,
+            metrics=self.transfer_metrics,
+        )
+
+        # Load all files into the TransferHippo.
+        self._logger.info("[exec] Loading files into TransferHippo.")
+        transfer_hippo.load(activity_msg.files)
+        # Validate that all files are accessible.
+        self._logger.info("[exec] Validating file accessibility.")
+        if not transfer_hippo.validate():
+            raise InvalidTransferFilesError(
+                f"Invalid transfer files: {activity_msg.files}"
+            )
+        # Ensure that all authentication is achieved.
+        self._logger.info("[exec] Checking user auth.")
+        transfer_hippo.check_auth()
+        # Submit the transfer
+        self._logger.info("[exec] Submit the transfer.")
+        self._metrics.stage(activity_msg.activity_id, "admitted")
+        transfer_hippo.start_transfer()
+        self._metrics.stage(activity_msg.activity_id, "started")
+
+        self._transfer_watcher.watch(
+            activity_msg.activity_id,
+            transfer_hippo,
+            timeout=-1 if activity_msg.timeout is None else activity_msg.timeout,
+            on_failure=on_failure,
+            on_finish=self._forget_cancel_event,
+        )
+
+    def cancel(self, activity_id) -> None:
+        """
+        Cancel an activity: a running shell command is terminated along with
+        its process group, running transfers are cancelled, and an activity
+        that has not started yet is skipped. Either way it fails with
+        "ACTIVITY CANCELLED.".
+
+        Cancellations are broadcast to every agent, so most are of activities
+        this agent never runs; only the latest MAX_PENDING_CANCELS events are
+        remembered, the oldest being dropped first.
+        """
+        self._logger.info(f"[exec] Cancelling activity {activity_id}")
+        with self._cancel_lock:
+            self._cancel_events.setdefault(activity_id, threading.Event()).set()
+            while len(self._cancel_events) > MAX_PENDING_CANCELS:
+                del self._cancel_events[next(iter(self._cancel_events))]
+        self._transfer_watcher.cancel(activity_id)
+
+    def _cancelled(self, activity_id) -> bool:
+        """Whether an activity was cancelled, without remembering it."""
+        with self._cancel_lock:
+            event = self._cancel_events.get(activity_id)
+        return event is not None and event.is_set()
+
+    def _cancel_event(self, activity_id) -> threading.Event:
+        """
+        The Event cancelling a running activity; forget it with
+        _forget_cancel_event() once the activity finished.
+        """
+        with self._cancel_lock:
+            return self._cancel_events.setdefault(activity_id, threading.Event())
+
+    def _forget_cancel_event(self, activity_id) -> None:
+        with self._cancel_lock:
+            self._cancel_events.pop(activity_id, None)
+
+    def prefetch(self, dag_msg) -> None:
+        """
+        Start staging the input files of an activity as soon as it is queued,
+        while it still sits in to_process_q or waits on its predecessors.
+
+        :param dag_msg: The (activity_id, node_data) tuple queued for execution
+        :type dag_msg: tuple
+        """
+        if dag_msg[0] in ["MONITOR", "TERMINATOR"]:
+            return
+
+        activity_msg = dag_msg[1]["activity"]
+        if getattr(activity_msg, "type", "").upper() != "SHELL":
+            return
+        if not activity_msg.files:
+            return
+
+        try:
+            self._use_inputs(activity_msg.activity_id, activity_msg.files)
+        except TransferHippoError as e:
+            self._logger.info(f"[exec] Not prefetching: {e}")
+            return
+
+        self._logger.info(f"[exec] Prefetching inputs of {activity_msg.activity_id}")
+        future = self._prefetch_pool.submit(
+            self._stage_files, activity_msg.files, dag_msg[1]["transfer_tokens"]
+        )
+        with self._prefetch_lock:
+            self._prefetched[activity_msg.activity_id] = (future, activity_msg.files)
+
+    def _use_inputs(self, activity_id, files: list[str]) -> None:
+        """
+        Record the input files of an activity as in use until it finishes.
+
+        Inputs are staged into the working directory by their name, so two
+        different files of the same name cannot be staged at once.
+
+        :raises TransferHippoError: If an unfinished activity uses another
+            file of the same name
+        """
+        wanted = dict(zip(self._input_paths(files), files))
+        with self._prefetch_lock:
+            for other_id, other_files in self._staged_inputs.items():
+                if other_id == activity_id:
+                    continue
+                for path, uri in zip(self._input_paths(other_files), other_files):
+                    if wanted.get(path, uri) != uri:
+                        raise TransferHippoError(
+                            f"{path} holds {uri} for activity {other_id}, not"
+                            f" {wanted[path]}"
+                        )
+            self._staged_inputs[activity_id] = files
+
+    def _discard_prefetch(self, activity_id) -> None:
+        """
+        Drop the prefetch of an activity that will not run, e.g. because it
+        was cancelled or failed before its inputs were used: a prefetch still
+        queued is cancelled, and the files of one that started are removed
+        once it is done, unless another activity that has not finished, be it
+        queued or running, needs them too.
+        """
+        with self._prefetch_lock:
+            prefetch, files = self._prefetched.pop(activity_id, (None, None))
+            self._staged_inputs.pop(activity_id, None)
+        if prefetch is None or prefetch.cancel():
+            return
+
+        def remove_files(_):
+            with self._prefetch_lock:
+                shared = {
+                    path
+                    for other_files in self._staged_inputs.values()
+                    for path in self._input_paths(other_files)
+                }
+            for uri, path in zip(files, self._input_paths(files)):
+                # Local inputs already in the working directory were not copied.
+                if path in shared or os.path.abspath(urlparse(uri).path) == path:
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self._logger.warning(f"[exec] Unable to remove {path}: {e}")
+            self._logger.debug(f"[exec] Discarded prefetch of {activity_id}")
+
+        prefetch.add_done_callback(remove_files)
+
     def __process_files(
         self, files: list[str], campaign_id: str, activity_id: str, tokens=None
     ) -> None:
@@ -335,17 +789,50 @@ class Executor(threading.Thread):
         Process a list of files by generating transfer requests when files are
         not available locally.
 
+        Waits for the prefetch of the activity if one was started, and stages
+        the files inline otherwise or if the prefetch failed.
+
         :param files: List of files
         :type files: list[str]
+        :raises TransferHippoError: If another file of the same name is in use
+            by an unfinished activity, or the files could not be staged
         """
+        with self._prefetch_lock:
+            prefetch, _ = self._prefetched.pop(activity_id, (None, None))
+        # In use until the activity finished, see _discard_prefetch().
+        self._use_inputs(activity_id, files)
+
+        if prefetch is not None:
+            try:
+                prefetch.result()
+                self._logger.info(f"[exec] Inputs of {activity_id} were prefetched.")
+                return
+            except Exception as e:
+                self._logger.warning(
+                    f"[exec] Prefetch of {activity_id} failed ({e}); staging again."
+                )
+
+        self._stage_files(files, tokens)
 
-        self._logger.info(f"ex TRANSFER TOKENS??? {tokens}")
+    def _stage_files(self, files: list[str], tokens=None) -> None:
+        """
+        Bring a list of files into the working directory with a TransferHippo
+        and block until they have arrived.
 
+        :param files: List of files
+        :type files: list[str]
+        :raises InvalidTransferFilesError: If the files are invalid
+        :raises TransferHippoError: If any of the transfers did not succeed
+        """
         transfer_hippo = TransferHippo(
             agent_id=self._agent_id,
             settings=self._settings,
             logger=self._logger,
             tokens=tokens,
+            staging_cache=self._staging_cache,
+            dest_dir=self._working_dir,
+            coordinator=self._transfer_coordinator,
+            metrics=self.transfer_metrics,
         )
 
         # Load all files into the TransferHippo.
@@ -353,17 +840,25 @@ class Executor(threading.Thread):
         transfer_hippo.load(files)
         # Validate that all files are accessible.
         self._logger.info("[exec] Validating file accessibility.")
-        transfer_hippo.validate()
+        if not transfer_hippo.validate():
+            raise InvalidTransferFilesError(f"Invalid transfer files: {files}")
         # Ensure that all authentication is achieved.
         self._logger.info("[exec] Checking user auth.")
         transfer_hippo.check_auth()
-        # Submit the transfer
-        self._logger.info("[exec] Submit the transfer.")
-        transfer_hippo.start_transfer()
-        # BLOCK: wait for transfer to finish
-        self._logger.info("[exec] Wait for transfer...")
-        transfer_hippo.transfer_wait()
-        self._logger.info("[exec] File transfer finished!")
+        try:
+            # Submit the transfer
+            self._logger.info("[exec] Submit the transfer.")
+            transfer_hippo.start_transfer()
+            # BLOCK: wait for transfer to finish
+            self._logger.info("[exec] Wait for transfer...")
+            outcomes = transfer_hippo.transfer_wait()
+        finally:
+            # Activities merged onto these transfers must not outlive them.
+            transfer_hippo.abandon_claims()
+        self._logger.info(f"[exec] File transfer finished: {outcomes}")
+
+        if not transfer_hippo.all_succeeded(outcomes):
+            raise TransferHippoError(f"File transfers did not succeed: {outcomes}")
 
     def monitor_check(self):
         # TODO: whenever we want to query status, get info from MONITOR here.
@@ -386,14 +881,3 @@ class Executor(threading.Thread):
                 else:
                     self._logger.debug("MONITOR NOT COMPLETED YET!")
                     time.sleep(2)
-
-
-def download_https_file(url, save_path):
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        with open(save_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        print(f"File downloaded and saved as {save_path}")
-    else:
-        print(f"Failed to download file. Status code: {response.status_code}")
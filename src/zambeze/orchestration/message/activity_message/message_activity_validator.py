@@ -12,6 +12,10 @@ from .message_activity_template_generator import (
 )
 from zambeze.identity import valid_uuid
 
+# Checked in this order, once the required attributes are defined.
+_REQUIRED_ATTRIBUTES = tuple(REQUIRED_ACTIVITY_COMPONENTS)
+_UUID_ATTRIBUTES = ("activity_id", "campaign_id", "origin_agent_id")
+
 
 class MessageActivityValidator(AbstractMessageValidator):
     def __init__(self, logger: Optional[logging.Logger] = None) -> None:
@@ -26,33 +30,18 @@ class MessageActivityValidator(AbstractMessageValidator):
     def requiredKeys(self) -> list[str]:
         return self._required_keys
 
-    def _check_uuids(self, message: Any):
-        if not valid_uuid(message.activity_id, 4):
-            return (
-                False,
-                (
-                    "Required activity_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.activity_id}"
-                ),
-            )
-
-        if not valid_uuid(message.campaign_id, 4):
-            return (
-                False,
-                (
-                    "Required campaign_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.campaign_id}"
-                ),
-            )
-
-        if not valid_uuid(message.origin_agent_id, 4):
-            return (
-                False,
-                (
-                    "Required origin_agent_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.origin_agent_id}"
-                ),
-            )
+    def _check_uuids(self, message: Any) -> tuple[bool, str]:
+        for attribute in _UUID_ATTRIBUTES:
+            value = getattr(message, attribute)
+            if not valid_uuid(value, 4):
+                return (
+                    False,
+                    (
+                        f"Required {attribute} attribute for activity message must"
+                        f" be a valid version 4 UUID but is not: {value}"
+                    ),
+                )
+        return True, ""
 
     @overload
     def check(self, message: Any) -> tuple[bool, str]:
@@ -70,7 +59,7 @@ class MessageActivityValidator(AbstractMessageValidator):
             )
 
         # Simply checks that each required item does not have None as a value
-        for attribute in REQUIRED_ACTIVITY_COMPONENTS:
+        for attribute in _REQUIRED_ATTRIBUTES:
             att = getattr(message, attribute)
             if att is None:
                 return False, f"Required attribute is not defined: {attribute}"
@@ -84,7 +73,9 @@ class MessageActivityValidator(AbstractMessageValidator):
                 ),
             )
 
-        self._check_uuids(message)
+        result = self._check_uuids(message)
+        if not result[0]:
+            return result
 
         if not isinstance(message.submission_time, str):
             return (
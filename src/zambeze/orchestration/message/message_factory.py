@@ -1,5 +1,6 @@
 # Local imports
 from .abstract_message import AbstractMessage
+from .abstract_message_validator import AbstractMessageValidator
 from .activity_message.message_activity import MessageActivity
 from .activity_message.message_activity_validator import MessageActivityValidator
 from .activity_message.message_activity_template_generator import (
@@ -17,9 +18,26 @@ from zambeze.orchestration.plugins_message_template_engine import (
 from ..zambeze_types import MessageType, ActivityType
 
 # Standard imports
+from functools import cache
+from typing import Iterable, Optional
+
 import logging
 import uuid
 
+_VALIDATORS = {
+    MessageType.ACTIVITY: MessageActivityValidator,
+    MessageType.STATUS: MessageStatusValidator,
+}
+
+
+@cache
+def message_validator(message_type: MessageType) -> AbstractMessageValidator:
+    """The validator of a message type, created once per process.
+
+    Validators keep no state between checks, so every factory shares them.
+    """
+    return _VALIDATORS[message_type]()
+
 
 class MessageFactory:
     def __init__(self, logger: logging.Logger):
@@ -135,10 +153,43 @@ class MessageFactory:
             return message_type, status
         else:
             raise Exception(
-                "Unrecognized message type cannot createTemplate: "
-                f"{message_type.value}"
+                f"Unrecognized message type cannot createTemplate: {message_type.value}"
+            )
+
+    def _invalid(self, args: tuple) -> Optional[str]:
+        """Why a (MessageType, template) tuple is not a valid message, or
+        None if it is."""
+        if len(args) != 2:
+            raise Exception("Malformed input, create method expects tuple oflength 2")
+        if not isinstance(args[0], MessageType) or args[0] not in _VALIDATORS:
+            raise Exception(
+                "Unrecognized message type cannot instantiate: "
+                f"{getattr(args[0], 'value', args[0])}"
             )
 
+        valid, error = message_validator(args[0]).check(args[1])
+        if not valid:
+            return f"Invalid {args[0].value.lower()} message: {error}"
+
+        if args[0] == MessageType.ACTIVITY and args[1].body.type == "PLUGIN":
+            plugin_name = args[1].body.plugin
+            results = self._plugins_msg_validators.validate(
+                plugin_name, args[1].body.parameters
+            )
+            self._logger.debug(f"Plugin message checks: {results}")
+            # Search through the results of the validator checks
+            # { rsync: [{"action": (False, "message")}] }
+            for check in results[plugin_name]:
+                for action in check.keys():
+                    if check[action][0] is False:
+                        return f"Invalid plugin message body {check[action][1]}"
+        return None
+
+    def _instantiate(self, args: tuple) -> AbstractMessage:
+        if args[0] == MessageType.ACTIVITY:
+            return MessageActivity(args[1], self._logger)
+        return MessageStatus(args[1])
+
     def create(self, args: tuple) -> AbstractMessage:
         """Is responsible for creating a Message
 
@@ -164,45 +215,33 @@ class MessageFactory:
         ```
 
         """
-
-        if len(args) != 2:
-            raise Exception(
-                "Malformed input, create method expects tuple of" "length 2"
-            )
-
-        args[1].message_id = str(uuid.uuid4())
-
-        if args[0] == MessageType.ACTIVITY:
-            validator = MessageActivityValidator()
-            result = validator.check(args[1])
-            print(result)
-            if result[0]:
-                if args[1].body.type == "PLUGIN":
-                    plugin_name = args[1].body.plugin
-                    results = self._plugins_msg_validators.validate(
-                        plugin_name, args[1].body.parameters
-                    )
-                    print(f"Printing results {results}")
-                    # Search through the results of the validator checks
-                    # { rsync: [{"action": (False, "message")}] }
-                    for check in results[plugin_name]:
-                        for action in check.keys():
-                            if check[action][0] is False:
-                                raise Exception(
-                                    "Invalid plugin message body" f"{check[action][1]}"
-                                )
-
-                return MessageActivity(args[1], self._logger)
-            else:
-                raise Exception(f"Invalid activity message: {result[1]}")
-        elif args[0] == MessageType.STATUS:
-            validator = MessageStatusValidator()
-            result = validator.check(args[1])
-            if result[0]:
-                return MessageStatus(args[1])
-            else:
-                raise Exception(f"Invalid status message: {result[1]}")
-        else:
+        if len(args) == 2:
+            args[1].message_id = str(uuid.uuid4())
+        error = self._invalid(args)
+        if error is not None:
+            raise Exception(error)
+        return self._instantiate(args)
+
+    def create_many(self, templates: Iterable[tuple]) -> list[AbstractMessage]:
+        """Create the messages of many (MessageType, template) tuples, e.g.
+        those of a whole campaign, validating all of them first.
+
+        :return: The messages, in the order of their templates
+        :rtype: list[AbstractMessage]
+        :raises Exception: Listing every invalid template by its position;
+            no message is created then
+        """
+        templates = list(templates)
+        errors = []
+        for index, args in enumerate(templates):
+            if len(args) == 2:
+                args[1].message_id = str(uuid.uuid4())
+            error = self._invalid(args)
+            if error is not None:
+                errors.append(f"{index}: {error}")
+        if errors:
             raise Exception(
-                "Unrecognized message type cannot instantiate: " f"{args[0].value}"
+                f"{len(errors)} of {len(templates)} messages are invalid:\n"
+                + "\n".join(errors)
             )
+        return [self._instantiate(args) for args in templates]
@@ -11,6 +11,10 @@ from .message_status_template_generator import (
 )
 from zambeze.identity import valid_uuid
 
+# Checked in this order, once the required attributes are defined.
+_REQUIRED_ATTRIBUTES = tuple(REQUIRED_STATUS_COMPONENTS)
+_UUID_ATTRIBUTES = ("activity_id", "campaign_id", "origin_agent_id", "target_id")
+
 
 class MessageStatusValidator(AbstractMessageValidator):
     def __init__(self, logger: Optional[logging.Logger] = None) -> None:
@@ -24,33 +28,18 @@ class MessageStatusValidator(AbstractMessageValidator):
     def requiredKeys(self) -> list[str]:
         return self._required_keys
 
-    def _checkUUIDs(self, message: Any):
-        if not valid_uuid(message.activity_id, 4):
-            return (
-                False,
-                (
-                    "Required activity_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.activity_id}"
-                ),
-            )
-
-        if not valid_uuid(message.campaign_id, 4):
-            return (
-                False,
-                (
-                    "Required campaign_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.campaign_id}"
-                ),
-            )
-
-        if not valid_uuid(message.agent_id, 4):
-            return (
-                False,
-                (
-                    "Required agent_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.agent_id}"
-                ),
-            )
+    def _checkUUIDs(self, message: Any) -> tuple[bool, str]:
+        for attribute in _UUID_ATTRIBUTES:
+            value = getattr(message, attribute)
+            if not valid_uuid(value, 4):
+                return (
+                    False,
+                    (
+                        f"Required {attribute} attribute for status message must"
+                        f" be a valid version 4 UUID but is not: {value}"
+                    ),
+                )
+        return True, ""
 
     @overload
     def check(self, message: Any) -> tuple[bool, str]:
@@ -69,7 +58,7 @@ class MessageStatusValidator(AbstractMessageValidator):
                 ),
             )
 
-        for attribute in REQUIRED_STATUS_COMPONENTS:
+        for attribute in _REQUIRED_ATTRIBUTES:
             att = getattr(message, attribute)
             if att is None:
                 return (False, f"Required attribute is not defined: {attribute}")
@@ -83,16 +72,9 @@ class MessageStatusValidator(AbstractMessageValidator):
                 ),
             )
 
-        self._checkUUIDs(message)
-
-        if not valid_uuid(message.target_id, 4):
-            return (
-                False,
-                (
-                    "Required target_id attribute for activity message must"
-                    f"be a valid version 4 UUID but is not: {message.target_id}"
-                ),
-            )
+        result = self._checkUUIDs(message)
+        if not result[0]:
+            return result
 
         is_valid_int = False
         try:
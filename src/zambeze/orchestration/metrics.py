@@ -0,0 +1,353 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Optional
+
+# Upper bounds in seconds of the buckets of latency histograms.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+# Activities whose stages are followed at once; the oldest are dropped.
+MAX_TRACKED_ACTIVITIES = 10000
+# Stages an activity goes through on an agent, in order.
+STAGES = ("received", "acked", "admitted", "started", "finished", "published")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics every agent exports: name -> (type, help)
+FAMILIES = {
+    "zambeze_queue_depth": ("gauge", "Messages waiting in an internal queue."),
+    "zambeze_active_workers": ("gauge", "Activities currently being worked on."),
+    "zambeze_activity_stage_seconds": (
+        "histogram",
+        "Seconds an activity took from one stage to the next.",
+    ),
+    "zambeze_statuses_published_total": (
+        "counter",
+        "Activity statuses published on the CONTROL queue.",
+    ),
+    "zambeze_rmq_reconnects_total": ("counter", "Reconnections to RabbitMQ."),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels, value) -> str:
+    """One line of the Prometheus text format."""
+    if labels:
+        text = ",".join(f'{key}="{_escape(item)}"' for key, item in labels)
+        name = f"{name}{{{text}}}"
+    if isinstance(value, float) and math.isinf(value):
+        return f"{name} {'+Inf' if value > 0 else '-Inf'}"
+    return f"{name} {value}"
+
+
+class AgentMetrics:
+    """
+    Registry of an agent's counters, gauges and latency histograms.
+
+    Components record into the process-wide registry returned by
+    agent_metrics(); recording only takes a lock and updates a dict, so it
+    is done whether or not the metrics are served. Gauges that are cheaper
+    to read when scraped, such as queue depths, are registered as callables.
+    render() produces the Prometheus text format, see MetricsServer.
+
+    :Example:
+
+    metrics = agent_metrics()
+    metrics.gauge("zambeze_queue_depth", queue.qsize, queue="to_process_q")
+    metrics.stage(activity_id, "received")
+    ...
+    metrics.stage(activity_id, "acked")
+    print(metrics.render())
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._families = dict(FAMILIES)
+        # name -> {labels: value} of counters and gauges.
+        self._values = {}
+        # name -> {labels: [count per bucket..., sum, count]}
+        self._histograms = {}
+        # name -> {labels: callable returning the value}
+        self._callbacks = {}
+        # Callables returning [(name, type, help, [(labels dict, value)])].
+        self._collectors = []
+        # activity_id -> (last stage, time it was reached)
+        self._stages = {}
+
+    def describe(self, name: str, kind: str, help: str) -> None:
+        """Declare a metric beyond the FAMILIES every agent exports."""
+        with self._lock:
+            self._families[name] = (kind, help)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add ``value`` to a counter or gauge."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values.setdefault(name, {})
+            values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Count ``value`` in a histogram."""
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(self._buckets) + 2)
+            if index < len(self._buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def gauge(self, name: str, read, **labels) -> None:
+        """Register a callable giving the value of a gauge when scraped."""
+        with self._lock:
+            self._callbacks.setdefault(name, {})[tuple(sorted(labels.items()))] = read
+
+    def add_collector(self, collect) -> None:
+        """Register a callable giving metric families when scraped, as
+        [(name, type, help, [(labels dict, value), ...]), ...]."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def stage(self, activity_id, stage: str) -> None:
+        """
+        Note that an activity reached one of the STAGES and observe how long
+        it took since the previous stage it reached on this agent.
+        """
+        now = time.monotonic()
+        with self._lock:
+            previous = self._stages.pop(activity_id, None)
+            if stage != STAGES[-1]:
+                self._stages[activity_id] = (stage, now)
+                if len(self._stages) > MAX_TRACKED_ACTIVITIES:
+                    del self._stages[next(iter(self._stages))]
+        if previous is not None:
+            self.observe(
+                "zambeze_activity_stage_seconds",
+                now - previous[1],
+                from_stage=previous[0],
+                to_stage=stage,
+            )
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            families = dict(self._families)
+            values = {name: dict(series) for name, series in self._values.items()}
+            histograms = {
+                name: {key: list(counts) for key, counts in series.items()}
+                for name, series in self._histograms.items()
+            }
+            callbacks = {name: dict(series) for name, series in self._callbacks.items()}
+            collectors = list(self._collectors)
+
+        samples = {}
+        for name, series in values.items():
+            samples.setdefault(name, []).extend(series.items())
+        for name, series in callbacks.items():
+            for key, read in series.items():
+                # A failing gauge is left out rather than failing the scrape.
+                try:
+                    value = read()
+                except Exception:  # noqa: BLE001, S112
+                    continue
+                if value is not None:
+                    samples.setdefault(name, []).append((key, value))
+        for collect in collectors:
+            try:
+                collected = collect()
+            except Exception:  # noqa: BLE001, S112
+                continue
+            for name, kind, help, series in collected:
+                families.setdefault(name, (kind, help))
+                samples.setdefault(name, []).extend(
+                    (tuple(sorted(labels.items())), value) for labels, value in series
+                )
+
+        lines = []
+        for name in sorted(samples.keys() | histograms.keys()):
+            kind, help = families.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in samples.get(name, []):
+                lines.append(_sample(name, key, value))
+            for key, counts in histograms.get(name, {}).items():
+                cumulative = 0
+                for bound, count in zip(self._buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        _sample(f"{name}_bucket", (*key, ("le", bound)), cumulative)
+                    )
+                lines.append(
+                    _sample(f"{name}_bucket", (*key, ("le", "+Inf")), counts[-1])
+                )
+                lines.append(_sample(f"{name}_sum", key, counts[-2]))
+                lines.append(_sample(f"{name}_count", key, counts[-1]))
+        return "\n".join(lines) + "\n"
+
+
+@cache
+def agent_metrics() -> AgentMetrics:
+    """The process-wide AgentMetrics."""
+    return AgentMetrics()
+
+
+def transfer_metric_families(transfer_metrics) -> list:
+    """
+    Metric families of a TransferMetrics snapshot, for
+    AgentMetrics.add_collector.
+    """
+    snapshot = transfer_metrics.snapshot()
+    families = [
+        (
+            f"zambeze_transfer_{key}_total",
+            "counter",
+            f"Transfer {key} since the agent started.",
+            [({}, value)],
+        )
+        for key, value in snapshot["totals"].items()
+    ]
+    for key, help in (
+        ("bytes_per_second", "Aggregate transfer rate over the recent window."),
+        ("queue_seconds_median", "Median seconds transfers waited to start."),
+        ("latency_per_file_median", "Median seconds per file of transfers."),
+    ):
+        families.append(
+            (
+                f"zambeze_transfer_{key}",
+                "gauge",
+                help,
+                [
+                    (
+                        {
+                            "scheme": pair["scheme"],
+                            "source": pair["source_endpoint"],
+                            "destination": pair["destination_endpoint"],
+                        },
+                        pair[key],
+                    )
+                    for pair in snapshot["pairs"]
+                ],
+            )
+        )
+    return families
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Unix socket clients have no address to log.
+        self.server.logger.debug(f"[metrics] {format % args}")
+
+
+class _UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+    Serves an AgentMetrics registry in the Prometheus text format over HTTP,
+    on a local TCP port or a Unix socket, from a daemon thread.
+
+    :param metrics: The registry to serve
+    :type metrics: AgentMetrics
+    :param host: Address to listen on; local only by default
+    :type host: str
+    :param port: TCP port to listen on; 0 picks a free one
+    :type port: int
+    :param unix_socket: Path of a Unix socket to listen on instead of TCP
+    :type unix_socket: Optional[str]
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        metrics: AgentMetrics,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        unix_socket: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._unix_socket = unix_socket
+        if unix_socket is not None:
+            self._unix_socket = os.path.expanduser(unix_socket)
+            # Left behind by an agent that did not stop cleanly.
+            if os.path.exists(self._unix_socket):
+                os.unlink(self._unix_socket)
+            self._server = _UnixHTTPServer(self._unix_socket, _MetricsHandler)
+        else:
+            self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.metrics = metrics
+        self._server.logger = self._logger
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="MetricsServer", daemon=True
+        )
+
+    @classmethod
+    def from_settings(cls, settings, metrics: AgentMetrics, logger=None):
+        """
+        Create the server described by the ``metrics`` settings section,
+        e.g. {"enabled": True, "host": "127.0.0.1", "port": 9464} or
+        {"enabled": True, "unix_socket": "~/.zambeze/metrics.sock"}.
+
+        Returns:
+            Optional[MetricsServer]: None when the endpoint is disabled.
+        """
+        config = settings.settings.get("metrics", {})
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            metrics,
+            host=config.get("host", "127.0.0.1"),
+            port=int(config.get("port", 9464)),
+            unix_socket=config.get("unix_socket"),
+            logger=logger,
+        )
+
+    @property
+    def address(self):
+        """The Unix socket path, or the (host, port) served."""
+        if self._unix_socket is not None:
+            return self._unix_socket
+        return self._server.server_address[:2]
+
+    def start(self) -> None:
+        self._thread.start()
+        self._logger.info(f"[metrics] Serving metrics on {self.address}")
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+        if self._unix_socket is not None and os.path.exists(self._unix_socket):
+            os.unlink(self._unix_socket)
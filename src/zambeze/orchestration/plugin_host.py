@@ -0,0 +1,379 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+from queue import Empty, Queue
+from typing import Optional
+
+# Root of the zambeze package, for hosts started outside of an installation.
+PACKAGE_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+# Program of a host. The package is put on the host's sys.path rather than
+# on PYTHONPATH, which the commands its plugins run would inherit.
+HOST_PROGRAM = (
+    "import sys; sys.path.insert(0, {root!r}); "
+    "from zambeze.orchestration.plugin_host import main; main({fd})"
+)
+# Seconds a new host may take to configure its plugins.
+START_TIMEOUT = 30.0
+# Seconds an idle host may take to answer a health check.
+PING_TIMEOUT = 5.0
+# Seconds between checks of a running plugin's host and cancel Events.
+POLL_INTERVAL = 0.1
+
+
+class PluginHostError(Exception):
+    """Raised when a plugin host died, stopped answering or broke the
+    protocol."""
+
+
+class _RemoteEvent:
+    """Stands in for a threading.Event of the arguments sent to a host."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+def _strip_events(value, events: list):
+    """Replace the threading.Events of ``value`` with _RemoteEvents,
+    appending them to ``events``."""
+    if isinstance(value, threading.Event):
+        events.append(value)
+        return _RemoteEvent(len(events) - 1)
+    if isinstance(value, dict):
+        return {key: _strip_events(item, events) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_strip_events(item, events) for item in value)
+    return value
+
+
+def _restore_events(value, events: dict):
+    """Replace the _RemoteEvents of ``value`` with threading.Events, kept in
+    ``events`` by index."""
+    if isinstance(value, _RemoteEvent):
+        return events.setdefault(value.index, threading.Event())
+    if isinstance(value, dict):
+        return {key: _restore_events(item, events) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_restore_events(item, events) for item in value)
+    return value
+
+
+class _Host:
+    def __init__(self, proc: subprocess.Popen, conn: Connection) -> None:
+        self.proc = proc
+        self.conn = conn
+        # Plugin invocations this host has run.
+        self.tasks = 0
+        # Peak resident memory of the host in bytes, as last reported.
+        self.max_rss = 0
+
+    def receive(self, timeout=None):
+        """
+        :return: The next message of the host
+        :raises PluginHostError: If the host sent none within ``timeout``
+            seconds or exited
+        """
+        if not self.conn.poll(timeout):
+            raise PluginHostError(f"Plugin host {self.proc.pid} is not answering.")
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise PluginHostError(f"Plugin host {self.proc.pid} exited.") from None
+
+    def close(self) -> None:
+        try:
+            self.conn.send(("stop",))
+        except OSError:
+            pass
+        self.conn.close()
+        try:
+            self.proc.wait(PING_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class PluginHostPool:
+    """
+    Pool of long-lived processes running plugins on behalf of the agent.
+
+    Each host configures its own instance of the agent's plugins and runs one
+    invocation at a time, so plugins run in parallel across hosts without
+    sharing the agent's GIL, and a plugin that crashes, leaks memory or
+    spins takes down its host only. Arguments and results are pickled;
+    threading.Events among the arguments, e.g. a shell activity's
+    ``cancel``, are mirrored in the host and set there when set in the agent.
+
+    Hosts are replaced when they die, after ``max_tasks`` invocations or once
+    their peak memory exceeds ``max_memory`` bytes. Every
+    ``health_interval`` seconds idle hosts are pinged and those not answering
+    are replaced.
+
+    :param plugin_config: Configuration of the plugins, see Plugins.configure
+    :type plugin_config: dict
+    :param size: Maximum number of host processes
+    :type size: int
+    :param max_tasks: Invocations after which a host is replaced; 0 never
+    :type max_tasks: int
+    :param max_memory: Peak memory in bytes above which a host is replaced
+    :type max_memory: Optional[int]
+    :param health_interval: Seconds between health checks of idle hosts
+    :type health_interval: float
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        plugin_config: dict,
+        size: int = 4,
+        max_tasks: int = 0,
+        max_memory: Optional[int] = None,
+        health_interval: float = 30.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._plugin_config = plugin_config
+        self._size = max(1, size)
+        self._max_tasks = max_tasks
+        self._max_memory = max_memory
+        self._idle = Queue()
+        self._spawned = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._health_thread = threading.Thread(
+            target=self._check_health,
+            args=(health_interval,),
+            name="PluginHostHealth",
+            daemon=True,
+        )
+        self._health_thread.start()
+
+    @classmethod
+    def from_config(cls, config: dict, plugin_config: dict, logger=None):
+        """
+        Create the pool described by the ``plugin_host`` settings section,
+        e.g. {"enabled": True, "size": 8, "max_tasks": 100,
+        "max_memory": 4294967296, "health_interval": 30.0}.
+
+        Returns:
+            Optional[PluginHostPool]: None when plugin hosts are disabled.
+        """
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            plugin_config,
+            size=int(config.get("size", 4)),
+            max_tasks=int(config.get("max_tasks") or 0),
+            max_memory=config.get("max_memory"),
+            health_interval=float(config.get("health_interval", 30.0)),
+            logger=logger,
+        )
+
+    def _spawn(self) -> _Host:
+        conn, host_conn = socket.socketpair()
+        program = HOST_PROGRAM.format(root=PACKAGE_ROOT, fd=host_conn.fileno())
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, "-c", program],
+                stdin=subprocess.DEVNULL,
+                pass_fds=(host_conn.fileno(),),
+            )
+        except OSError:
+            conn.close()
+            raise
+        finally:
+            host_conn.close()
+        host = _Host(proc, Connection(conn.detach()))
+        try:
+            host.conn.send(("configure", self._plugin_config))
+            status, value = host.receive(START_TIMEOUT)
+            if status != "ready":
+                raise PluginHostError(f"Plugin host failed to start: {value}")
+        except (OSError, PluginHostError):
+            proc.kill()
+            host.close()
+            raise
+        self._logger.debug(f"[plugin-host] Started host {proc.pid}")
+        return host
+
+    def _acquire(self) -> _Host:
+        while True:
+            with self._lock:
+                if self._idle.empty() and self._spawned < self._size:
+                    self._spawned += 1
+                    break
+            host = self._idle.get()
+            if host.proc.poll() is None:
+                return host
+            # Died while idle.
+            self._discard(host, f"exited with {host.proc.returncode}")
+        try:
+            return self._spawn()
+        except (OSError, PluginHostError):
+            with self._lock:
+                self._spawned -= 1
+            raise
+
+    def _discard(self, host: _Host, reason: str) -> None:
+        self._logger.warning(f"[plugin-host] Replacing host {host.proc.pid}: {reason}")
+        if host.proc.poll() is None:
+            host.proc.kill()
+        host.close()
+        with self._lock:
+            self._spawned -= 1
+
+    def _release(self, host: _Host) -> None:
+        if self._max_tasks and host.tasks >= self._max_tasks:
+            self._discard(host, f"ran {host.tasks} invocations")
+        elif self._max_memory and host.max_rss > self._max_memory:
+            self._discard(host, f"used {host.max_rss} bytes")
+        elif self._closed.is_set():
+            self._discard(host, "pool closed")
+        else:
+            self._idle.put(host)
+
+    def run(self, plugin_name: str, arguments: dict):
+        """
+        Run a plugin's process method on a host and wait for it.
+
+        :param plugin_name: Name of a configured plugin
+        :param arguments: The argument the plugin's process method is called
+            with, in a list
+        :return: Whatever the plugin's process method returned
+        :raises PluginHostError: If the host died while running it
+        :raises Exception: Whatever the plugin raised
+        """
+        events = []
+        payload = _strip_events(arguments, events)
+        host = self._acquire()
+        try:
+            host.conn.send(("run", plugin_name, payload))
+            signalled = set()
+            while not host.conn.poll(POLL_INTERVAL):
+                for index, event in enumerate(events):
+                    if index not in signalled and event.is_set():
+                        host.conn.send(("set", index))
+                        signalled.add(index)
+                if host.proc.poll() is not None:
+                    raise PluginHostError(
+                        f"Plugin host {host.proc.pid} exited with"
+                        f" {host.proc.returncode} running {plugin_name}."
+                    )
+            status, value, host.max_rss = host.receive()
+        except (OSError, PluginHostError) as e:
+            self._discard(host, str(e))
+            raise PluginHostError(str(e)) from e
+
+        host.tasks += 1
+        self._release(host)
+        if status == "error":
+            raise value
+        return value
+
+    def _check_health(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            idle = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except Empty:
+                    break
+            for host in idle:
+                try:
+                    host.conn.send(("ping",))
+                    _, _, host.max_rss = host.receive(PING_TIMEOUT)
+                except (OSError, ValueError, PluginHostError) as e:
+                    self._discard(host, str(e) or "bad health check answer")
+                    continue
+                self._release(host)
+
+    def close(self) -> None:
+        """Stop the idle hosts; busy hosts stop once they finish."""
+        self._closed.set()
+        while True:
+            try:
+                host = self._idle.get_nowait()
+            except Empty:
+                break
+            host.close()
+            with self._lock:
+                self._spawned -= 1
+
+
+###################################################################################
+# Host side
+###################################################################################
+def _max_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _invoke(plugins, plugin_name, arguments, send) -> None:
+    try:
+        result = ("ok", plugins.run(plugin_name, arguments))
+    except Exception as e:  # noqa: BLE001
+        result = ("error", e)
+    try:
+        send((*result, _max_rss()))
+    except Exception as e:  # noqa: BLE001
+        # The plugin's result or exception cannot be pickled.
+        send(("error", PluginHostError(f"{type(e).__name__}: {e}"), _max_rss()))
+
+
+def main(fd: int) -> None:
+    """Serve plugin invocations sent over the socket ``fd``."""
+    from zambeze.orchestration.plugins import Plugins
+
+    conn = Connection(fd)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    plugins = Plugins()
+    try:
+        _, plugin_config = conn.recv()
+        plugins.configure(plugin_config)
+    except Exception as e:  # noqa: BLE001
+        send(("error", f"{type(e).__name__}: {e}"))
+        return
+    send(("ready", None))
+
+    # Events of the running invocation by index.
+    events = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == "run":
+            _, plugin_name, payload = message
+            events = {}
+            arguments = _restore_events(payload, events)
+            # Runs aside so that cancellations and pings are still received.
+            threading.Thread(
+                target=_invoke,
+                args=(plugins, plugin_name, arguments, send),
+                daemon=True,
+            ).start()
+        elif message[0] == "set":
+            events.setdefault(message[1], threading.Event()).set()
+        elif message[0] == "ping":
+            send(("pong", None, _max_rss()))
+        elif message[0] == "stop":
+            return
@@ -1,10 +1,89 @@
 # Standard imports
+from functools import cache
+from importlib import import_module
+from inspect import isclass
 from pathlib import Path
 from typing import Optional
 
 import logging
 import pkgutil
 
+PLUGIN_MODULES_PACKAGE = "zambeze.orchestration.plugin_modules"
+
+
+class PluginRegistry:
+    """Plugins provided in the plugin_modules folder, imported on first use.
+
+    Every plugin is a package named after it, holding the plugin itself in
+    ``<name>.<name>``, its message validator in
+    ``<name>.<name>_message_validator`` and its message template generator
+    in ``<name>.<name>_message_template_generator``. Discovery only lists
+    the packages; each of these modules is imported the first time one of
+    its classes is asked for, and remembered for the whole process.
+
+    :Example:
+
+    registry = plugin_registry()
+    registry.names
+    ["shell"]
+    registry.classes("shell", "_message_validator", PluginMessageValidator)
+    {"shellmessagevalidator": ShellMessageValidator}
+    """
+
+    def __init__(self, names: list[str]) -> None:
+        self._names = tuple(names)
+        # (name, suffix, base) -> {lower-case class name: class}
+        self._classes = {}
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    def classes(self, name: str, suffix: str, base: type) -> dict:
+        """Import a module of the ``name`` plugin and find its ``base``
+        subclasses.
+
+        :param name: A registered plugin name
+        :param suffix: "" for the plugin module, "_message_validator" or
+            "_message_template_generator"
+        :param base: The abstract class the wanted classes implement
+        :return: The classes by lower-case class name
+        :rtype: dict
+        """
+        key = (name, suffix, base)
+        classes = self._classes.get(key)
+        if classes is not None:
+            return classes
+
+        # Imported without a registry-wide lock, so that first uses of
+        # different plugins do not wait for each other; the import system
+        # already serializes imports of the same module. Threads racing on
+        # the same key all get the classes stored first.
+        module = import_module(f"{PLUGIN_MODULES_PACKAGE}.{name}.{name}{suffix}")
+        return self._classes.setdefault(
+            key,
+            {
+                attribute_name.lower(): attribute
+                for attribute_name, attribute in vars(module).items()
+                if isclass(attribute)
+                and issubclass(attribute, base)
+                and attribute is not base
+            },
+        )
+
+
+@cache
+def plugin_registry() -> PluginRegistry:
+    """The process-wide PluginRegistry."""
+    plugin_path = [str(Path(__file__).resolve().parent)]
+    return PluginRegistry(
+        [
+            module_name
+            for _, module_name, ispkg in pkgutil.iter_modules(path=plugin_path)
+            if ispkg
+        ]
+    )
+
 
 def registerPlugins(logger: Optional[logging.Logger] = None) -> list:
     """Will register all the plugins provided in the plugin_modules folder
@@ -12,22 +91,7 @@ def registerPlugins(logger: Optional[logging.Logger] = None) -> list:
     :return: the names of all the plugins
     :rtype: a list of strings
     """
-
-    module_names = []
-    # plugin_path = [str(Path(__file__).resolve().parent) + "/plugin_modules"]
-    plugin_path = [str(Path(__file__).resolve().parent)]
-    for importer, module_name, ispkg in pkgutil.walk_packages(path=plugin_path):
-        if (
-            module_name != "abstract_plugin"
-            and module_name != "__init__"
-            and module_name != "abstract_plugin_message_validator"
-            and module_name != "common_dataclasses"
-            and module_name != "common_plugin_functions"
-            and module_name != "abstract_plugin_template_generator"
-            and module_name != "abstract_uri_separator"
-            and module_name != "file_uri_separator"
-        ):
-            module_names.append(module_name)
+    module_names = plugin_registry().names
     if logger:
         logger.debug(f"Registered Plugins: {', '.join(module_names)}")
     return module_names
@@ -10,99 +10,113 @@
 from ..abstract_plugin import Plugin
 from .shell_message_validator import ShellMessageValidator
 from .shell_common import PLUGIN_NAME, SUPPORTED_ACTIONS
+from .shell_output import ActivityOutput
+from .shell_worker import (
+    KILL_GRACE,
+    ShellWorkerPool,
+    inherited_limits,
+    limit_memory,
+    spawn,
+    supervise,
+    wait_pid,
+)
 from ...system_utils import isExecutable
 
 # Standard imports
+from functools import partial
 from typing import Optional
 
 import logging
 import os
+import re
 import subprocess
 
 
-def check_inputs(variable, left_pattern, right_pattern):
-    # find returns -1 if no match was found
-    if len(variable) == 0:
-        return "", -1, -1
+# Opening and closing of ${} references.
+_ENV_TOKEN = re.compile(r"\$\{|\}")
 
-    if len(left_pattern) == 0:
-        raise Exception("Must specify a left pattern")
 
-    if len(right_pattern) == 0:
-        raise Exception("Must specify a right pattern")
+def expand_variables(value: str, lookup) -> str:
+    """Replace the ${} references of a value in a single pass.
 
-    if variable.count(left_pattern) != variable.count(right_pattern):
-        raise Exception("Cannot identify inner pattern ambiguous patterns used")
-
-
-def get_inner_pattern(variable: str, left_pattern: str, right_pattern: str):
-    """Finds the value between two patterns
+    References may be nested; the innermost ones are replaced first and form
+    the name of the enclosing one. ``lookup(name)`` returns the value of a
+    variable, or None to keep its reference as written.
 
     :Example:
 
-    variable = "My${Long}string${Containing${Nested}Patterns}"
-                012345678901234567890123456789012345678901234
-    match, start, end = getInnerPattern(variable, "${", "}")
-    print(f"match: {match}, start: {start}, end: {end})
+    env = {"Nested": "Long", "Long": "Patterns"}
+    expand_variables("My${${Nested}}string", env.get)
 
     Will return
 
-    match: Nested, start: 27, end: 36
+    MyPatternsstring
     """
-    check_inputs(variable, left_pattern, right_pattern)
-
-    left_index = variable.find(left_pattern, 0, len(variable))
-    right_index = variable.rfind(right_pattern, 0, len(variable))
-
-    inner_match_left_index = -1
-    inner_match_right_index = -1
-
-    while True:
-        if inner_match_left_index < right_index and right_index > -1:
-            inner_match_right_index = right_index
-
-        if inner_match_right_index > left_index > -1:
-            inner_match_left_index = left_index
-
-        match = ""
-        if inner_match_right_index > -1 and inner_match_left_index > -1:
-            match = variable[
-                inner_match_left_index + len(left_pattern) : inner_match_right_index
-            ]
-
-        if (left_index > inner_match_right_index or left_index <= -1) and (
-            right_index <= inner_match_left_index or right_index <= -1
-        ):
-            if inner_match_right_index > -1 and inner_match_left_index > -1:
-                return (
-                    match,
-                    inner_match_left_index,
-                    inner_match_right_index + len(right_pattern),
-                )
-            return "", -1, -1
-
-        left_index = variable.find(left_pattern, left_index + 1, len(variable))
-        if right_index >= -1:
-            right_index = variable.rfind(right_pattern, 0, right_index)
+    if "${" not in value:
+        return value
+
+    # Text of the references still open, the whole value first.
+    parts = [[]]
+    position = 0
+    for token in _ENV_TOKEN.finditer(value):
+        parts[-1].append(value[position : token.start()])
+        position = token.end()
+        if token.group() == "${":
+            parts.append([])
+        elif len(parts) > 1:
+            name = "".join(parts.pop())
+            resolved = lookup(name)
+            parts[-1].append("${" + name + "}" if resolved is None else resolved)
+        else:
+            parts[-1].append("}")
+    parts[-1].append(value[position:])
+
+    # References that are never closed are kept as written.
+    while len(parts) > 1:
+        text = "".join(parts.pop())
+        parts[-1].append("${" + text)
+    return "".join(parts[0])
 
 
 def merge_env_variables(current_vars: dict, new_vars: dict) -> dict:
     """Function supports merging env variables
 
-    This function also supports ${} notation, where ${var} where
-    var is a variable in the current env.
+    This function also supports ${} notation, where ${var} is a variable of
+    ``new_vars`` or of the current env. Each variable is expanded once, a
+    variable referencing itself gets the current env's value, e.g.
+    PATH="${PATH}:/opt/bin", and variables referencing each other raise.
+
+    :raises ValueError: If variables reference each other in a cycle
     """
-    for key in new_vars.keys():
-        value = new_vars[key]
-        match, index_left, index_right = get_inner_pattern(value, "${", "}")
-        while len(match) > 0:
-            if match in current_vars.keys():
-                value = value[:index_left] + current_vars[match] + value[index_right:]
-                new_vars[key] = value
-            match, index_left, index_right = get_inner_pattern(value, "${", "}")
+    expanded = {}
+    # Variables being expanded, outermost first.
+    resolving = []
+
+    def lookup(name):
+        if name in expanded:
+            return expanded[name]
+        if name not in new_vars or (resolving and resolving[-1] == name):
+            return current_vars.get(name)
+        if name in resolving:
+            cycle = " -> ".join(resolving[resolving.index(name) :] + [name])
+            raise ValueError(f"Environment variables reference each other: {cycle}")
+        resolving.append(name)
+        expanded[name] = expand_variables(str(new_vars[name]), lookup)
+        resolving.pop()
+        return expanded[name]
+
+    for name in new_vars:
+        lookup(name)
 
     # If new vars have the same named key it will overwrite current vars
-    return {**current_vars, **new_vars}
+    return {**current_vars, **expanded}
+
+
+def _wait(proc: subprocess.Popen, seconds):
+    try:
+        return proc.wait(seconds)
+    except subprocess.TimeoutExpired:
+        return None
 
 
 class Shell(Plugin):
@@ -113,9 +127,37 @@ class Shell(Plugin):
         self._configured = False
         self._supported_actions = SUPPORTED_ACTIONS
         self._message_validator = ShellMessageValidator(logger)
+        self._worker_pool = None
+        self._output_config = {}
+        self._kill_grace = KILL_GRACE
+        self._base_env = {}
 
     def configure(self, config: dict) -> None:
-        """Configure shell."""
+        """Configure shell.
+
+        Commands are started with a new ``/bin/sh`` each by default. An
+        enabled ``warm_workers`` section runs them on a ShellWorkerPool of
+        long-lived workers instead, which pays off for many short activities.
+        The stdout and stderr of every command are captured as described by
+        the ``output`` section, see ActivityOutput. Commands that time out or
+        are cancelled get SIGTERM, then SIGKILL ``kill_grace`` seconds later.
+
+        :Example:
+
+        config = {
+            "warm_workers": {
+                "enabled": True,
+                "size": 8,
+                "preload": ["numpy"]
+            },
+            "output": {
+                "directory": "~/.zambeze/activity_logs",
+                "max_bytes": 10485760,
+                "max_age": 604800
+            },
+            "kill_grace": 5.0
+        }
+        """
         self._logger.debug(f"Configuring {self._name} plugin")
         for action in self._supported_actions.keys():
             if isExecutable(action):
@@ -125,6 +167,16 @@ class Shell(Plugin):
             self._logger.debug(
                 f"  - action {action} supported {self._supported_actions[action]}"
             )
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+        self._worker_pool = ShellWorkerPool.from_config(
+            config.get("warm_workers", {}), logger=self._logger
+        )
+        self._output_config = config.get("output", {})
+        self._kill_grace = float(config.get("kill_grace", KILL_GRACE))
+        # Environment every command starts from, taken once instead of per
+        # activity.
+        self._base_env = dict(os.environ)
         self._configured = True
         self._logger.debug(f"Configured {self._name} = {self._configured}")
 
@@ -185,12 +237,22 @@ class Shell(Plugin):
 
         return checks
 
-    def process(self, arguments: list[dict]):
+    def process(self, arguments: list[dict]) -> list[dict]:
         """
         Run the shell plugin.
 
+        Commands are executed directly from their argv, so their arguments
+        are passed as given, without the shell expanding variables or globs.
+        Setting ``use_shell`` runs the command line with ``/bin/sh`` instead.
+
         :param arguments: arguments needed to run the shell plugin
         :type arguments: list[dict]
+        :return: One result per command: its returncode, its outcome
+            ("EXITED", "TIMEOUT" or "CANCELLED"), the paths of its stdout and
+            stderr logs and the tail of each stream
+        :rtype: list[dict]
+        :raises ValueError: If the environment variables of a command
+            reference each other in a cycle
 
         Example
 
@@ -200,7 +262,8 @@ class Shell(Plugin):
                 "bash": {
                     "program": "/bin/echo",
                     "args": ["Hello! $NAME"],
-                    "env_vars": { "NAME": "John" }
+                    "env_vars": { "NAME": "John" },
+                    "use_shell": True
                 }
             }
         ]
@@ -213,38 +276,98 @@ class Shell(Plugin):
         if not self._configured:
             raise Exception("Cannot run shell plugin, must first be configured.")
 
-        self._logger.info("[1111] Arguments passed to shell process are")
-        self._logger.info(f"[2222] {arguments}")
+        results = []
         for data in arguments:
-            cmd = data["bash"]["args"]
-            cmd.insert(0, data["bash"]["command"])
-            self._logger.info(f"[3333] CMD: {cmd}")
-
-            # Take an image of the parent environment
-            # -- then add the environment variables to it.
-            parent_env = os.environ.copy()
-            merged_env = parent_env
+            # Splitting the arguments on spaces leaves empty ones behind.
+            cmd = [data["bash"]["command"], *filter(None, data["bash"]["args"])]
+            use_shell = data["bash"].get("use_shell", False)
+
+            # Add the environment variables to the agent's environment. A
+            # ValueError of variables referencing each other fails the
+            # activity rather than running it without them.
+            merged_env = self._base_env
+            if data["bash"]["env_vars"]:
+                merged_env = merge_env_variables(
+                    self._base_env, data["bash"]["env_vars"]
+                )
+
+            # Limits of the activity's resource allocation, if it has one.
+            limits = data["bash"].get("limits")
+            if limits and "gpu_ids" in limits:
+                merged_env = {
+                    **merged_env,
+                    "CUDA_VISIBLE_DEVICES": ",".join(map(str, limits["gpu_ids"])),
+                }
+
+            # Only an explicit use_shell exposes the arguments to the shell
+            # and its injection risks, see:
+            # https://stackoverflow.com/questions/21009416/python-subprocess-security
+            command = " ".join(cmd) if use_shell else cmd
+            self._logger.debug(f"Running SHELL command: {command}")
+
+            output = ActivityOutput.open(
+                self._output_config,
+                data["bash"].get("activity_id"),
+                self._logger,
+                attempt=data["bash"].get("attempt", 1),
+            )
+            # The command and everything it starts form a process group that
+            # is terminated as a whole on timeout or cancellation.
+            timeout = data["bash"].get("timeout")
+            cancel = data["bash"].get("cancel")
             try:
-                # env_tup : (key, value)
-                # Check if dict is empty
-                if data["bash"]["env_vars"]:
-                    merged_env = merge_env_variables(
-                        parent_env, data["bash"]["env_vars"]
+                if self._worker_pool is not None:
+                    returncode, outcome = self._worker_pool.run(
+                        command,
+                        merged_env,
+                        stdout=output.stdout.write_fd,
+                        stderr=output.stderr.write_fd,
+                        limits=limits,
+                        timeout=timeout,
+                        cancel=cancel,
+                        kill_grace=self._kill_grace,
                     )
-            #                for env_tup in data["bash"]["env_vars"]:
-            #                    parent_env[env_tup[0]] = env_tup[1]
-            except ValueError as e:
-                self._logger.error(f"Caught ValueError: {e}")
-
-            shell_cmd = " ".join(cmd)
-
-            self._logger.debug(f"Running SHELL command: {shell_cmd}")
-
-            # converting to use actual SHELL so subprocess can inherit parent env
-            #   (dev note 1: needed for Tyler's ORNL M1 Mac)
-            #   (dev note 2: shell=False can lead to shell injection attacks
-            #       if cmd coming from untrusted source. See:
-            # https://stackoverflow.com/questions/21009416/python-subprocess-security)
-            # shell_exec = subprocess.Popen(shell_cmd, shell=True, env=parent_env)
-            shell_exec = subprocess.Popen(shell_cmd, shell=True, env=merged_env)
-            shell_exec.wait()
+                elif not use_shell:
+                    pid = spawn(
+                        cmd,
+                        merged_env,
+                        stdout=output.stdout.write_fd,
+                        stderr=output.stderr.write_fd,
+                        limits=limits,
+                    )
+                    output.close_writers()
+                    returncode, outcome = supervise(
+                        partial(wait_pid, pid), pid, timeout, cancel, self._kill_grace
+                    )
+                else:
+                    with inherited_limits(limits):
+                        shell_exec = subprocess.Popen(
+                            command,
+                            shell=True,
+                            env=merged_env,
+                            stdout=output.stdout.write_fd,
+                            stderr=output.stderr.write_fd,
+                            start_new_session=True,
+                        )
+                    output.close_writers()
+                    try:
+                        limit_memory(shell_exec.pid, limits)
+                    except OSError:
+                        shell_exec.kill()
+                        shell_exec.wait()
+                        raise
+                    returncode, outcome = supervise(
+                        partial(_wait, shell_exec),
+                        shell_exec.pid,
+                        timeout,
+                        cancel,
+                        self._kill_grace,
+                    )
+            finally:
+                output.close_writers()
+            self._logger.debug(f"SHELL command exited with {returncode} ({outcome})")
+            results.append(
+                {"returncode": returncode, "outcome": outcome, **output.finish()}
+            )
+
+        return results
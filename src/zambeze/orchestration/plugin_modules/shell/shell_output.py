@@ -0,0 +1,285 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(
+    os.path.expanduser("~"), ".zambeze", "activity_logs"
+)
+# Size of a log file before it is rotated.
+DEFAULT_MAX_BYTES = 10 * 1024**2
+# Rotated log files kept per stream, e.g. <activity>.stdout.1 and .2.
+DEFAULT_BACKUPS = 2
+# Bytes of the end of each stream kept in memory for status messages.
+DEFAULT_TAIL_BYTES = 4096
+READ_SIZE = 64 * 1024
+# Seconds to wait for a stream to close once the command exited; a process
+# the command left running in the background may keep it open.
+DRAIN_TIMEOUT = 5.0
+# Log files older than this many seconds are removed; None keeps them.
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+# Log files kept in the directory, the newest first; None keeps all.
+DEFAULT_MAX_FILES = 10000
+# Seconds between two prunings of the same directory.
+PRUNE_INTERVAL = 300.0
+
+# directory -> time.monotonic() of its last pruning
+_last_pruned = {}
+_prune_lock = threading.Lock()
+
+
+def prune_logs(
+    directory: str,
+    max_age: Optional[float] = DEFAULT_MAX_AGE,
+    max_files: Optional[int] = DEFAULT_MAX_FILES,
+    logger: Optional[logging.Logger] = None,
+) -> int:
+    """
+    Remove the log files of ``directory`` last written more than ``max_age``
+    seconds ago, then the oldest ones beyond ``max_files``.
+
+    :return: Number of files removed
+    """
+    logger = logging.getLogger(__name__) if logger is None else logger
+    try:
+        entries = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(directory)
+            if entry.is_file()
+        ]
+    except OSError as e:
+        logger.warning(f"[shell-output] Unable to list {directory}: {e}")
+        return 0
+
+    entries.sort(reverse=True)
+    expired = []
+    if max_files is not None:
+        expired = entries[max_files:]
+        entries = entries[:max_files]
+    if max_age is not None:
+        cutoff = time.time() - max_age
+        expired += [entry for entry in entries if entry[0] < cutoff]
+
+    removed = 0
+    for _, path in expired:
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[shell-output] Unable to remove {path}: {e}")
+    if removed:
+        logger.debug(f"[shell-output] Removed {removed} old logs from {directory}")
+    return removed
+
+
+def _prune_now(directory: str) -> bool:
+    """Whether ``directory`` is due for pruning, marking it as pruned."""
+    now = time.monotonic()
+    with _prune_lock:
+        last = _last_pruned.get(directory)
+        if last is not None and now - last < PRUNE_INTERVAL:
+            return False
+        _last_pruned[directory] = now
+        return True
+
+
+class RotatingOutputFile:
+    """
+    Binary log file rotated once it grows past ``max_bytes``.
+
+    On rotation ``path`` becomes ``path.1``, ``path.1`` becomes ``path.2``
+    and so on; the oldest file beyond ``backups`` is dropped.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int) -> None:
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._file = open(path, "wb")  # noqa: SIM115
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        if self._max_bytes > 0 and self._size + len(chunk) > self._max_bytes:
+            self._rotate()
+        self._file.write(chunk)
+        self._size += len(chunk)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self._backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self._backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "wb")  # noqa: SIM115
+        self._size = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class OutputCapture:
+    """
+    Pipe a command writes one of its streams to.
+
+    A reader thread drains the pipe as the command writes, so a chatty
+    command never blocks on a full pipe buffer, appends everything to a
+    RotatingOutputFile and keeps only the last ``tail_bytes`` in memory.
+
+    Hand ``write_fd`` to the command, call close_writer() once it started
+    and finish() once it exited.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int, backups: int, tail_bytes: int
+    ) -> None:
+        self._file = RotatingOutputFile(path, max_bytes, backups)
+        self._tail_bytes = tail_bytes
+        self._tail = bytearray()
+        self.read_fd, self.write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=self._drain, name="OutputCapture", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._file.path
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                chunk = os.read(self.read_fd, READ_SIZE)
+                if not chunk:
+                    break
+                self._file.write(chunk)
+                self._tail += chunk
+                if len(self._tail) > self._tail_bytes:
+                    del self._tail[: len(self._tail) - self._tail_bytes]
+        finally:
+            os.close(self.read_fd)
+            self._file.close()
+
+    def close_writer(self) -> None:
+        if self.write_fd != -1:
+            os.close(self.write_fd)
+            self.write_fd = -1
+
+    def finish(self, timeout: Optional[float] = DRAIN_TIMEOUT) -> str:
+        """
+        Wait for the stream to end.
+
+        :return: The last ``tail_bytes`` of the stream
+        """
+        self.close_writer()
+        self._thread.join(timeout)
+        return bytes(self._tail).decode(errors="replace")
+
+
+class ActivityOutput:
+    """
+    Captures the stdout and stderr of one attempt of a shell activity.
+
+    Both streams are written to ``<directory>/<activity_id>.<attempt>.stdout``
+    and ``.stderr``, rotated at ``max_bytes``, so a retry keeps the logs of
+    the attempts before it. Their tails are returned by finish() to be
+    reported in the activity's status message. Logs older
+    than ``max_age`` seconds or beyond the newest ``max_files`` are removed
+    from the directory every PRUNE_INTERVAL seconds, see prune_logs().
+
+    :Example:
+
+    output = ActivityOutput.open(config, activity_id)
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=output.stdout.write_fd, stderr=output.stderr.write_fd
+        )
+    finally:
+        output.close_writers()
+    returncode = proc.wait()
+    result = {"returncode": returncode, **output.finish()}
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        activity_id: str,
+        attempt: int = 1,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, f"{activity_id}.{attempt}")
+        self.stdout = OutputCapture(f"{prefix}.stdout", max_bytes, backups, tail_bytes)
+        self.stderr = OutputCapture(f"{prefix}.stderr", max_bytes, backups, tail_bytes)
+
+    @classmethod
+    def open(cls, config: dict, activity_id=None, logger=None, attempt=1):
+        """
+        Start capturing with the shell plugin's ``output`` configuration.
+
+        :Example:
+
+        config = {
+            "directory": "/tmp/zambeze/activity_logs",
+            "max_bytes": 10485760,
+            "backups": 2,
+            "tail_bytes": 4096,
+            "max_age": 604800,
+            "max_files": 10000
+        }
+        """
+        directory = os.path.expanduser(
+            config.get("directory", DEFAULT_OUTPUT_DIRECTORY)
+        )
+        if os.path.isdir(directory) and _prune_now(directory):
+            prune_logs(
+                directory,
+                max_age=config.get("max_age", DEFAULT_MAX_AGE),
+                max_files=config.get("max_files", DEFAULT_MAX_FILES),
+                logger=logger,
+            )
+        return cls(
+            directory=directory,
+            activity_id=activity_id if activity_id else uuid.uuid4(),
+            attempt=attempt,
+            max_bytes=int(config.get("max_bytes", DEFAULT_MAX_BYTES)),
+            backups=int(config.get("backups", DEFAULT_BACKUPS)),
+            tail_bytes=int(config.get("tail_bytes", DEFAULT_TAIL_BYTES)),
+            logger=logger,
+        )
+
+    def close_writers(self) -> None:
+        """Close this process' copy of the pipes once the command started."""
+        self.stdout.close_writer()
+        self.stderr.close_writer()
+
+    def finish(self) -> dict:
+        """
+        Wait for both streams to end.
+
+        :return: {"stdout_log", "stderr_log", "stdout_tail", "stderr_tail"}
+        """
+        stdout_tail = self.stdout.finish()
+        stderr_tail = self.stderr.finish()
+        return {
+            "stdout_log": self.stdout.path,
+            "stderr_log": self.stderr.path,
+            "stdout_tail": stdout_tail,
+            "stderr_tail": stderr_tail,
+        }
@@ -0,0 +1,636 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+# This file doubles as the worker program, so it may only import the
+# standard library.
+
+import importlib
+import itertools
+import json
+import logging
+import os
+import resource
+import runpy
+import select
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from queue import Queue
+from typing import Optional
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# Arguments containing any of these need a real shell to be interpreted.
+SHELL_METACHARACTERS = set("*?[]$|&;<>()~`'\"\\{}!#")
+# Seconds between SIGTERM and SIGKILL when a command is terminated.
+KILL_GRACE = 5.0
+# Seconds between checks of a command's timeout and cancellation.
+POLL_INTERVAL = 0.1
+READ_SIZE = 64 * 1024
+
+
+class ShellWorkerError(Exception):
+    """Raised when a warm worker died or broke the protocol."""
+
+
+def _signal_group(pgid: int, signum: int) -> None:
+    try:
+        os.killpg(pgid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def supervise(
+    wait, pgid: int, timeout=None, cancel=None, kill_grace: float = KILL_GRACE
+) -> tuple[int, str]:
+    """
+    Wait for a command leading process group ``pgid`` to exit.
+
+    Once the command runs past ``timeout`` seconds or the ``cancel`` Event is
+    set, the whole process group is sent SIGTERM, and SIGKILL if it is still
+    around ``kill_grace`` seconds later, so children the command started do
+    not outlive it.
+
+    :param wait: Callable taking a number of seconds and returning the exit
+        code, or None if the command is still running after them
+    :return: The exit code and "EXITED", "TIMEOUT" or "CANCELLED"
+    """
+    if timeout is None and cancel is None:
+        return wait(None), "EXITED"
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    outcome = "EXITED"
+    kill_at = None
+    while True:
+        returncode = wait(POLL_INTERVAL)
+        if returncode is not None:
+            return returncode, outcome
+
+        now = time.monotonic()
+        if outcome == "EXITED":
+            if cancel is not None and cancel.is_set():
+                outcome = "CANCELLED"
+            elif deadline is not None and now >= deadline:
+                outcome = "TIMEOUT"
+            else:
+                continue
+            _signal_group(pgid, signal.SIGTERM)
+            kill_at = now + kill_grace
+        elif kill_at is not None and now >= kill_at:
+            _signal_group(pgid, signal.SIGKILL)
+            kill_at = None
+
+
+class _Worker:
+    def __init__(self, proc: subprocess.Popen, results: int, fds: socket.socket):
+        self.proc = proc
+        # Read end of the pipe the worker answers on.
+        self.results = results
+        self._buffer = b""
+        # Carries the stdout/stderr file descriptors of redirected commands.
+        self.fds = fds
+
+    def read_message(self, timeout=None) -> Optional[dict]:
+        """
+        :return: The next message of the worker, or None if it sent none
+            within ``timeout`` seconds
+        :raises ShellWorkerError: If the worker exited
+        """
+        while b"\n" not in self._buffer:
+            ready, _, _ = select.select([self.results], [], [], timeout)
+            if not ready:
+                return None
+            chunk = os.read(self.results, READ_SIZE)
+            if not chunk:
+                raise ShellWorkerError(f"Worker {self.proc.pid} exited.")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        os.close(self.results)
+        self.fds.close()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class ShellWorkerPool:
+    """
+    Pool of long-lived Python worker processes running shell activities.
+
+    Each worker reads commands from a pipe. Commands running a Python script
+    or module with the same interpreter as the worker are run in a child
+    forked from the already initialized worker, which skips the
+    interpreter startup and any modules listed in ``preload``. Every other
+    command is spawned directly from its argv, or handed to ``/bin/sh`` when
+    given as a command line, exactly as the shell plugin would.
+    Either way the command gets the environment and working directory it was
+    submitted with, and its stdout and stderr may be redirected to file
+    descriptors of the agent, which are passed to the worker over a socket.
+
+    Commands run in their own process group, which the worker reports back
+    so that the agent can terminate them on timeout or cancellation.
+
+    :param size: Maximum number of worker processes
+    :type size: int
+    :param preload: Modules every worker imports once at startup
+    :type preload: Optional[list[str]]
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        preload: Optional[list[str]] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._size = max(1, size)
+        self._preload = list(preload or [])
+        self._idle = Queue()
+        self._spawned = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    @classmethod
+    def from_config(cls, config: dict, logger=None):
+        """
+        Create the pool described by the shell plugin's ``warm_workers``
+        section, e.g. {"enabled": True, "size": 8, "preload": ["numpy"]}.
+
+        Returns:
+            Optional[ShellWorkerPool]: None when warm workers are disabled.
+        """
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            size=int(config.get("size", 4)),
+            preload=config.get("preload"),
+            logger=logger,
+        )
+
+    def _spawn(self) -> _Worker:
+        read_fd, write_fd = os.pipe()
+        fds, worker_fds = socket.socketpair()
+        try:
+            proc = subprocess.Popen(
+                [
+                    sys.executable,
+                    WORKER_SCRIPT,
+                    str(write_fd),
+                    str(worker_fds.fileno()),
+                    *self._preload,
+                ],
+                stdin=subprocess.PIPE,
+                pass_fds=(write_fd, worker_fds.fileno()),
+                text=True,
+            )
+        except OSError:
+            fds.close()
+            raise
+        finally:
+            os.close(write_fd)
+            worker_fds.close()
+        self._logger.debug(f"[shell-worker] Started worker {proc.pid}")
+        return _Worker(proc, read_fd, fds)
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._idle.empty() and self._spawned < self._size:
+                self._spawned += 1
+                spawn = True
+            else:
+                spawn = False
+        if not spawn:
+            return self._idle.get()
+        try:
+            return self._spawn()
+        except OSError:
+            with self._lock:
+                self._spawned -= 1
+            raise
+
+    def run(
+        self,
+        command,
+        env: dict,
+        cwd=None,
+        stdout=None,
+        stderr=None,
+        limits: Optional[dict] = None,
+        timeout=None,
+        cancel=None,
+        kill_grace: float = KILL_GRACE,
+    ) -> tuple[int, str]:
+        """
+        Run a command on a warm worker and wait for it.
+
+        :param command: The argv of the program to run, or a command line
+            to run with the shell
+        :type command: list[str] | str
+        :param env: Complete environment of the command
+        :param cwd: Working directory; the caller's by default
+        :param stdout: File descriptor for the command's stdout, or None to
+            write to the worker's, which is the agent's
+        :param stderr: File descriptor for the command's stderr; required
+            with stdout
+        :param limits: CPU affinity and memory limit, see apply_limits()
+        :param timeout: Seconds after which the command is terminated
+        :param cancel: threading.Event terminating the command when set
+        :param kill_grace: Seconds between SIGTERM and SIGKILL
+        :return: The exit code and "EXITED", "TIMEOUT" or "CANCELLED", see
+            supervise()
+        :raises ShellWorkerError: If the worker died while running it
+        """
+        request = {
+            "id": next(self._ids),
+            "command": command,
+            "env": env,
+            "cwd": os.getcwd() if cwd is None else cwd,
+            "redirect": stdout is not None,
+            "limits": limits,
+        }
+        worker = self._acquire()
+        try:
+            worker.proc.stdin.write(json.dumps(request) + "\n")
+            worker.proc.stdin.flush()
+            if stdout is not None:
+                socket.send_fds(worker.fds, [b"\0"], [stdout, stderr])
+            response = worker.read_message()
+            outcome = "EXITED"
+            if "returncode" not in response:
+                # The command started; its result follows.
+                def wait(seconds):
+                    message = worker.read_message(seconds)
+                    if message is not None:
+                        response.update(message)
+                        return message["returncode"]
+                    return None
+
+                _, outcome = supervise(
+                    wait, response["pgid"], timeout, cancel, kill_grace
+                )
+        except (OSError, ValueError, ShellWorkerError) as e:
+            self._logger.error(f"[shell-worker] Replacing worker: {e}")
+            worker.proc.kill()
+            worker.close()
+            with self._lock:
+                self._spawned -= 1
+            raise ShellWorkerError(str(e)) from e
+
+        self._idle.put(worker)
+        self._logger.debug(
+            f"[shell-worker] {command} exited with {response['returncode']}"
+            f" ({response['mode']}, {outcome})"
+        )
+        return response["returncode"], outcome
+
+    def close(self) -> None:
+        with self._lock:
+            self._spawned = 0
+        while not self._idle.empty():
+            self._idle.get().close()
+
+
+###################################################################################
+# Worker side
+###################################################################################
+def apply_limits(limits: Optional[dict]) -> None:
+    """
+    Confine the calling process, a command's forked child before it runs the
+    command, to the CPUs and memory of its resource allocation.
+    """
+    if not limits:
+        return
+    if limits.get("cpu_ids") and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, limits["cpu_ids"])
+    if limits.get("memory"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["memory"], limits["memory"]))
+
+
+@contextmanager
+def inherited_limits(limits: Optional[dict]):
+    """
+    Confine the processes the calling thread starts inside the block to the
+    CPUs of a resource allocation, without running code in the child between
+    fork and exec.
+
+    The calling thread's CPU affinity, which its children inherit, is
+    narrowed for the duration of the block and restored afterwards; other
+    threads are unaffected. The memory limit is applied to each child once
+    it runs with limit_memory().
+    """
+    cpu_ids = (limits or {}).get("cpu_ids")
+    if not cpu_ids or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+    affinity = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpu_ids)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, affinity)
+
+
+def limit_memory(pid: int, limits: Optional[dict]) -> None:
+    """
+    Limit the address space of the running process ``pid`` to the memory of
+    its resource allocation. A process that already exited is left alone.
+    """
+    memory = (limits or {}).get("memory")
+    if not memory:
+        return
+    try:
+        if hasattr(resource, "prlimit"):
+            resource.prlimit(pid, resource.RLIMIT_AS, (memory, memory))
+    except ProcessLookupError:
+        pass
+
+
+def _abandon(pid: int) -> None:
+    """Kill and reap a child that could not be confined to its limits."""
+    _signal_group(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+
+
+def spawn(
+    argv: list[str],
+    env: dict,
+    cwd=None,
+    stdout: Optional[int] = None,
+    stderr: Optional[int] = None,
+    limits: Optional[dict] = None,
+) -> int:
+    """
+    Start a program from its argv, without a shell, as the leader of a new
+    session with stdin from /dev/null.
+
+    The program is started with ``os.posix_spawnp``, which the C library
+    implements without copying the caller's page tables, and confined to
+    ``limits`` from the caller, see inherited_limits(). It is forked only to
+    run in another ``cwd``. A program that cannot be executed exits with 127,
+    or 126 if it is not permitted, after writing why to its stderr, like it
+    would from the shell.
+
+    :param stdout: File descriptor for the program's stdout; the caller's by
+        default
+    :param stderr: File descriptor for the program's stderr
+    :return: The pid of the program, to wait for with wait_pid()
+    """
+    if hasattr(os, "posix_spawnp") and (
+        cwd is None or os.path.realpath(cwd) == os.getcwd()
+    ):
+        file_actions = [(os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0)]
+        if stdout is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stdout, 1))
+        if stderr is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stderr, 2))
+        with inherited_limits(limits):
+            try:
+                pid = os.posix_spawnp(
+                    argv[0], argv, env, file_actions=file_actions, setsid=True
+                )
+            except OSError as e:
+                # Report it from a child so the caller handles a single case.
+                error = e
+            else:
+                try:
+                    limit_memory(pid, limits)
+                except OSError:
+                    _abandon(pid)
+                    raise
+                return pid
+
+        def run_child():
+            os.write(2, f"{argv[0]}: {error.strerror}\n".encode())
+            os._exit(126 if isinstance(error, PermissionError) else 127)
+
+    else:
+
+        def run_child():
+            if cwd is not None:
+                os.chdir(cwd)
+            apply_limits(limits)
+            try:
+                os.execvpe(argv[0], argv, env)
+            except OSError as e:
+                os.write(2, f"{argv[0]}: {e.strerror}\n".encode())
+                os._exit(126 if isinstance(e, PermissionError) else 127)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            if stdout is not None:
+                os.dup2(stdout, 1)
+            if stderr is not None:
+                os.dup2(stderr, 2)
+            run_child()
+        finally:
+            os._exit(127)
+    return pid
+
+
+def wait_pid(pid: int, seconds=None) -> Optional[int]:
+    """
+    Wait for a child started by spawn() to exit.
+
+    :return: Its exit code, or None if it is still running after ``seconds``
+    """
+    if seconds is None:
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+    deadline = time.monotonic() + seconds
+    delay = 0.0005
+    while True:
+        waited, status = os.waitpid(pid, os.WNOHANG)
+        if waited == pid:
+            return os.waitstatus_to_exitcode(status)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
+
+
+def _runs_this_interpreter(program: str, env: dict) -> bool:
+    path = shutil.which(program, path=env.get("PATH", os.defpath))
+    return path is not None and os.path.realpath(path) == os.path.realpath(
+        sys.executable
+    )
+
+
+def _python_entry(command, env: dict):
+    """
+    Recognize ``python script.py ...`` and ``python -m module ...`` run with
+    this worker's interpreter. Command lines the shell would transform, by
+    expanding variables or globs, quoting, redirecting and so on, are left
+    to the shell.
+
+    Returns:
+        Optional[tuple]: (kind, target, sys.argv) or None to use the shell.
+    """
+    if isinstance(command, str):
+        if SHELL_METACHARACTERS & set(command):
+            return None
+        argv = command.split()
+    else:
+        argv = command
+    if len(argv) < 2 or not _runs_this_interpreter(argv[0], env):
+        return None
+    if argv[1] == "-m" and len(argv) >= 3:
+        return "module", argv[2], [argv[2], *argv[3:]]
+    if argv[1].endswith(".py"):
+        return "script", argv[1], argv[1:]
+    return None
+
+
+def _run_python_in_child(
+    kind, target, script_argv, env, cwd, stdout, stderr, limits, started
+) -> int:
+    """Fork the warm worker and run the Python entry point in the child."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            if stdout is not None:
+                os.dup2(stdout, 1)
+                os.dup2(stderr, 2)
+            os.chdir(cwd)
+            apply_limits(limits)
+            os.environ.clear()
+            os.environ.update(env)
+            sys.argv = script_argv
+            if kind == "script":
+                sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+                runpy.run_path(target, run_name="__main__")
+            else:
+                sys.path.insert(0, cwd)
+                runpy.run_module(target, run_name="__main__", alter_sys=True)
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException:  # noqa: BLE001
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    started(pid)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def _handle(request: dict, stdout, stderr, started) -> tuple[int, str]:
+    entry = _python_entry(request["command"], request["env"])
+    if entry is not None:
+        returncode = _run_python_in_child(
+            *entry,
+            request["env"],
+            request["cwd"],
+            stdout,
+            stderr,
+            request["limits"],
+            started,
+        )
+        return returncode, "fork"
+
+    if not isinstance(request["command"], str):
+        pid = spawn(
+            request["command"],
+            request["env"],
+            cwd=request["cwd"],
+            stdout=stdout,
+            stderr=stderr,
+            limits=request["limits"],
+        )
+        started(pid)
+        return wait_pid(pid, None), "exec"
+
+    with inherited_limits(request["limits"]):
+        proc = subprocess.Popen(
+            request["command"],
+            shell=True,
+            env=request["env"],
+            cwd=request["cwd"],
+            stdin=subprocess.DEVNULL,
+            stdout=stdout,
+            stderr=stderr,
+            start_new_session=True,
+        )
+    try:
+        limit_memory(proc.pid, request["limits"])
+    except OSError:
+        _abandon(proc.pid)
+        raise
+    started(proc.pid)
+    return proc.wait(), "shell"
+
+
+def main() -> None:
+    results = os.fdopen(int(sys.argv[1]), "w", buffering=1)
+    fds = socket.socket(fileno=int(sys.argv[2]))
+    for module in sys.argv[3:]:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"[shell-worker] Unable to preload {module}: {e}", file=sys.stderr)
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        stdout = stderr = None
+        if request["redirect"]:
+            _, (stdout, stderr), _, _ = socket.recv_fds(fds, 1, 2)
+
+        def started(pid, request_id=request["id"]):
+            results.write(json.dumps({"id": request_id, "pgid": pid}) + "\n")
+
+        try:
+            returncode, mode = _handle(request, stdout, stderr, started)
+        except Exception:  # noqa: BLE001
+            traceback.print_exc()
+            returncode, mode = 1, "error"
+        finally:
+            if stdout is not None:
+                os.close(stdout)
+                os.close(stderr)
+        results.write(
+            json.dumps({"id": request["id"], "returncode": returncode, "mode": mode})
+            + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
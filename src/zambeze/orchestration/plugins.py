@@ -7,14 +7,13 @@ from __future__ import annotations
 
 from .message.abstract_message import AbstractMessage
 from .plugin_modules.abstract_plugin import Plugin
-from .plugin_modules.common_plugin_functions import registerPlugins
-from zambeze.campaign.shell_activity import ShellActivity
+from .plugin_host import PluginHostPool
+from .plugin_modules.common_plugin_functions import plugin_registry
+from zambeze.campaign.shell_activity import ShellActivity, ShellActivityRecord
 from zambeze.campaign.activity import Activity
 
 from copy import deepcopy
 from dataclasses import asdict
-from importlib import import_module
-from inspect import isclass
 from typing import Optional, overload
 
 import logging
@@ -38,6 +37,7 @@ class Plugins:
     """Plugins class takes care of managing all plugins.
 
     Plugins can be added as plugins by creating packages in the plugin_modules
+    folder; a plugin's module is only imported once it is configured.
 
     Parameters
     ----------
@@ -54,8 +54,10 @@ class Plugins:
         self.__logger: logging.Logger = (
             logging.getLogger(__name__) if logger is None else logger
         )
-        self.__module_names = registerPlugins()
+        self.__registry = plugin_registry()
+        self.__module_names = self.__registry.names
         self._plugins = {}
+        self._host_pool = None
 
     @property
     def registered(self) -> list[str]:
@@ -76,7 +78,7 @@ class Plugins:
             plugins.append(deepcopy(module_name))
         return plugins
 
-    def configure(self, config: dict):
+    def configure(self, config: dict, host: Optional[dict] = None):
         """
         Configuration options for each plugin
 
@@ -90,6 +92,10 @@ class Plugins:
         config : dict
             This contains relevant configuration information for each plugin,
             if provided will only configure the plugins listed
+        host : dict, optional
+            The ``plugin_host`` settings section. When enabled, plugins are
+            run on a PluginHostPool of processes configured with ``config``
+            instead of in the calling thread.
 
         Example
         -------
@@ -116,23 +122,19 @@ class Plugins:
         for module_name in self.__module_names:
             # Registering plugins
             if module_name in config.keys() and module_name in self.__module_names:
-                module = import_module(
-                    f"zambeze.orchestration.plugin_modules.{module_name}.{module_name}"
-                )
-                for attribute_name in dir(module):
-                    potential_plugin = getattr(module, attribute_name)
-                    if isclass(potential_plugin):
-                        if (
-                            issubclass(potential_plugin, Plugin)
-                            and attribute_name != "Plugin"
-                        ):
-                            self._plugins[attribute_name.lower()] = potential_plugin(
-                                logger=self.__logger
-                            )
+                plugin_classes = self.__registry.classes(module_name, "", Plugin)
+                for plugin_name, plugin_class in plugin_classes.items():
+                    self._plugins[plugin_name] = plugin_class(logger=self.__logger)
 
                 obj = self._plugins.get(module_name)
                 obj.configure(config[module_name])
 
+        if self._host_pool is not None:
+            self._host_pool.close()
+        self._host_pool = PluginHostPool.from_config(
+            host or {}, config, logger=self.__logger
+        )
+
     @property
     def configured(self) -> list[str]:
         """Will return a list of all the plugins that have been configured.
@@ -220,7 +222,7 @@ class Plugins:
             What is returned are a list of the plugins and their actions along
             with an indication on whether there was a problem with them.
         """
-        if isinstance(msg, ShellActivity):
+        if isinstance(msg, (ShellActivity, ShellActivityRecord)):
             arguments = {"arguments": msg.arguments, "command": msg.command}
             plugin_name = "shell"
         else:
@@ -271,14 +273,14 @@ class Plugins:
         return PluginChecks(check_results)
 
     @overload
-    def run(self, msg: AbstractMessage, arguments: Optional[dict] = None) -> None:
+    def run(self, msg: AbstractMessage, arguments: Optional[dict] = None):
         pass
 
     @overload
-    def run(self, msg: str, arguments: dict = {}) -> None:
+    def run(self, msg: str, arguments: dict = {}):
         pass
 
-    def run(self, msg, arguments=None) -> None:
+    def run(self, msg, arguments=None):
         """Run a specific plugins.
 
         Parameters
@@ -286,15 +288,28 @@ class Plugins:
         plugin_name : str
             Plugin name.
         arguments : dict
-            Plugin arguments.
+            Plugin arguments. For a ShellActivity, extra parameters of its
+            command such as the "limits" of its resource allocation.
+
+        Returns
+        -------
+        Whatever the plugin's process method returned, e.g. the exit code
+        and output of each command for the shell plugin.
         """
         if isinstance(msg, AbstractMessage):
             if msg.type == "PLUGIN":
                 arguments = asdict(msg.data.body.parameters)
                 plugin_name = msg.data.type
-        elif isinstance(msg, ShellActivity):
+        elif isinstance(msg, (ShellActivity, ShellActivityRecord)):
             if msg.type == "SHELL":
-                arguments = {msg.plugin_args["shell"]: msg.plugin_args["parameters"]}
+                arguments = {
+                    msg.plugin_args["shell"]: {
+                        **msg.plugin_args["parameters"],
+                        "activity_id": msg.activity_id,
+                        "attempt": msg.attempt,
+                        **(arguments or {}),
+                    }
+                }
                 plugin_name = msg.type
                 self.__logger.info("GOODLY")
             else:
@@ -311,5 +326,9 @@ class Plugins:
 
         self.__logger.info("GOODLY-2")
         self.__logger.info(plugin_name)
-        self._plugins[plugin_name.lower()].process([arguments])
+        if self._host_pool is not None:
+            result = self._host_pool.run(plugin_name.lower(), arguments)
+        else:
+            result = self._plugins[plugin_name.lower()].process([arguments])
         self.__logger.info("GOODLY-3")
+        return result
@@ -2,13 +2,11 @@
 Template engine for plugin messages.
 """
 
-from .plugin_modules.common_plugin_functions import registerPlugins
+from .plugin_modules.common_plugin_functions import plugin_registry
 from .plugin_modules.abstract_plugin_template_generator import (
     PluginMessageTemplateGenerator,
 )
 
-from importlib import import_module
-from inspect import isclass
 from typing import Optional
 
 import logging
@@ -20,44 +18,22 @@ class PluginsMessageTemplateEngine:
         if self.__logger is None:
             self.__logger = logging.Logger(__name__)
 
-        self.__module_names = registerPlugins()
+        self.__registry = plugin_registry()
+        # Created the first time a plugin's template is generated.
         self._plugin_message_template_generators = {}
-        self.__registerPluginTemplateGenerators()
 
-    def __registerPluginTemplateGenerators(self) -> None:
-        print(self.__module_names)
-        for module_name in self.__module_names:
-            # Registering plugin message validators
-            print(module_name)
-            module = import_module(
-                "zambeze.orchestration.plugin_modules."
-                f"{module_name}.{module_name}_message_template_generator"
+    def __registerPluginTemplateGenerator(self, module_name: str) -> None:
+        generator_classes = self.__registry.classes(
+            module_name, "_message_template_generator", PluginMessageTemplateGenerator
+        )
+        for attribute_name, generator_class in generator_classes.items():
+            self.__logger.debug(
+                f" - Registering plugin template generator: {attribute_name}"
+            )
+            plugin_name = attribute_name.replace("messagetemplategenerator", "")
+            self._plugin_message_template_generators[plugin_name] = generator_class(
+                logger=self.__logger
             )
-            for attribute_name in dir(module):
-                potential_plugin_message_template_generator = getattr(
-                    module, attribute_name
-                )
-                if isclass(potential_plugin_message_template_generator):
-                    if (
-                        issubclass(
-                            potential_plugin_message_template_generator,
-                            PluginMessageTemplateGenerator,
-                        )
-                        and attribute_name != "PluginMessageTemplateGenerator"
-                    ):
-                        print(
-                            " - Registering plugin template generator:"
-                            f" {attribute_name.lower()}"
-                        )
-                        print(f"Attribute name is {attribute_name}")
-                        plugin_name = attribute_name.lower().replace(
-                            "messagetemplategenerator", ""
-                        )
-                        self._plugin_message_template_generators[plugin_name] = (
-                            potential_plugin_message_template_generator(
-                                logger=self.__logger
-                            )
-                        )
 
     def generate(self, plugin_name: str, args):
         """Will return a template of the message body this can be used by the
@@ -65,6 +41,8 @@ class PluginsMessageTemplateEngine:
         processed by the run and or check commands.
         """
 
+        if plugin_name not in self._plugin_message_template_generators:
+            self.__registerPluginTemplateGenerator(plugin_name)
         message_template = self._plugin_message_template_generators[
             plugin_name
         ].generate(args)
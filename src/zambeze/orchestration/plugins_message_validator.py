@@ -2,11 +2,9 @@
 Validator for plugin messages.
 """
 
-from .plugin_modules.common_plugin_functions import registerPlugins
+from .plugin_modules.common_plugin_functions import plugin_registry
 from .plugin_modules.abstract_plugin_message_validator import PluginMessageValidator
 
-from importlib import import_module
-from inspect import isclass
 from typing import Optional
 
 import logging
@@ -27,38 +25,21 @@ class PluginsMessageValidator:
         if self.__logger is None:
             self.__logger = logging.Logger(__name__)
 
-        self.__module_names = registerPlugins()
+        self.__registry = plugin_registry()
+        self.__module_names = self.__registry.names
+        # Created the first time a plugin's message is validated.
         self._plugin_message_validators = {}
 
-        # self.__registerPlugins()
-        self.__registerPluginValidators()
-
-    def __registerPluginValidators(self) -> None:
-        for module_name in self.__module_names:
-            # Registering plugin message validators
-            module = import_module(
-                "zambeze.orchestration.plugin_modules."
-                f"{module_name}.{module_name}_message_validator"
+    def __registerPluginValidator(self, module_name: str) -> None:
+        validator_classes = self.__registry.classes(
+            module_name, "_message_validator", PluginMessageValidator
+        )
+        for attribute_name, validator_class in validator_classes.items():
+            self.__logger.debug(f" - Registering plugin validator: {attribute_name}")
+            plugin_name = attribute_name.replace("messagevalidator", "")
+            self._plugin_message_validators[plugin_name] = validator_class(
+                logger=self.__logger
             )
-            for attribute_name in dir(module):
-                potential_plugin_message_validator = getattr(module, attribute_name)
-                if isclass(potential_plugin_message_validator):
-                    if (
-                        issubclass(
-                            potential_plugin_message_validator, PluginMessageValidator
-                        )
-                        and attribute_name != "PluginMessageValidator"
-                    ):
-                        print(
-                            " - Registering plugin validator:"
-                            f" {attribute_name.lower()}"
-                        )
-                        plugin_name = attribute_name.lower().replace(
-                            "messagevalidator", ""
-                        )
-                        self._plugin_message_validators[plugin_name] = (
-                            potential_plugin_message_validator(logger=self.__logger)
-                        )
 
     def validate(self, plugin_name: str, arguments: dict) -> dict:
         """Check that the arguments passed to the plugin "plugin_name" have
@@ -109,6 +90,11 @@ class PluginsMessageValidator:
         >>> # {
         """
         check_results = {}
+        if (
+            plugin_name not in self._plugin_message_validators
+            and plugin_name in self.__module_names
+        ):
+            self.__registerPluginValidator(plugin_name)
         if plugin_name not in self._plugin_message_validators.keys():
             check_results[plugin_name] = [
                 {"configured": (False, f"{plugin_name} is not configured.")}
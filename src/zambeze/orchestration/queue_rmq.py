@@ -1,8 +1,13 @@
 import dill
 import logging
 import pika
+from .metrics import agent_metrics
 from .zambeze_types import ChannelType, QueueType
 
+# Fanout exchange broadcasting CANCEL requests to every agent, since only the
+# agent running an activity can cancel it.
+CANCEL_EXCHANGE = "zambeze.cancel"
+
 
 class QueueTimeoutException(Exception):
     """Class is needed to abstract away possible implementation specific errors"""
@@ -65,6 +70,9 @@ class QueueRMQ:
             # Note: these are *not subscriptions*; subscribing to filters not yet supported.
             self._rmq_channel.queue_declare(queue="ACTIVITIES")
             self._rmq_channel.queue_declare(queue="CONTROL")
+            self._rmq_channel.exchange_declare(
+                exchange=CANCEL_EXCHANGE, exchange_type="fanout"
+            )
 
         except Exception as e:
             if self._logger:
@@ -92,6 +100,7 @@ class QueueRMQ:
     def reconnect(self):
         self.close()
         self.connect()
+        agent_metrics().inc("zambeze_rmq_reconnects_total")
         self.__reconnected()
 
     @property
@@ -131,6 +140,34 @@ class QueueRMQ:
                 callback_func, channel_to_listen, should_auto_ack
             )
 
+    def listen_to_broadcasts(self, callback_func, exchange):
+        """Receive every message published on the fanout ``exchange``, on a
+        queue of this client's own that is removed when it disconnects;
+        --> do action in callback function on receipt."""
+
+        try:
+            declared = self._rmq_channel.queue_declare(queue="", exclusive=True)
+            queue = declared.method.queue
+            self._rmq_channel.queue_bind(exchange=exchange, queue=queue)
+
+            self._logger.debug(
+                f"[message_handler] Waiting with listener on RabbitMQ exchange {exchange}"
+            )
+            self._rmq_channel.basic_consume(
+                queue=queue, on_message_callback=callback_func, auto_ack=True
+            )
+            self._rmq_channel.start_consuming()
+        # Do not recover if connection was closed by broker
+        except pika.exceptions.ConnectionClosedByBroker:
+            raise
+        # Do not recover on channel errors
+        except pika.exceptions.AMQPChannelError:
+            raise
+        # Recover on all other connection errors
+        except pika.exceptions.AMQPConnectionError:
+            self.reconnect()
+            self.listen_to_broadcasts(callback_func, exchange)
+
     @property
     def subscriptions(self) -> list[ChannelType]:
         active_subscriptions = []
@@ -0,0 +1,190 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+class ResourceLedgerError(Exception):
+    """Raised for activities asking for more than the node has."""
+
+
+def _node_cpu_ids() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _node_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+@dataclass
+class Allocation:
+    """Resources reserved for one activity."""
+
+    activity_id: str
+    cpu_ids: list[int]
+    # Bytes, or None when the activity did not ask for a memory limit.
+    memory: Optional[int] = None
+    gpu_ids: list[int] = field(default_factory=list)
+
+    def limits(self, track_gpus: bool) -> dict:
+        """
+        The limits the shell plugin enforces on the activity's process: its
+        CPU affinity, address space and, on nodes with GPUs, the devices it
+        may see.
+        """
+        limits = {"cpu_ids": self.cpu_ids, "memory": self.memory}
+        if track_gpus:
+            limits["gpu_ids"] = self.gpu_ids
+        return limits
+
+
+class ResourceLedger:
+    """
+    Book of the node's CPUs, memory and GPUs shared by concurrent activities.
+
+    The executor acquires an Allocation before starting a shell activity and
+    releases it once the activity is done; acquire() blocks until the
+    activity fits next to the ones already running. Activities state what
+    they need through their ``cpus``, ``memory`` and ``gpus`` hints and take
+    one CPU, no memory reservation and no GPU otherwise.
+
+    :param cpus: Number of CPUs to hand out; all usable ones by default
+    :type cpus: Optional[int]
+    :param memory: Bytes of memory to hand out; the physical memory by default
+    :type memory: Optional[int]
+    :param gpus: Number of GPUs to hand out
+    :type gpus: int
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        cpus: Optional[int] = None,
+        memory: Optional[int] = None,
+        gpus: int = 0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        cpu_ids = _node_cpu_ids()
+        self._free_cpus = cpu_ids[:cpus] if cpus else cpu_ids
+        self.cpus = len(self._free_cpus)
+        self.memory = memory if memory is not None else _node_memory()
+        self._free_memory = self.memory
+        self.gpus = gpus
+        self._free_gpus = list(range(gpus))
+        self._condition = threading.Condition()
+        # activity_id -> Allocation
+        self._allocations = {}
+
+    @classmethod
+    def from_settings(cls, settings, logger=None):
+        """Create the ledger described by the ``resources`` settings section."""
+        resources = settings.settings.get("resources", {})
+        return cls(
+            cpus=resources.get("cpus"),
+            memory=resources.get("memory"),
+            gpus=int(resources.get("gpus") or 0),
+            logger=logger,
+        )
+
+    @staticmethod
+    def request_for(activity) -> dict:
+        """The resources an activity asks for, from its hints."""
+        return {
+            "cpus": getattr(activity, "cpus", None) or 1,
+            "memory": getattr(activity, "memory", None),
+            "gpus": getattr(activity, "gpus", None) or 0,
+        }
+
+    def check(self, request: dict) -> None:
+        """
+        :raises ResourceLedgerError: If the request can never be satisfied
+        """
+        if request["cpus"] > self.cpus:
+            raise ResourceLedgerError(
+                f"{request['cpus']} CPUs requested, the node has {self.cpus}."
+            )
+        if request["gpus"] > self.gpus:
+            raise ResourceLedgerError(
+                f"{request['gpus']} GPUs requested, the node has {self.gpus}."
+            )
+        if (
+            request["memory"] is not None
+            and self.memory is not None
+            and request["memory"] > self.memory
+        ):
+            raise ResourceLedgerError(
+                f"{request['memory']} bytes requested, the node has {self.memory}."
+            )
+
+    def _fits(self, request: dict) -> bool:
+        if request["cpus"] > len(self._free_cpus):
+            return False
+        if request["gpus"] > len(self._free_gpus):
+            return False
+        if request["memory"] is not None and self._free_memory is not None:
+            return request["memory"] <= self._free_memory
+        return True
+
+    def acquire(
+        self, activity_id, request: dict, timeout: Optional[float] = None
+    ) -> Optional[Allocation]:
+        """
+        Reserve resources for an activity, waiting until they are free.
+
+        :return: The Allocation, or None if it did not fit within ``timeout``
+        :raises ResourceLedgerError: If the request can never be satisfied
+        """
+        self.check(request)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._fits(request), timeout):
+                return None
+            allocation = Allocation(
+                activity_id=activity_id,
+                cpu_ids=self._free_cpus[: request["cpus"]],
+                memory=request["memory"],
+                gpu_ids=self._free_gpus[: request["gpus"]],
+            )
+            del self._free_cpus[: request["cpus"]]
+            del self._free_gpus[: request["gpus"]]
+            if request["memory"] is not None and self._free_memory is not None:
+                self._free_memory -= request["memory"]
+            self._allocations[activity_id] = allocation
+
+        self._logger.debug(f"[resources] Admitted {activity_id}: {allocation}")
+        return allocation
+
+    def release(self, allocation: Allocation) -> None:
+        with self._condition:
+            if self._allocations.pop(allocation.activity_id, None) is None:
+                return
+            self._free_cpus = sorted(self._free_cpus + allocation.cpu_ids)
+            self._free_gpus = sorted(self._free_gpus + allocation.gpu_ids)
+            if allocation.memory is not None and self._free_memory is not None:
+                self._free_memory += allocation.memory
+            self._condition.notify_all()
+
+        self._logger.debug(f"[resources] Released {allocation.activity_id}")
+
+    @property
+    def available(self) -> dict:
+        with self._condition:
+            return {
+                "cpus": len(self._free_cpus),
+                "memory": self._free_memory,
+                "gpus": len(self._free_gpus),
+            }
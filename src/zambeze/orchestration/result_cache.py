@@ -0,0 +1,308 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from zambeze.orchestration.data.local_transfer import stage_local_file
+from zambeze.orchestration.db.model.activity_result_model import ActivityResultModel
+
+READ_SIZE = 1024**2
+# Input files whose digest is remembered, the least recently used dropped.
+MAX_DIGESTS = 4096
+DEFAULT_RESULT_CACHE_MAX_BYTES = 10 * 1024**3
+
+
+class ResultCache:
+    """
+    Results of past shell activities, reused when an activity is run again
+    with the same command, arguments, environment variables, shell mode and
+    inputs.
+
+    Activities opt in with ``cache=True`` and name the files they produce in
+    ``outputs``. After such an activity succeeded, its outputs are copied into
+    ``directory``, stored once per content digest, and a manifest of them is
+    written to the local DB under the activity's key. When an activity with
+    the same key comes up again and every output of the manifest is still in
+    the store, the executor restores the outputs instead of running it.
+
+    The least recently used outputs are evicted once the store grows past
+    ``max_bytes``; results whose outputs were evicted are no longer found.
+    Recency is kept in the access time of the stored files so that it
+    survives agent restarts.
+
+    :param directory: Directory holding the stored outputs
+    :type directory: str | pathlib.Path
+    :param dao: ActivityResultDAO of the local DB
+    :param agent_id: Agent the results belong to
+    :param max_bytes: Size cap of the stored outputs in bytes
+    :param logger: The logger where to log information/warning or errors.
+    :type logger: Optional[logging.Logger]
+    """
+
+    def __init__(
+        self,
+        directory,
+        dao,
+        agent_id=None,
+        max_bytes: int = DEFAULT_RESULT_CACHE_MAX_BYTES,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self._directory = pathlib.Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._dao = dao
+        self._agent_id = agent_id
+        # path -> ((inode, size, mtime), digest), so unchanged inputs of
+        # successive activities are read once; a changed file replaces its
+        # entry.
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._max_bytes = max_bytes
+        # digest -> size in bytes of the stored outputs, least recently used
+        # first.
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._load()
+
+    @classmethod
+    def from_settings(cls, settings, dao, agent_id=None, logger=None):
+        """
+        Create the agent's cache from the ``result_cache`` settings section.
+
+        :return: None when the cache is disabled
+        """
+        cache_settings = settings.settings.get("result_cache", {})
+        if not cache_settings.get("enabled", False):
+            return None
+        return cls(
+            cache_settings["directory"],
+            dao,
+            agent_id=agent_id,
+            max_bytes=int(
+                cache_settings.get("max_bytes", DEFAULT_RESULT_CACHE_MAX_BYTES)
+            ),
+            logger=logger,
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def digest(self, path) -> str:
+        """SHA-256 of a file's content."""
+        path = os.path.abspath(path)
+        file_stat = os.stat(path)
+        stamp = (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        with self._lock:
+            memo = self._digests.get(path)
+            if memo is not None and memo[0] == stamp:
+                self._digests.move_to_end(path)
+                return memo[1]
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(READ_SIZE):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._digests[path] = (stamp, digest)
+            self._digests.move_to_end(path)
+            if len(self._digests) > MAX_DIGESTS:
+                self._digests.popitem(last=False)
+        return digest
+
+    def make_key(self, activity, input_paths: list[str]) -> str:
+        """
+        Build the key of an activity from its command, arguments, environment
+        variables, whether it runs in a shell and the digests of its staged
+        inputs.
+        """
+        fields = {
+            "command": activity.command,
+            "arguments": activity.arguments,
+            "env_vars": activity.env_vars or {},
+            # e.g. "echo $HOME" prints $HOME unless run in a shell.
+            "use_shell": getattr(activity, "shell", False),
+            "inputs": sorted(
+                (os.path.basename(path), self.digest(path)) for path in input_paths
+            ),
+            "outputs": sorted(activity.outputs),
+        }
+        encoded = json.dumps(fields, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def lookup(self, key) -> Optional[dict]:
+        """
+        Find the most recent result stored under ``key`` whose outputs are
+        all still in the store.
+
+        :return: {"activity_id", "manifest", "result"}, or None on a miss
+        """
+        try:
+            rows = self._dao.select_by_cache_key(key)
+        except SQLAlchemyError:
+            return None
+
+        for row in rows:
+            manifest = json.loads(row["manifest"])
+            if self._touch(output["digest"] for output in manifest):
+                return {
+                    "activity_id": row["activity_id"],
+                    "manifest": manifest,
+                    "result": json.loads(row["result"]) if row["result"] else None,
+                }
+        return None
+
+    def restore(self, entry: dict) -> None:
+        """Put the outputs of a stored result back at their paths."""
+        for output in entry["manifest"]:
+            dest_path = pathlib.Path(output["path"])
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            if dest_path.exists() or dest_path.is_symlink():
+                dest_path.unlink()
+            stage_local_file(
+                self._entry_path(output["digest"]), dest_path, logger=self._logger
+            )
+            # The stored copy is read-only; give back the output's own mode.
+            os.chmod(dest_path, output["mode"])
+        self._logger.info(
+            f"[result-cache] Restored {len(entry['manifest'])} outputs of"
+            f" {entry['activity_id']}"
+        )
+
+    def store(self, key, activity_id, output_paths: list[str], result=None) -> None:
+        """
+        Keep the outputs and result of a succeeded activity under ``key``.
+
+        Outputs that are missing are logged and nothing is stored, since the
+        result could not be restored in full. Neither is a result whose outputs
+        do not fit in the store together.
+        """
+        output_paths = [os.path.abspath(path) for path in output_paths]
+        for path in output_paths:
+            if not os.path.isfile(path):
+                self._logger.warning(
+                    f"[result-cache] Output {path} of {activity_id} is missing;"
+                    " not caching its result."
+                )
+                return
+        size = sum(os.stat(path).st_size for path in output_paths)
+        if size > self._max_bytes:
+            self._logger.debug(
+                f"[result-cache] Outputs of {activity_id} ({size} bytes) exceed"
+                " the cache size; not caching its result."
+            )
+            return
+
+        manifest = []
+        for path in output_paths:
+            digest = self.digest(path)
+            if not self._touch([digest]):
+                self._add(digest, path)
+            file_stat = os.stat(path)
+            manifest.append(
+                {
+                    "path": path,
+                    "digest": digest,
+                    "size": file_stat.st_size,
+                    "mode": stat.S_IMODE(file_stat.st_mode),
+                }
+            )
+
+        model = ActivityResultModel(
+            agent_id=self._agent_id,
+            cache_key=key,
+            activity_id=str(activity_id),
+            manifest=json.dumps(manifest),
+            result=json.dumps(result, default=str),
+            created_at=int(time.time() * 1000),
+        )
+        try:
+            self._dao.insert(model)
+        except SQLAlchemyError as e:
+            self._logger.error(f"[result-cache] Unable to store result: {e}")
+            return
+        self._logger.info(
+            f"[result-cache] Stored result of {activity_id} as {key[:12]}"
+        )
+
+    def _entry_path(self, digest) -> pathlib.Path:
+        return self._directory / digest
+
+    def _touch(self, digests) -> bool:
+        """Mark stored outputs as used; False if any of them is not stored."""
+        digests = list(digests)
+        with self._lock:
+            if not all(digest in self._entries for digest in digests):
+                return False
+            for digest in digests:
+                self._entries.move_to_end(digest)
+        now = time.time_ns()
+        for digest in digests:
+            entry_path = self._entry_path(digest)
+            try:
+                os.utime(entry_path, ns=(now, entry_path.stat().st_mtime_ns))
+            except FileNotFoundError:
+                # Evicted by another thread in the meantime.
+                return False
+        return True
+
+    def _add(self, digest, path) -> None:
+        """Copy an output into the store and evict what no longer fits."""
+        entry_path = self._entry_path(digest)
+        # Copied aside without holding the lock, and published under it.
+        tmp_path = entry_path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")
+        stage_local_file(path, tmp_path, logger=self._logger)
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        size = tmp_path.stat().st_size
+        with self._lock:
+            if digest in self._entries:
+                tmp_path.unlink()
+                self._entries.move_to_end(digest)
+                return
+            os.replace(tmp_path, entry_path)
+            self._entries[digest] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used outputs until the store fits its cap."""
+        while self._total_bytes > self._max_bytes and self._entries:
+            digest, size = self._entries.popitem(last=False)
+            self._entry_path(digest).unlink(missing_ok=True)
+            self._total_bytes -= size
+            self._logger.debug(f"[result-cache] Evicted {digest[:12]} ({size} bytes)")
+
+    def _load(self) -> None:
+        """Index the outputs stored by a previous agent, oldest first."""
+        entries = []
+        for entry_path in self._directory.iterdir():
+            if entry_path.suffix == ".tmp":
+                entry_path.unlink(missing_ok=True)
+                continue
+            entry_stat = entry_path.stat()
+            entries.append(
+                (entry_stat.st_atime_ns, entry_path.name, entry_stat.st_size)
+            )
+
+        for _, digest, size in sorted(entries):
+            self._entries[digest] = size
+            self._total_bytes += size
+        self._evict()
@@ -0,0 +1,107 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+from dataclasses import dataclass
+
+# Failure classes of an activity.
+# Network, broker or transfer service faults that may go away by themselves.
+TRANSIENT = "TRANSIENT"
+# The shell command ran and exited with a non-zero code.
+COMMAND = "COMMAND"
+# The activity ran past its timeout.
+TIMEOUT = "TIMEOUT"
+# The activity was cancelled; never retried.
+CANCELLED = "CANCELLED"
+# Anything else, such as invalid activities or insufficient resources.
+PERMANENT = "PERMANENT"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how soon a failed activity is tried again.
+
+    An activity failing with one of the ``retry_on`` failure classes is put
+    back on the ACTIVITIES queue, where any agent may pick it up, after a
+    delay starting at ``initial_delay`` seconds and growing by ``backoff``
+    with every attempt up to ``max_delay``. Once ``max_attempts`` attempts
+    failed, or the failure is of another class, the activity fails.
+
+    :Example:
+
+    ShellActivity(
+        name="reduce", files=["globus://..."], command="reduce", arguments="",
+        retry=RetryPolicy(max_attempts=5, retry_on=(TRANSIENT, TIMEOUT)),
+    )
+    """
+
+    max_attempts: int = 3
+    initial_delay: float = 1.0
+    backoff: float = 2.0
+    max_delay: float = 60.0
+    retry_on: tuple[str, ...] = (TRANSIENT,)
+
+    def should_retry(self, attempt: int, failure: str) -> bool:
+        """Whether to try again after ``attempt`` failed with ``failure``."""
+        return (
+            failure != CANCELLED
+            and failure in self.retry_on
+            and attempt < self.max_attempts
+        )
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before the attempt following ``attempt``."""
+        return min(self.initial_delay * self.backoff ** (attempt - 1), self.max_delay)
+
+
+def classify_exception(error: BaseException) -> str:
+    """
+    Tell the failure class of an exception raised while running an activity.
+
+    :Example:
+
+    >>> classify_exception(ConnectionResetError())
+    'TRANSIENT'
+    >>> classify_exception(ValueError())
+    'PERMANENT'
+    """
+    # Imported here so that activities can import RetryPolicy cheaply.
+    import globus_sdk
+    import pika.exceptions
+    import requests
+
+    from zambeze.orchestration.data.https_transfer import HttpsTransferError
+    from zambeze.orchestration.data.transfer_coordinator import (
+        TransferCoordinatorError,
+    )
+    from zambeze.orchestration.data.transfer_hippo import (
+        InvalidTransferFilesError,
+        TransferHippoError,
+    )
+    from zambeze.orchestration.plugin_host import PluginHostError
+
+    if isinstance(error, InvalidTransferFilesError):
+        return PERMANENT
+    if isinstance(error, globus_sdk.GlobusAPIError):
+        if error.http_status == 429 or error.http_status >= 500:
+            return TRANSIENT
+        return PERMANENT
+    if isinstance(
+        error,
+        (
+            TransferHippoError,
+            HttpsTransferError,
+            TransferCoordinatorError,
+            PluginHostError,
+            globus_sdk.NetworkError,
+            pika.exceptions.AMQPConnectionError,
+            requests.ConnectionError,
+            requests.Timeout,
+            ConnectionError,
+            TimeoutError,
+        ),
+    ):
+        return TRANSIENT
+    return PERMANENT
@@ -0,0 +1,232 @@
+# Copyright (c) 2022 Oak Ridge National Laboratory.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License.
+
+import logging
+import threading
+import time
+from queue import Empty, Queue
+from typing import Optional
+
+from zambeze.orchestration.metrics import agent_metrics
+from zambeze.orchestration.retry import CANCELLED, TIMEOUT, TRANSIENT
+
+# Failed polls in a row after which a transfer activity is given up on.
+DEFAULT_MAX_POLL_ERRORS = 10
+# Cancellations of activities not seen yet that are remembered; every agent
+# receives every cancellation, mostly of activities it never runs.
+MAX_PENDING_CANCELS = 10000
+
+
+class TransferWatcher(threading.Thread):
+    """
+    Background thread that follows submitted transfer activities to completion.
+
+    The executor submits a transfer activity's TransferHippo and hands it to
+    the watcher instead of blocking on transfer_wait. The watcher polls all
+    watched hippos in rounds, sleeping ``initial_interval`` seconds between
+    rounds and backing off up to ``max_interval`` while nothing changes, and
+    puts each activity's SUCCEEDED or FAILED status on ``to_status_q`` once
+    its transfers have finished. Transfers still running when their timeout
+    passes or their activity is cancelled are cancelled and fail. A poll
+    that raises, e.g. on a network or Globus API hiccup, is retried at the
+    next round; the activity fails only after ``max_poll_errors`` failed
+    polls in a row, and its transfers are then cancelled. A watch may hand
+    failures to its own ``on_failure`` callable instead, for the executor to
+    retry the activity.
+
+    Attributes:
+        to_status_q (queue.Queue): Queue to send status messages.
+        watching (int): Number of activities currently being watched.
+    """
+
+    def __init__(
+        self,
+        to_status_q: Queue,
+        logger: Optional[logging.Logger] = None,
+        initial_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 2.0,
+        max_poll_errors: int = DEFAULT_MAX_POLL_ERRORS,
+    ) -> None:
+        super().__init__(name="TransferWatcher", daemon=True)
+        self._logger: logging.Logger = (
+            logging.getLogger(__name__) if logger is None else logger
+        )
+        self.to_status_q = to_status_q
+        self._initial_interval = initial_interval
+        self._max_interval = max_interval
+        self._backoff = backoff
+        self._max_poll_errors = max(1, max_poll_errors)
+
+        self._incoming = Queue()
+        # activity_id -> (TransferHippo, deadline or None, on_failure or None)
+        self._watched = {}
+        # activity_id -> failed polls in a row
+        self._poll_errors = {}
+        # Activities to cancel at the next round, oldest first.
+        self._cancelled = {}
+        self._cancel_lock = threading.Lock()
+
+    @property
+    def watching(self) -> int:
+        return len(self._watched) + self._incoming.qsize()
+
+    def watch(
+        self,
+        activity_id,
+        transfer_hippo,
+        timeout=-1,
+        on_failure=None,
+        on_finish=None,
+    ) -> None:
+        """
+        Follow the transfers ``transfer_hippo`` has started for an activity.
+
+        :param activity_id: Activity whose status is emitted on completion
+        :param transfer_hippo: A TransferHippo after start_transfer()
+        :param timeout: Seconds before unfinished transfers count as failed;
+            -1 waits forever
+        :param on_failure: Called as ``on_failure(status_msg, failure)`` with
+            the FAILED status and its failure class instead of putting the
+            status on ``to_status_q``
+        :param on_finish: Called as ``on_finish(activity_id)`` once the
+            transfers finished, whatever their outcome
+        """
+        deadline = None if timeout == -1 else time.monotonic() + timeout
+        self._incoming.put(
+            (activity_id, transfer_hippo, deadline, on_failure, on_finish)
+        )
+
+    def cancel(self, activity_id) -> None:
+        """Cancel the transfers of a watched activity."""
+        with self._cancel_lock:
+            self._cancelled[activity_id] = None
+            if len(self._cancelled) > MAX_PENDING_CANCELS:
+                del self._cancelled[next(iter(self._cancelled))]
+        # Wake the watcher up for a round.
+        self._incoming.put(False)
+
+    def stop(self) -> None:
+        self._incoming.put(None)
+
+    def run(self):
+        interval = self._initial_interval
+        while True:
+            try:
+                # Sleep until the next round, waking up early for new work.
+                item = self._incoming.get(timeout=interval if self._watched else None)
+            except Empty:
+                item = False
+
+            while item is not False:
+                if item is None:
+                    self._logger.info("[transfer-watcher] Stopping.")
+                    return
+                activity_id, *watched = item
+                self._watched[activity_id] = tuple(watched)
+                self._logger.debug(f"[transfer-watcher] Watching {activity_id}")
+                interval = self._initial_interval
+                try:
+                    item = self._incoming.get_nowait()
+                except Empty:
+                    item = False
+
+            if self._check_watched():
+                interval = self._initial_interval
+            else:
+                interval = min(interval * self._backoff, self._max_interval)
+
+    def _give_up(self, activity_id, transfer_hippo) -> None:
+        """
+        Stop the transfers of an activity the watcher no longer follows, and
+        fail the activities merged onto them, as a cancellation would.
+        """
+        try:
+            transfer_hippo.cancel()
+        except Exception as e:  # noqa: BLE001
+            self._logger.error(
+                f"[transfer-watcher] Unable to cancel the transfers of"
+                f" {activity_id}: {type(e).__name__}: {e}"
+            )
+        transfer_hippo.abandon_claims()
+
+    def _check_watched(self) -> bool:
+        """
+        Poll every watched hippo once.
+
+        :return: Whether any activity finished this round.
+        """
+        with self._cancel_lock:
+            cancelled = self._cancelled.keys() & self._watched.keys()
+            for activity_id in cancelled:
+                del self._cancelled[activity_id]
+
+        finished = []
+        for activity_id, (transfer_hippo, deadline, *_) in self._watched.items():
+            reason, failure = None, TRANSIENT
+            if activity_id in cancelled:
+                reason, failure = "ACTIVITY CANCELLED.", CANCELLED
+            elif deadline is not None and time.monotonic() >= deadline:
+                reason, failure = "ACTIVITY TIMED OUT.", TIMEOUT
+            try:
+                if reason is not None:
+                    # Poll one last time; whatever is left is cancelled.
+                    transfer_hippo.cancel()
+                    outcomes = transfer_hippo.transfer_wait(timeout=0)
+                else:
+                    outcomes = transfer_hippo.poll()
+            except Exception as e:  # noqa: BLE001
+                errors = self._poll_errors.get(activity_id, 0) + 1
+                self._poll_errors[activity_id] = errors
+                if reason is None and errors < self._max_poll_errors:
+                    self._logger.warning(
+                        f"[transfer-watcher] Unable to check {activity_id}"
+                        f" ({errors}/{self._max_poll_errors}):"
+                        f" {type(e).__name__}: {e}"
+                    )
+                    continue
+                self._logger.error(
+                    f"[transfer-watcher] Unable to check {activity_id}:"
+                    f" {type(e).__name__}: {e}"
+                )
+                if reason is None:
+                    self._give_up(activity_id, transfer_hippo)
+                outcomes = {"error": str(e)}
+            else:
+                self._poll_errors.pop(activity_id, None)
+
+            if outcomes is None:
+                continue
+
+            self._logger.info(
+                f"[transfer-watcher] Transfers of {activity_id} finished: {outcomes}"
+            )
+            if transfer_hippo.all_succeeded(outcomes):
+                status_msg = {
+                    "status": "SUCCEEDED",
+                    "activity_id": activity_id,
+                    "msg": "SUCCESSFULLY COMPLETED TASK.",
+                    "result": outcomes,
+                }
+            else:
+                status_msg = {
+                    "status": "FAILED",
+                    "activity_id": activity_id,
+                    "msg": reason or "FILE TRANSFER FAILED.",
+                    "details": outcomes,
+                }
+            finished.append((activity_id, status_msg, failure))
+
+        for activity_id, status_msg, failure in finished:
+            _, _, on_failure, on_finish = self._watched.pop(activity_id)
+            self._poll_errors.pop(activity_id, None)
+            if on_finish is not None:
+                on_finish(activity_id)
+            agent_metrics().stage(activity_id, "finished")
+            if status_msg["status"] == "FAILED" and on_failure is not None:
+                on_failure(status_msg, failure)
+            else:
+                self.to_status_q.put(status_msg)
+        return bool(finished)
@@ -14,7 +14,10 @@ from typing import Optional, Union
 
 from .config import HOST, RABBIT_HOST, RABBIT_PORT
 from .orchestration.plugins import Plugins
+from .orchestration.data.local_transfer import DEFAULT_LINK_POLICY
+from .orchestration.data.staging_cache import DEFAULT_CACHE_MAX_BYTES
 from .orchestration.db.dao.dao_utils import create_local_db
+from .orchestration.result_cache import DEFAULT_RESULT_CACHE_MAX_BYTES
 
 
 class ZambezeSettings:
@@ -97,6 +100,54 @@ class ZambezeSettings:
             os.path.expanduser("~"),
             self.settings["plugins"]["All"],
         )
+        self.__set_default(
+            "staging_cache",
+            {
+                "enabled": True,
+                "directory": str(zambeze_folder.joinpath("staging_cache")),
+                "max_bytes": DEFAULT_CACHE_MAX_BYTES,
+            },
+            self.settings,
+        )
+        self.__set_default(
+            "local_staging",
+            {"link_policy": DEFAULT_LINK_POLICY, "workers": 4},
+            self.settings,
+        )
+        self.__set_default("https_staging", {"workers": 4, "retries": 3}, self.settings)
+        # Shell activities opt in to reusing past results with cache=True.
+        self.__set_default(
+            "result_cache",
+            {
+                "enabled": True,
+                "directory": str(zambeze_folder.joinpath("result_cache")),
+                "max_bytes": DEFAULT_RESULT_CACHE_MAX_BYTES,
+            },
+            self.settings,
+        )
+        # Plugins run in the agent's executor threads unless enabled.
+        self.__set_default(
+            "plugin_host",
+            {
+                "enabled": False,
+                "size": 4,
+                "max_tasks": 0,
+                "max_memory": None,
+                "health_interval": 30.0,
+            },
+            self.settings,
+        )
+        # Prometheus text on http://127.0.0.1:9464/metrics, or on a Unix
+        # socket given as unix_socket, once enabled.
+        self.__set_default(
+            "metrics",
+            {"enabled": False, "host": "127.0.0.1", "port": 9464},
+            self.settings,
+        )
+        # None lets the executor detect the node's CPUs and memory.
+        self.__set_default(
+            "resources", {"cpus": None, "memory": None, "gpus": 0}, self.settings
+        )
         self.__save()
 
         create_local_db()
@@ -114,7 +165,7 @@ class ZambezeSettings:
                 self._logger.info(f"Configuring Plugin: {plugin_name}")
                 config[plugin_name] = self.settings["plugins"][plugin_name]["config"]
 
-        self.plugins.configure(config=config)
+        self.plugins.configure(config=config, host=self.settings["plugin_host"])
 
     def get_zmq_connection_uri(self) -> str:
         """
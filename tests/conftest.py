@@ -0,0 +1,13 @@
+import os
+import shutil
+import tempfile
+
+# Keep the local agent database of test runs out of the source tree; it is
+# opened when zambeze is imported, so this has to happen before any test
+# module is collected.
+_DB_DIR = tempfile.mkdtemp(prefix="zambeze-db-")
+os.environ.setdefault("ZAMBEZE_DB_FILE", os.path.join(_DB_DIR, "zambeze.db"))
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
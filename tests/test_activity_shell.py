@@ -1,8 +1,10 @@
 # Local imports
-from zambeze import ShellActivity
+from zambeze import RetryPolicy, ShellActivity
+from zambeze.campaign.shell_activity import ShellActivityRecord
 from zambeze.identity import valid_uuid
 
 # Standard imports
+import dill
 import re
 import pytest
 import logging
@@ -74,3 +76,29 @@ def test_shell_activity_attributes():
     assert activity.command == "convert"
     assert len(activity.arguments) == 6
     assert "PATH" in activity.env_vars
+
+
+@pytest.mark.unit
+def test_shell_activity_record_is_lean():
+    activity = ShellActivity(
+        name="Echo",
+        files=["file:///tmp/input.txt"],
+        command="echo",
+        arguments="-n hello world",
+        logger=logging.getLogger(__name__),
+        env_vars={"NAME": "zambeze"},
+        campaign_id=str(uuid.uuid4()),
+        retry=RetryPolicy(max_attempts=3),
+        shell=True,
+    )
+    record = activity.to_record()
+
+    assert isinstance(record, ShellActivityRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.type == "SHELL"
+    assert record.activity_id == activity.activity_id
+    assert record.plugin_args == activity.plugin_args
+
+    # What the agent receives round-trips and is a lot smaller.
+    assert dill.loads(dill.dumps(record)) == record
+    assert len(dill.dumps(record)) < 0.6 * len(dill.dumps(activity))
@@ -1,12 +1,21 @@
 # Local imports
 from zambeze import ShellActivity
 from zambeze import Campaign
+from zambeze import settings
 from zambeze.identity import valid_uuid
+from zambeze.orchestration import queue_rmq
 
 # Standard imports
+import dill
 import pytest
 import logging
 import pathlib
+import threading
+import time
+import uuid
+
+from queue import Queue
+from types import SimpleNamespace
 
 
 @pytest.mark.unit
@@ -34,3 +43,92 @@ def test_campaign():
     campaign.add_activity(activity)
     assert valid_uuid(campaign.activities[0].campaign_id)
     assert campaign.activities[0].campaign_id == campaign.campaign_id
+
+
+class FakeBroker:
+    """In-memory stand-in for RabbitMQ queues and fanout exchanges."""
+
+    def __init__(self):
+        self.queues = {}
+        self.bindings = {}
+        self.lock = threading.Lock()
+
+    def connection(self, parameters):
+        return SimpleNamespace(
+            channel=lambda: FakeChannel(self), is_open=True, close=lambda: None
+        )
+
+
+class FakeChannel:
+    def __init__(self, broker):
+        self._broker = broker
+        self._consumers = []
+
+    def queue_declare(self, queue, exclusive=False):
+        with self._broker.lock:
+            queue = queue or f"amq.gen-{uuid.uuid4()}"
+            self._broker.queues.setdefault(queue, Queue())
+        return SimpleNamespace(method=SimpleNamespace(queue=queue))
+
+    def exchange_declare(self, exchange, exchange_type):
+        with self._broker.lock:
+            self._broker.bindings.setdefault(exchange, [])
+
+    def queue_bind(self, exchange, queue):
+        with self._broker.lock:
+            self._broker.bindings[exchange].append(queue)
+
+    def basic_publish(self, exchange, routing_key, body):
+        with self._broker.lock:
+            queues = self._broker.bindings[exchange] if exchange else [routing_key]
+            for queue in queues:
+                self._broker.queues[queue].put(body)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack):
+        self._consumers.append((queue, on_message_callback))
+
+    def start_consuming(self):
+        queue, callback = self._consumers[0]
+        while True:
+            callback(self, None, None, self._broker.queues[queue].get())
+
+
+@pytest.mark.unit
+def test_campaign_cancel_reaches_every_agent(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(queue_rmq.pika, "BlockingConnection", broker.connection)
+    monkeypatch.setattr(
+        settings,
+        "ZambezeSettings",
+        lambda: SimpleNamespace(settings={"rmq": {"host": "broker", "port": 5672}}),
+    )
+    logger = logging.getLogger(__name__)
+
+    # Two agents listening for cancellations.
+    received = [Queue(), Queue()]
+    for inbox in received:
+        client = queue_rmq.QueueRMQ({"ip": "broker", "port": 5672}, logger=logger)
+        client.connect()
+        threading.Thread(
+            target=client.listen_to_broadcasts,
+            args=(
+                lambda _1, _2, _3, body, inbox=inbox: inbox.put(dill.loads(body)),
+                queue_rmq.CANCEL_EXCHANGE,
+            ),
+            daemon=True,
+        ).start()
+    deadline = time.monotonic() + 5
+    while len(broker.bindings.get(queue_rmq.CANCEL_EXCHANGE, [])) < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    activity = ShellActivity(name="Sleep", files=[], command="sleep", arguments="60")
+    campaign = Campaign("Cancelled", activities=[activity], logger=logger)
+    campaign.cancel()
+
+    for inbox in received:
+        message = inbox.get(timeout=5)
+        assert message["status"] == "CANCEL"
+        assert message["activity_id"] == activity.activity_id
+    # Nothing goes to the CONTROL queue, which only one agent would consume.
+    assert broker.queues["CONTROL"].empty()
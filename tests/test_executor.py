@@ -0,0 +1,263 @@
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from zambeze import RetryPolicy, ShellActivity
+from zambeze.orchestration import executor as executor_module
+from zambeze.orchestration.data.transfer_hippo import (
+    InvalidTransferFilesError,
+    TransferHippoError,
+)
+from zambeze.orchestration.db.dao.activity_result_dao import ActivityResultDAO
+from zambeze.orchestration.db.dao.dao_utils import create_local_db
+from zambeze.orchestration.executor import Executor
+from zambeze.orchestration.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def executor(tmp_path):
+    settings = SimpleNamespace(
+        settings={"plugins": {"All": {"default_working_directory": str(tmp_path)}}}
+    )
+    return Executor(settings=settings, logger=logger, agent_id="agent")
+
+
+def _dag_msg(files, retry=None):
+    activity = ShellActivity(
+        name="cat", files=files, command="cat", arguments="input.txt", retry=retry
+    )
+    return activity.activity_id, {
+        "activity": activity.to_record(),
+        "transfer_tokens": {},
+    }
+
+
+@pytest.mark.unit
+def test_executor_prefetch_stages_ahead_of_execution(executor, monkeypatch):
+    staged = threading.Event()
+    calls = []
+
+    def fake_stage_files(files, tokens=None):
+        calls.append(files)
+        staged.set()
+
+    monkeypatch.setattr(executor, "_stage_files", fake_stage_files)
+
+    activity_id, node = _dag_msg(["globus://ep/input.txt"])
+    executor.prefetch((activity_id, node))
+    assert staged.wait(5)
+
+    # When the activity runs, the finished prefetch is used instead of a new
+    # staging.
+    executor._Executor__process_files(node["activity"].files, None, activity_id)
+    assert calls == [["globus://ep/input.txt"]]
+
+
+@pytest.mark.unit
+def test_executor_restages_after_failed_prefetch(executor, monkeypatch):
+    calls = []
+
+    def flaky_stage_files(files, tokens=None):
+        calls.append(files)
+        if len(calls) == 1:
+            raise RuntimeError("endpoint unavailable")
+
+    monkeypatch.setattr(executor, "_stage_files", flaky_stage_files)
+
+    activity_id, node = _dag_msg(["globus://ep/input.txt"])
+    executor.prefetch((activity_id, node))
+    executor._Executor__process_files(node["activity"].files, None, activity_id)
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_executor_discards_prefetch_of_dropped_activity(
+    executor, monkeypatch, tmp_path
+):
+    def fake_stage_files(files, tokens=None):
+        (tmp_path / "input.txt").write_text("zambeze")
+
+    monkeypatch.setattr(executor, "_stage_files", fake_stage_files)
+
+    activity_id, node = _dag_msg(["globus://ep/data/input.txt"])
+    executor.prefetch((activity_id, node))
+    future, _ = executor._prefetched[activity_id]
+    future.result(5)
+
+    executor._discard_prefetch(activity_id)
+    assert executor._prefetched == {}
+    assert not (tmp_path / "input.txt").exists()
+
+
+@pytest.mark.unit
+def test_executor_keeps_prefetched_inputs_of_running_activity(
+    executor, monkeypatch, tmp_path
+):
+    def fake_stage_files(files, tokens=None):
+        (tmp_path / "input.txt").write_text("zambeze")
+
+    monkeypatch.setattr(executor, "_stage_files", fake_stage_files)
+
+    running_id, running = _dag_msg(["globus://ep/data/input.txt"])
+    queued_id, queued = _dag_msg(["globus://ep/data/input.txt"])
+    executor.prefetch((running_id, running))
+    executor.prefetch((queued_id, queued))
+    executor._prefetched[queued_id][0].result(5)
+    # The first activity consumed its prefetch and is running.
+    executor._Executor__process_files(running["activity"].files, None, running_id)
+
+    executor._discard_prefetch(queued_id)
+    assert (tmp_path / "input.txt").read_text() == "zambeze"
+
+    # Dropped once no unfinished activity needs it.
+    executor.prefetch((queued_id, queued))
+    executor._prefetched[queued_id][0].result(5)
+    executor._staged_inputs.pop(running_id)
+    executor._discard_prefetch(queued_id)
+    assert not (tmp_path / "input.txt").exists()
+
+
+@pytest.mark.unit
+def test_executor_refuses_inputs_of_the_same_name(executor, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        executor, "_stage_files", lambda files, tokens=None: calls.append(files)
+    )
+
+    first_id, first = _dag_msg(["globus://ep/a/input.txt"])
+    second_id, second = _dag_msg(["globus://ep/b/input.txt"])
+    executor._Executor__process_files(first["activity"].files, None, first_id)
+
+    # Would replace the input of the first activity while it runs.
+    executor.prefetch((second_id, second))
+    assert second_id not in executor._prefetched
+    with pytest.raises(TransferHippoError):
+        executor._Executor__process_files(second["activity"].files, None, second_id)
+    assert calls == [["globus://ep/a/input.txt"]]
+
+
+@pytest.mark.unit
+def test_executor_fails_staging_of_invalid_files(executor):
+    with pytest.raises(InvalidTransferFilesError):
+        executor._stage_files(["ftp://server/input.txt"])
+
+
+@pytest.mark.unit
+def test_executor_prefetch_skips_control_nodes(executor, monkeypatch):
+    monkeypatch.setattr(executor, "_stage_files", pytest.fail)
+    executor.prefetch(("MONITOR", {"activity": "MONITOR"}))
+    executor.prefetch(_dag_msg([]))
+    assert executor._prefetched == {}
+
+
+@pytest.mark.unit
+def test_executor_runs_admitted_shell_activity(executor):
+    runs = []
+
+    def fake_run(activity, arguments):
+        runs.append(arguments)
+        return [{"returncode": 1, "stderr_tail": "boom"}]
+
+    executor._settings.plugins = SimpleNamespace(run=fake_run)
+    activity_id, node = _dag_msg([])
+    ledger = executor._resource_ledger
+    allocation = ledger.acquire(activity_id, ledger.request_for(node["activity"]))
+
+    executor._run_shell_activity((activity_id, node), allocation)
+
+    assert runs[0]["limits"]["cpu_ids"] == allocation.cpu_ids
+    assert ledger.available["cpus"] == ledger.cpus
+    status = executor.to_status_q.get_nowait()
+    assert status["status"] == "FAILED"
+    assert status["details"][0]["stderr_tail"] == "boom"
+
+
+@pytest.mark.unit
+def test_executor_retries_transient_failures(executor):
+    def fake_run(activity, arguments):
+        raise ConnectionResetError("broker went away")
+
+    executor._settings.plugins = SimpleNamespace(run=fake_run)
+    dag_msg = _dag_msg([], retry=RetryPolicy(max_attempts=2, initial_delay=0))
+    ledger = executor._resource_ledger
+
+    # The first attempt is put back on the ACTIVITIES queue without a status.
+    allocation = ledger.acquire(dag_msg[0], ledger.request_for(dag_msg[1]["activity"]))
+    executor._run_shell_activity(dag_msg, allocation)
+    assert executor.to_new_activity_q.get(timeout=5) is dag_msg
+    assert executor.to_status_q.empty()
+
+    # The last attempt fails the activity.
+    allocation = ledger.acquire(dag_msg[0], ledger.request_for(dag_msg[1]["activity"]))
+    executor._run_shell_activity(dag_msg, allocation)
+    status = executor.to_status_q.get_nowait()
+    assert status["status"] == "FAILED"
+    assert (status["failure"], status["attempts"]) == ("TRANSIENT", 2)
+
+
+@pytest.mark.unit
+def test_executor_bounds_cancel_events(executor, monkeypatch):
+    monkeypatch.setattr(executor_module, "MAX_PENDING_CANCELS", 2)
+    running = executor._cancel_event("running")
+
+    # Checking an activity that was not cancelled remembers nothing.
+    assert not executor._cancelled("queued")
+    for activity_id in ["a", "b"]:
+        executor.cancel(activity_id)
+
+    # The oldest event goes first, whether it is set or not.
+    assert list(executor._cancel_events) == ["a", "b"]
+    assert not running.is_set()
+    assert executor._cancelled("b")
+
+    # A failed activity forgets its event.
+    dag_msg = _dag_msg([])
+    executor.cancel(dag_msg[0])
+    executor._fail(dag_msg, {"status": "FAILED"}, "CANCELLED")
+    assert list(executor._cancel_events) == ["b"]
+
+
+@pytest.mark.unit
+def test_executor_reuses_cached_results(executor, tmp_path):
+    create_local_db()
+    executor._result_cache = ResultCache(
+        tmp_path / "results", ActivityResultDAO(logger), logger=logger
+    )
+    runs = []
+
+    def fake_run(activity, arguments):
+        runs.append(activity)
+        (tmp_path / "output.txt").write_text("done")
+        return [{"returncode": 0}]
+
+    executor._settings.plugins = SimpleNamespace(run=fake_run)
+    ledger = executor._resource_ledger
+
+    def run_activity():
+        activity = ShellActivity(
+            name="cat",
+            files=[],
+            command="cat",
+            arguments=str(tmp_path),
+            cache=True,
+            outputs=["output.txt"],
+        )
+        dag_msg = (activity.activity_id, {"activity": activity})
+        cache_key = executor._result_cache_key(activity)
+        if not executor._restore_result(dag_msg, cache_key):
+            allocation = ledger.acquire(dag_msg[0], ledger.request_for(activity))
+            executor._run_shell_activity(dag_msg, allocation, cache_key)
+        return executor.to_status_q.get_nowait()
+
+    assert run_activity()["msg"] == "SUCCESSFULLY COMPLETED TASK."
+    (tmp_path / "output.txt").unlink()
+
+    status = run_activity()
+    assert status["msg"] == "RESTORED CACHED RESULT."
+    assert status["result"] == [{"returncode": 0}]
+    assert (tmp_path / "output.txt").read_text() == "done"
+    assert len(runs) == 1
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+
+from zambeze.orchestration.data.transfer.globus.globus_common import (
+    check_sync_level,
+    group_items_by_endpoints,
+)
+
+EP_A = str(uuid.uuid4())
+EP_B = str(uuid.uuid4())
+EP_C = str(uuid.uuid4())
+
+
+def _separate(uri):
+    uuid_, _, path = uri.removeprefix("globus://").partition("/")
+    directory, _, file_name = ("/" + path).rpartition("/")
+    return {"uuid": uuid_, "path": directory + "/", "file_name": file_name}
+
+
+@pytest.mark.unit
+def test_group_items_by_endpoints():
+    items = [
+        {
+            "source": f"globus://{EP_A}/in/f{i}.txt",
+            "destination": f"globus://{EP_B}/out/f{i}.txt",
+        }
+        for i in range(1000)
+    ]
+    items.append(
+        {
+            "source": f"globus://{EP_C}/in/x.txt",
+            "destination": f"globus://{EP_B}/out/x.txt",
+        }
+    )
+
+    groups = group_items_by_endpoints(items, _separate)
+
+    assert list(groups) == [(EP_A, EP_B), (EP_C, EP_B)]
+    assert len(groups[(EP_A, EP_B)]) == 1000
+    assert groups[(EP_A, EP_B)][1] == ("/in/f1.txt", "/out/f1.txt")
+    assert groups[(EP_C, EP_B)] == [("/in/x.txt", "/out/x.txt")]
+
+
+@pytest.mark.unit
+def test_check_sync_level():
+    assert check_sync_level({})[0]
+    assert check_sync_level({"sync_level": "mtime"})[0]
+    assert not check_sync_level({"sync_level": "sometimes"})[0]
@@ -0,0 +1,232 @@
+import hashlib
+import http.server
+import logging
+import os
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from zambeze.orchestration.data.https_transfer import (
+    HttpsDownloader,
+    HttpsTransferError,
+    parse_checksum,
+)
+from zambeze.orchestration.data.transfer_hippo import TransferHippo
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD = os.urandom(100_000)
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves PAYLOAD, honoring Range requests; fails ``failures`` GETs first."""
+
+    failures = 0
+    ranged_gets = 0
+    reject_head = False
+
+    def do_HEAD(self):
+        if type(self).reject_head:
+            self.send_error(405)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"payload"')
+        self.end_headers()
+
+    def do_GET(self):
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            self.send_error(503)
+            return
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range != '"payload"':
+            range_header = None
+        if range_header is None:
+            body = PAYLOAD
+            self.send_response(200)
+        else:
+            type(self).ranged_gets += 1
+            start, end = range_header.split("=", 1)[1].split("-")
+            if int(start) >= len(PAYLOAD):
+                self.send_error(416)
+                return
+            end = int(end) if end else len(PAYLOAD) - 1
+            body = PAYLOAD[int(start) : end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        self.send_header("ETag", '"payload"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    RangeHandler.failures = 0
+    RangeHandler.ranged_gets = 0
+    RangeHandler.reject_head = False
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/data/payload.bin"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+def test_parse_checksum():
+    assert parse_checksum("sha256=ABCD") == ("sha256", "abcd")
+    assert parse_checksum("") is None
+    with pytest.raises(HttpsTransferError):
+        parse_checksum("nosuchhash=abcd")
+
+
+@pytest.mark.unit
+def test_https_downloader_ranged_with_retry(server_url, tmp_path):
+    RangeHandler.failures = 1
+    downloader = HttpsDownloader(
+        workers=4, range_size=16_384, parallel_threshold=1, logger=logger
+    )
+    checksum = ("sha256", hashlib.sha256(PAYLOAD).hexdigest())
+
+    result = downloader.download(server_url, tmp_path / "payload.bin", checksum)
+    downloader.close()
+
+    assert result.ranged
+    assert result.checksum_verified
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
+    # Seven ranges, one of them retried after the injected failure.
+    assert RangeHandler.ranged_gets == 7
+    assert os.listdir(tmp_path) == ["payload.bin"]
+
+
+@pytest.mark.unit
+def test_https_downloader_resumes_recorded_ranges(server_url, tmp_path):
+    destination = str(tmp_path / "payload.bin")
+    downloader = HttpsDownloader(range_size=16_384, parallel_threshold=1)
+
+    # A previous attempt already fetched the first two ranges.
+    with open(destination + ".part", "wb") as part:
+        part.write(PAYLOAD[:32_768])
+        part.truncate(len(PAYLOAD))
+    downloader._save_state(
+        destination + ".part.json", len(PAYLOAD), '"payload"', {0, 16_384}
+    )
+
+    downloader.download(server_url, destination)
+    downloader.close()
+
+    assert RangeHandler.ranged_gets == 5
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
+
+
+@pytest.mark.unit
+def test_https_downloader_probes_without_head(server_url, tmp_path):
+    RangeHandler.reject_head = True
+    downloader = HttpsDownloader(
+        workers=4, range_size=16_384, parallel_threshold=1, logger=logger
+    )
+
+    result = downloader.download(server_url, tmp_path / "payload.bin")
+    downloader.close()
+
+    # The one byte probe tells the size and that ranges are accepted.
+    assert result.ranged
+    assert RangeHandler.ranged_gets == 1 + 7
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
+
+
+@pytest.mark.unit
+def test_https_downloader_resumes_stream_of_earlier_download(server_url, tmp_path):
+    destination = str(tmp_path / "payload.bin")
+    downloader = HttpsDownloader(logger=logger)
+
+    # An earlier download, e.g. before the agent restarted, got this far.
+    with open(destination + ".part", "wb") as part:
+        part.write(PAYLOAD[:40_000])
+    downloader._save_state(
+        destination + ".part.json", len(PAYLOAD), '"payload"', mode="stream"
+    )
+
+    result = downloader.download(server_url, destination)
+    downloader.close()
+
+    assert not result.ranged
+    assert RangeHandler.ranged_gets == 1
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
+    assert os.listdir(tmp_path) == ["payload.bin"]
+
+
+@pytest.mark.unit
+def test_https_downloader_finishes_complete_stream(server_url, tmp_path):
+    destination = str(tmp_path / "payload.bin")
+    downloader = HttpsDownloader(logger=logger)
+
+    # An earlier download wrote everything but stopped before renaming it.
+    with open(destination + ".part", "wb") as part:
+        part.write(PAYLOAD)
+    downloader._save_state(
+        destination + ".part.json", len(PAYLOAD), '"payload"', mode="stream"
+    )
+
+    downloader.download(server_url, destination)
+    downloader.close()
+
+    assert RangeHandler.ranged_gets == 1
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
+    assert os.listdir(tmp_path) == ["payload.bin"]
+
+
+@pytest.mark.unit
+def test_https_downloader_resumes_only_validated_objects(tmp_path):
+    part_path = str(tmp_path / "payload.bin.part")
+    state_path = str(tmp_path / "payload.bin.part.json")
+    with open(part_path, "wb") as part:
+        part.truncate(len(PAYLOAD))
+    size = len(PAYLOAD)
+
+    # Nothing tells whether the object changed since; start over.
+    HttpsDownloader._save_state(state_path, size, None, {0})
+    assert HttpsDownloader._load_state(state_path, part_path, size, None) == set()
+
+    HttpsDownloader._save_state(state_path, size, '"payload"', {0})
+    assert HttpsDownloader._load_state(state_path, part_path, size, '"payload"') == {0}
+
+
+@pytest.mark.unit
+def test_https_downloader_rejects_bad_checksum(server_url, tmp_path):
+    downloader = HttpsDownloader(logger=logger)
+    with pytest.raises(HttpsTransferError):
+        downloader.download(server_url, tmp_path / "payload.bin", ("md5", "0" * 32))
+    downloader.close()
+
+    assert not (tmp_path / "payload.bin").exists()
+
+
+@pytest.mark.unit
+def test_transfer_hippo_downloads_https_files(server_url, tmp_path):
+    hippo = TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=SimpleNamespace(settings={"plugins": {}}),
+        logger=logger,
+        dest_dir=str(tmp_path),
+    )
+    digest = hashlib.sha256(PAYLOAD).hexdigest()
+    hippo.load([f"{server_url}#sha256={digest}"])
+
+    assert hippo.validate()
+    hippo.start_transfer()
+    outcomes = hippo.transfer_wait()
+
+    assert outcomes == {server_url: "SUCCEEDED"}
+    assert hippo.globus_transfer_client is None
+    assert (tmp_path / "payload.bin").read_bytes() == PAYLOAD
@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies a driver script defining a campaign must not pay for.
+DEFERRED_MODULES = [
+    "dill",
+    "globus_sdk",
+    "networkx",
+    "pika",
+    "requests",
+    "sqlalchemy",
+    "zmq",
+    "zambeze.orchestration.message.message_factory",
+    "zambeze.settings",
+]
+# Generous bound on `import zambeze` with its public names, in microseconds;
+# it used to take about 800 ms.
+IMPORT_BUDGET_US = 150_000
+
+DRIVER = f"""
+import json, sys
+from zambeze import Campaign, RetryPolicy, ShellActivity, TransferActivity
+
+activity = ShellActivity(name="echo", files=[], command="echo", arguments="hi")
+Campaign("import-time", activities=[activity])
+print(json.dumps([name for name in {DEFERRED_MODULES!r} if name in sys.modules]))
+"""
+
+
+def _import_us(stderr: str) -> int:
+    """Cumulative time of the zambeze imports in -X importtime output."""
+    total = 0
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        # Nested imports are indented and already counted by their parent.
+        if len(fields) == 3 and fields[2].startswith(" zambeze"):
+            total += int(fields[1])
+    return total
+
+
+@pytest.mark.unit
+def test_import_zambeze_defers_heavy_dependencies():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", DRIVER],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert json.loads(result.stdout) == []
+    assert _import_us(result.stderr) < IMPORT_BUDGET_US
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from zambeze.orchestration.data import local_transfer
+from zambeze.orchestration.data.local_transfer import (
+    LocalTransferError,
+    stage_local_file,
+)
+
+
+def _write(path, size):
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+@pytest.mark.unit
+def test_stage_local_file_copies(tmp_path):
+    source = _write(tmp_path / "source.bin", 4096)
+    dest = tmp_path / "dest.bin"
+
+    result = stage_local_file(source, dest)
+
+    assert dest.read_bytes() == source.read_bytes()
+    assert os.stat(dest).st_ino != os.stat(source).st_ino
+    assert result.bytes == 4096
+    assert result.method in ["reflink", "copy_file_range", "sendfile", "copy"]
+    assert result.bytes_per_second > 0
+
+
+@pytest.mark.unit
+def test_stage_local_file_parallel_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_transfer, "CHUNK_SIZE", 4096)
+    size = 2 * 4096 + 123
+    source = _write(tmp_path / "large.bin", size)
+    dest = tmp_path / "large_copy.bin"
+
+    result = stage_local_file(source, dest, workers=3, parallel_threshold=1)
+
+    assert result.bytes == size
+    assert dest.stat().st_size == size
+    assert dest.read_bytes() == source.read_bytes()
+
+
+@pytest.mark.unit
+def test_stage_local_file_links(tmp_path):
+    source = _write(tmp_path / "source.bin", 10)
+
+    hardlink = stage_local_file(source, tmp_path / "hard", link_policy="hardlink")
+    assert hardlink.method == "hardlink"
+    assert os.stat(tmp_path / "hard").st_ino == os.stat(source).st_ino
+
+    symlink = stage_local_file(source, tmp_path / "soft", link_policy="symlink")
+    assert symlink.method == "symlink"
+    assert os.readlink(tmp_path / "soft") == str(source)
+
+    # Staging a file onto itself is a no-op.
+    assert stage_local_file(source, source).method == "none"
+
+
+@pytest.mark.unit
+def test_stage_local_file_replaces_destination_atomically(tmp_path):
+    source = _write(tmp_path / "source.bin", 10)
+    dest = _write(tmp_path / "dest.bin", 20)
+
+    with open(dest, "rb") as reader:
+        stage_local_file(source, dest)
+        # A process reading the earlier file still sees all of it.
+        assert len(reader.read()) == 20
+
+    assert dest.read_bytes() == source.read_bytes()
+    assert sorted(os.listdir(tmp_path)) == ["dest.bin", "source.bin"]
+
+
+@pytest.mark.unit
+def test_stage_local_file_errors(tmp_path):
+    with pytest.raises(LocalTransferError):
+        stage_local_file(tmp_path / "missing", tmp_path / "dest")
+
+    source = _write(tmp_path / "source.bin", 10)
+    with pytest.raises(LocalTransferError):
+        stage_local_file(source, tmp_path / "dest", link_policy="teleport")
@@ -0,0 +1,73 @@
+import logging
+import time
+import uuid
+
+import pytest
+
+from zambeze.identity import valid_uuid
+from zambeze.orchestration.message.activity_message.message_activity import (
+    MessageActivity,
+)
+from zambeze.orchestration.message.message_factory import (
+    MessageFactory,
+    message_validator,
+)
+from zambeze.orchestration.zambeze_types import ActivityType, MessageType
+
+
+def _shell_template(factory, **attributes):
+    template = factory.create_template(
+        MessageType.ACTIVITY, ActivityType.SHELL, {"shell": "bash"}
+    )
+    message = template[1]
+    message.origin_agent_id = str(uuid.uuid4())
+    message.running_agent_ids = []
+    message.activity_id = str(uuid.uuid4())
+    message.campaign_id = str(uuid.uuid4())
+    message.credential = {}
+    message.submission_time = str(int(time.time()))
+    message.body.shell = "bash"
+    message.body.files = []
+    message.body.parameters.program = "echo"
+    message.body.parameters.args = ["hello"]
+    message.body.parameters.env_vars = {}
+    for name, value in attributes.items():
+        setattr(message, name, value)
+    return template
+
+
+@pytest.mark.unit
+def test_valid_uuid_accepts_only_canonical_uuids():
+    value = str(uuid.uuid4())
+    assert valid_uuid(value, 4)
+    assert valid_uuid(value.upper(), 4)
+    assert not valid_uuid(value, 1)
+    assert valid_uuid(str(uuid.uuid1()))
+    assert not valid_uuid(uuid.uuid4().hex)
+    assert not valid_uuid(f"{{{value}}}")
+    assert not valid_uuid(value + "\n")
+
+
+@pytest.mark.unit
+def test_message_factory_creates_many_messages(capsys):
+    factory = MessageFactory(logging.getLogger(__name__))
+    assert message_validator(MessageType.ACTIVITY) is message_validator(
+        MessageType.ACTIVITY
+    )
+
+    messages = factory.create_many(_shell_template(factory) for _ in range(3))
+    assert len(messages) == 3
+    assert all(isinstance(message, MessageActivity) for message in messages)
+    # Validation does not write to stdout.
+    assert capsys.readouterr().out == ""
+
+    templates = [
+        _shell_template(factory),
+        _shell_template(factory, campaign_id="campaign"),
+        _shell_template(factory, origin_agent_id=str(uuid.uuid1())),
+    ]
+    with pytest.raises(Exception) as error:
+        factory.create_many(templates)
+    assert "2 of 3 messages are invalid" in str(error.value)
+    assert "1: Invalid activity message: Required campaign_id" in str(error.value)
+    assert "2: Invalid activity message: Required origin_agent_id" in str(error.value)
@@ -1,6 +1,7 @@
 import pytest
 from zambeze import Campaign, ShellActivity
 from zambeze.campaign.dag import DAG
+from zambeze.campaign.shell_activity import ShellActivityRecord
 
 
 @pytest.mark.unit
@@ -91,7 +92,7 @@ def test_message_creation_from_campaign():  # noqa: C901
         monitor_node[1]["activity"], str
     )  # monitor and terminator are string
     assert isinstance(terminator_node[1]["activity"], str)
-    assert isinstance(activity_node[1]["activity"], ShellActivity)
+    assert isinstance(activity_node[1]["activity"], ShellActivityRecord)
     assert "transfer_tokens" in activity_node[1]
     assert "transfer_params" in activity_node[1]
 
@@ -150,8 +151,9 @@ def test_message_creation_from_campaign():  # noqa: C901
     for node in deserialized_nodes:
         if node[0] == held_activity_id:
             found_activity_node = True
+            activity_node = node
             activity = node[1]["activity"]
-            assert isinstance(activity, ShellActivity)
+            assert isinstance(activity, ShellActivityRecord)
             # assert activity.command == "convert"
             assert activity.type == "SHELL"
             assert activity.campaign_id is not None
@@ -164,8 +166,10 @@ def test_message_creation_from_campaign():  # noqa: C901
     if not found_activity_node:
         raise ValueError("ACTIVITY NODE NOT FOUND!")
 
-    # Now let's assume we have some sort of result to pack into activity.
-    activity.result = {"foo": "magoo"}
+    # Records are slotted, so a result is packed next to the activity.
+    with pytest.raises(AttributeError):
+        activity.result = {"foo": "magoo"}
+    activity_node[1]["result"] = {"foo": "magoo"}
 
     """ PHASE 6: ensure that the result is present. """
-    assert isinstance(activity.result, dict)
+    assert isinstance(activity_node[1]["result"], dict)
@@ -0,0 +1,110 @@
+import socket
+from queue import Queue
+from urllib.request import urlopen
+
+import pytest
+
+from zambeze.orchestration.data.transfer_metrics import TransferMetrics, TransferRecord
+from zambeze.orchestration.metrics import (
+    AgentMetrics,
+    MetricsServer,
+    transfer_metric_families,
+)
+
+
+@pytest.mark.unit
+def test_agent_metrics_render_prometheus_text():
+    metrics = AgentMetrics(buckets=(0.1, 1))
+    queue = Queue()
+    queue.put("activity")
+    metrics.gauge("zambeze_queue_depth", queue.qsize, queue="to_process_q")
+    metrics.inc("zambeze_rmq_reconnects_total")
+    metrics.inc("zambeze_rmq_reconnects_total")
+    metrics.observe("zambeze_activity_stage_seconds", 0.05, to_stage="acked")
+    metrics.observe("zambeze_activity_stage_seconds", 0.5, to_stage="acked")
+    metrics.observe("zambeze_activity_stage_seconds", 5, to_stage="acked")
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE zambeze_queue_depth gauge" in lines
+    assert 'zambeze_queue_depth{queue="to_process_q"} 1' in lines
+    assert "zambeze_rmq_reconnects_total 2" in lines
+    assert "# TYPE zambeze_activity_stage_seconds histogram" in lines
+    # Buckets are cumulative.
+    assert 'zambeze_activity_stage_seconds_bucket{to_stage="acked",le="0.1"} 1' in lines
+    assert 'zambeze_activity_stage_seconds_bucket{to_stage="acked",le="1"} 2' in lines
+    assert (
+        'zambeze_activity_stage_seconds_bucket{to_stage="acked",le="+Inf"} 3' in lines
+    )
+    assert 'zambeze_activity_stage_seconds_count{to_stage="acked"} 3' in lines
+
+
+@pytest.mark.unit
+def test_agent_metrics_follow_activity_stages():
+    metrics = AgentMetrics()
+    metrics.stage("activity", "received")
+    metrics.stage("activity", "acked")
+    metrics.stage("activity", "published")
+    # Nothing is followed after publishing.
+    metrics.stage("activity", "published")
+
+    text = metrics.render()
+    assert (
+        'zambeze_activity_stage_seconds_count{from_stage="received",to_stage="acked"} 1'
+        in text
+    )
+    assert (
+        'zambeze_activity_stage_seconds_count{from_stage="acked",to_stage="published"} 1'
+        in text
+    )
+    assert text.count("_count{") == 2
+
+
+@pytest.mark.unit
+def test_metrics_server_exports_transfer_metrics(tmp_path):
+    transfer_metrics = TransferMetrics()
+    transfer_metrics.record(
+        TransferRecord(
+            task_id="task",
+            scheme="https",
+            source_endpoint="example.org",
+            destination_endpoint="local",
+            status="SUCCEEDED",
+            files=2,
+            bytes=2048,
+            queued_at=0.0,
+            started_at=1.0,
+            ended_at=3.0,
+        )
+    )
+    metrics = AgentMetrics()
+    metrics.add_collector(lambda: transfer_metric_families(transfer_metrics))
+
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    try:
+        host, port = server.address
+        with urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            text = response.read().decode()
+    finally:
+        server.close()
+    assert "zambeze_transfer_bytes_total 2048" in text
+    assert (
+        'zambeze_transfer_bytes_per_second{destination="local",scheme="https",'
+        'source="example.org"} 1024.0' in text
+    )
+
+    server = MetricsServer(metrics, unix_socket=str(tmp_path / "metrics.sock"))
+    server.start()
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(server.address)
+            client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = b""
+            while chunk := client.recv(65536):
+                response += chunk
+    finally:
+        server.close()
+    assert response.startswith(b"HTTP/1.0 200")
+    assert b"zambeze_transfer_files_total 2" in response
+    assert not (tmp_path / "metrics.sock").exists()
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+
+from zambeze.orchestration.plugin_host import PluginHostError, PluginHostPool
+from zambeze.orchestration.plugins import Plugins
+
+
+def _run(pool, tmp_path, command, **parameters):
+    return pool.run(
+        "shell",
+        {
+            "bash": {
+                "command": command,
+                "args": [],
+                "env_vars": {},
+                "use_shell": True,
+                "activity_id": "host-test",
+                **parameters,
+            }
+        },
+    )[0]
+
+
+@pytest.mark.unit
+def test_plugin_host_runs_plugins_out_of_process(tmp_path):
+    plugins = Plugins()
+    plugins.configure(
+        {"shell": {"output": {"directory": str(tmp_path)}}},
+        host={"enabled": True, "size": 1},
+    )
+    pool = plugins._host_pool
+    try:
+        result = _run(pool, tmp_path, "echo $PPID")
+        assert result["returncode"] == 0
+        host_pid = int(result["stdout_tail"])
+        assert host_pid != os.getpid()
+
+        # The host is long-lived.
+        assert int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"]) == host_pid
+    finally:
+        pool.close()
+
+
+@pytest.mark.unit
+def test_plugin_host_forwards_cancellation(tmp_path):
+    pool = PluginHostPool({"shell": {"output": {"directory": str(tmp_path)}}}, size=1)
+    cancel = threading.Event()
+    threading.Timer(0.5, cancel.set).start()
+    try:
+        result = _run(pool, tmp_path, "sleep 30", cancel=cancel)
+        assert result["outcome"] == "CANCELLED"
+    finally:
+        pool.close()
+
+
+@pytest.mark.unit
+def test_plugin_host_is_replaced_after_failure(tmp_path):
+    pool = PluginHostPool(
+        {"shell": {"output": {"directory": str(tmp_path)}}}, size=1, max_tasks=2
+    )
+    try:
+        first = int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"])
+
+        # Died while idle: replaced before the next invocation.
+        host = pool._idle.queue[0]
+        host.proc.kill()
+        host.proc.wait()
+        second = int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"])
+        assert second != first
+
+        # Died while running a plugin.
+        killer = threading.Timer(0.5, lambda: os.kill(second, 9))
+        killer.start()
+        with pytest.raises(PluginHostError):
+            _run(pool, tmp_path, "sleep 5")
+
+        # Recycled after max_tasks invocations.
+        third = int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"])
+        assert int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"]) == third
+        assert int(_run(pool, tmp_path, "echo $PPID")["stdout_tail"]) != third
+    finally:
+        pool.close()
+
+
+@pytest.mark.unit
+def test_plugin_host_keeps_the_agent_environment(tmp_path):
+    pool = PluginHostPool({"shell": {"output": {"directory": str(tmp_path)}}}, size=1)
+    try:
+        result = _run(pool, tmp_path, 'echo "[$PYTHONPATH]"')
+        assert result["stdout_tail"] == f"[{os.environ.get('PYTHONPATH', '')}]\n"
+    finally:
+        pool.close()
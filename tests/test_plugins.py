@@ -1,5 +1,14 @@
 # Local imports
 from zambeze.orchestration.plugins import Plugins
+from zambeze.orchestration.plugin_modules.abstract_plugin_message_validator import (
+    PluginMessageValidator,
+)
+from zambeze.orchestration.plugin_modules.common_plugin_functions import (
+    plugin_registry,
+)
+from zambeze.orchestration.plugin_modules.shell.shell_message_validator import (
+    ShellMessageValidator,
+)
 from zambeze import ShellActivity
 
 # Standard imports
@@ -24,6 +33,20 @@ def test_registered_plugins():
     assert found_shell
 
 
+@pytest.mark.unit
+def test_plugin_registry_is_shared_and_cached():
+    registry = plugin_registry()
+    assert registry is plugin_registry()
+    assert "shell" in registry.names
+
+    validators = registry.classes("shell", "_message_validator", PluginMessageValidator)
+    assert validators == {"shellmessagevalidator": ShellMessageValidator}
+    assert (
+        registry.classes("shell", "_message_validator", PluginMessageValidator)
+        is validators
+    )
+
+
 @pytest.mark.unit
 def test_check_configured_plugins():
     plugins = Plugins()
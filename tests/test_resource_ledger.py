@@ -0,0 +1,81 @@
+import os
+import threading
+import uuid
+
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration.plugins import Plugins
+from zambeze.orchestration.resource_ledger import (
+    ResourceLedger,
+    ResourceLedgerError,
+)
+
+
+@pytest.mark.unit
+def test_resource_ledger_admits_activities_that_fit():
+    ledger = ResourceLedger(cpus=1, memory=1000, gpus=1)
+    activity = ShellActivity(
+        name="big", files=[], command="true", arguments="", memory=600, gpus=1
+    )
+    request = ResourceLedger.request_for(activity)
+    assert request == {"cpus": 1, "memory": 600, "gpus": 1}
+
+    first = ledger.acquire("first", request)
+    assert first.gpu_ids == [0]
+    assert ledger.available == {"cpus": 0, "memory": 400, "gpus": 0}
+    # Does not fit next to the first one.
+    assert ledger.acquire("second", request, timeout=0.1) is None
+
+    admitted = []
+    waiter = threading.Thread(
+        target=lambda: admitted.append(ledger.acquire("second", request))
+    )
+    waiter.start()
+    ledger.release(first)
+    waiter.join(5)
+    assert admitted[0].cpu_ids == first.cpu_ids
+
+    with pytest.raises(ResourceLedgerError):
+        ledger.acquire("huge", {"cpus": 2, "memory": None, "gpus": 0})
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="CPU affinity is Linux only"
+)
+def test_shell_plugin_enforces_limits(tmp_path):
+    plugins = Plugins()
+    plugins.configure({"shell": {"output": {"directory": str(tmp_path)}}})
+    cpu_id = min(os.sched_getaffinity(0))
+    limits = {"cpu_ids": [cpu_id], "memory": 2 * 1024**3, "gpu_ids": []}
+
+    activity = ShellActivity(
+        name="status", files=[], command="cat", arguments="/proc/self/status"
+    )
+    activity.activity_id = str(uuid.uuid4())
+    affinity = os.sched_getaffinity(0)
+    result = plugins.run(activity, {"limits": limits})
+    assert f"Cpus_allowed_list:\t{cpu_id}\n" in result[0]["stdout_tail"]
+    # The limits are applied from the agent, whose own CPUs are restored.
+    assert os.sched_getaffinity(0) == affinity
+
+    activity = ShellActivity(
+        name="limits",
+        files=[],
+        command="grep",
+        arguments="address /proc/self/limits",
+        shell=True,
+    )
+    activity.activity_id = str(uuid.uuid4())
+    result = plugins.run(activity, {"limits": limits})
+    assert str(2 * 1024**3) in result[0]["stdout_tail"]
+
+    activity = ShellActivity(
+        name="gpus", files=[], command="printenv", arguments="CUDA_VISIBLE_DEVICES"
+    )
+    activity.activity_id = str(uuid.uuid4())
+    result = plugins.run(activity, {"limits": limits})
+    # A GPU-free activity sees no devices.
+    assert result[0]["returncode"] == 0
+    assert result[0]["stdout_tail"] == "\n"
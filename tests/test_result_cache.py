@@ -0,0 +1,131 @@
+import logging
+import os
+import uuid
+
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration import result_cache as result_cache_module
+from zambeze.orchestration.db.dao.activity_result_dao import ActivityResultDAO
+from zambeze.orchestration.db.dao.dao_utils import create_local_db
+from zambeze.orchestration.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    create_local_db()
+    return ResultCache(tmp_path / "results", ActivityResultDAO(logger), logger=logger)
+
+
+def _activity(env_vars=None):
+    return ShellActivity(
+        name="reduce",
+        files=["local:///data/input.txt"],
+        command="reduce",
+        arguments=f"input.txt {uuid.uuid4()}",
+        env_vars=env_vars,
+        cache=True,
+        outputs=["output.txt"],
+    )
+
+
+@pytest.mark.unit
+def test_result_cache_key_follows_inputs(result_cache, tmp_path):
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("a")
+    activity = _activity()
+
+    key = result_cache.make_key(activity, [str(input_path)])
+    assert result_cache.make_key(activity, [str(input_path)]) == key
+
+    activity.env_vars = {"MODE": "fast"}
+    assert result_cache.make_key(activity, [str(input_path)]) != key
+    activity.env_vars = None
+
+    activity.shell = True
+    assert result_cache.make_key(activity, [str(input_path)]) != key
+    activity.shell = False
+
+    input_path.write_text("b")
+    os.utime(input_path, ns=(0, 0))
+    assert result_cache.make_key(activity, [str(input_path)]) != key
+
+
+@pytest.mark.unit
+def test_result_cache_restores_outputs(result_cache, tmp_path):
+    output_path = tmp_path / "output.txt"
+    output_path.write_text("reduced")
+    output_path.chmod(0o750)
+    key = str(uuid.uuid4())
+
+    assert result_cache.lookup(key) is None
+    result_cache.store(key, "activity-1", [str(output_path)], [{"returncode": 0}])
+    output_path.unlink()
+
+    entry = result_cache.lookup(key)
+    assert entry["activity_id"] == "activity-1"
+    assert entry["result"] == [{"returncode": 0}]
+    result_cache.restore(entry)
+    assert output_path.read_text() == "reduced"
+    assert output_path.stat().st_mode & 0o777 == 0o750
+
+
+@pytest.mark.unit
+def test_result_cache_skips_incomplete_results(result_cache, tmp_path):
+    key = str(uuid.uuid4())
+    result_cache.store(key, "activity-1", [str(tmp_path / "missing.txt")])
+    assert result_cache.lookup(key) is None
+
+
+@pytest.mark.unit
+def test_result_cache_bounds_digest_memo(result_cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache_module, "MAX_DIGESTS", 2)
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = tmp_path / name
+        path.write_text(name)
+        paths.append(path)
+        result_cache.digest(path)
+
+    # The least recently used file was dropped, a changed file replaces its
+    # own entry.
+    assert list(result_cache._digests) == [str(paths[1]), str(paths[2])]
+    paths[2].write_text("changed")
+    os.utime(paths[2], ns=(0, 0))
+    result_cache.digest(paths[2])
+    assert len(result_cache._digests) == 2
+
+
+@pytest.mark.unit
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    create_local_db()
+    dao = ActivityResultDAO(logger)
+    result_cache = ResultCache(tmp_path / "results", dao, max_bytes=250, logger=logger)
+    keys = {}
+    for name in ["a", "b", "c"]:
+        output_path = tmp_path / f"{name}.out"
+        output_path.write_text(name * 100)
+        keys[name] = str(uuid.uuid4())
+        result_cache.store(keys[name], f"activity-{name}", [str(output_path)])
+        if name == "b":
+            # Used again, so "a" is the least recently used one.
+            assert result_cache.lookup(keys["a"]) is not None
+
+    assert result_cache.total_bytes == 200
+    assert result_cache.lookup(keys["b"]) is None
+    assert result_cache.lookup(keys["a"]) is not None
+    assert result_cache.lookup(keys["c"]) is not None
+
+    # Outputs larger than the whole store are not kept.
+    big_path = tmp_path / "big.out"
+    big_path.write_text("z" * 300)
+    big_key = str(uuid.uuid4())
+    result_cache.store(big_key, "activity-big", [str(big_path)])
+    assert result_cache.lookup(big_key) is None
+
+    # A new cache over the same directory keeps the order of use.
+    reloaded = ResultCache(tmp_path / "results", dao, max_bytes=150, logger=logger)
+    assert reloaded.total_bytes == 100
+    assert reloaded.lookup(keys["c"]) is not None
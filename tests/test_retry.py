@@ -0,0 +1,43 @@
+import pytest
+
+from zambeze.orchestration.data.transfer_hippo import (
+    InvalidTransferFilesError,
+    TransferHippoError,
+)
+from zambeze.orchestration.retry import (
+    CANCELLED,
+    COMMAND,
+    PERMANENT,
+    TIMEOUT,
+    TRANSIENT,
+    RetryPolicy,
+    classify_exception,
+)
+
+
+@pytest.mark.unit
+def test_retry_policy_backs_off():
+    policy = RetryPolicy(initial_delay=1.0, backoff=2.0, max_delay=5.0)
+
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [1.0, 2.0, 4.0, 5.0]
+
+
+@pytest.mark.unit
+def test_retry_policy_retries_only_listed_failures():
+    policy = RetryPolicy(max_attempts=3, retry_on=(TRANSIENT, TIMEOUT))
+
+    assert policy.should_retry(1, TRANSIENT)
+    assert policy.should_retry(2, TIMEOUT)
+    assert not policy.should_retry(3, TRANSIENT)
+    assert not policy.should_retry(1, COMMAND)
+    assert not policy.should_retry(1, PERMANENT)
+    # Never undo a cancellation.
+    assert not RetryPolicy(retry_on=(CANCELLED,)).should_retry(1, CANCELLED)
+
+
+@pytest.mark.unit
+def test_classify_exception():
+    assert classify_exception(TransferHippoError("no endpoint")) == TRANSIENT
+    assert classify_exception(InvalidTransferFilesError("ftp://x")) == PERMANENT
+    assert classify_exception(TimeoutError()) == TRANSIENT
+    assert classify_exception(KeyError("command")) == PERMANENT
@@ -0,0 +1,61 @@
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration.plugin_modules.shell.shell import (
+    expand_variables,
+    merge_env_variables,
+)
+from zambeze.orchestration.plugins import Plugins
+
+
+@pytest.mark.unit
+def test_expand_variables_nested_references():
+    env = {"Nested": "Long", "Long": "Patterns"}
+
+    assert expand_variables("My${${Nested}}string", env.get) == "MyPatternsstring"
+    # Unknown and unterminated references are kept as written.
+    assert expand_variables("${Unknown}/${Long", env.get) == "${Unknown}/${Long"
+    assert expand_variables("a}b", env.get) == "a}b"
+
+
+@pytest.mark.unit
+def test_merge_env_variables():
+    current = {"PATH": "/bin", "HOME": "/home/z"}
+    new = {
+        "DATA": "${WORK}/data",
+        "WORK": "${HOME}/work",
+        "PATH": "${PATH}:${WORK}/bin",
+    }
+
+    merged = merge_env_variables(current, new)
+
+    assert merged == {
+        "HOME": "/home/z",
+        "WORK": "/home/z/work",
+        "DATA": "/home/z/work/data",
+        "PATH": "/bin:/home/z/work/bin",
+    }
+    assert new["DATA"] == "${WORK}/data"
+
+
+@pytest.mark.unit
+def test_merge_env_variables_detects_cycles():
+    with pytest.raises(ValueError, match="A -> B -> A"):
+        merge_env_variables({}, {"A": "${B}", "B": "x${A}"})
+
+
+@pytest.mark.unit
+def test_shell_plugin_rejects_cyclic_env_vars():
+    plugins = Plugins()
+    plugins.configure({"shell": {}})
+    activity = ShellActivity(
+        name="Env",
+        files=[],
+        command="echo",
+        arguments="hello",
+        env_vars={"A": "${B}", "B": "${A}"},
+    )
+
+    # The command must not run with the agent's environment instead.
+    with pytest.raises(ValueError, match="reference each other"):
+        plugins.run(activity)
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration.plugin_modules.shell.shell_output import (
+    ActivityOutput,
+    prune_logs,
+)
+from zambeze.orchestration.plugins import Plugins
+
+
+def _activity(command, arguments):
+    activity = ShellActivity(
+        name="Output", files=[], command=command, arguments=arguments
+    )
+    activity.message_id = str(uuid.uuid4())
+    activity.activity_id = str(uuid.uuid4())
+    activity.agent_id = str(uuid.uuid4())
+    activity.campaign_id = str(uuid.uuid4())
+    return activity
+
+
+@pytest.mark.unit
+def test_activity_output_rotates_and_keeps_tail(tmp_path):
+    config = {"directory": str(tmp_path), "max_bytes": 30000, "tail_bytes": 16}
+    output = ActivityOutput.open(config, "chatty")
+
+    # Far more than a pipe buffer, on both streams at once.
+    script = (
+        "import sys\nfor i in range(20000):\n    print(i); print(i, file=sys.stderr)\n"
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdout=output.stdout.write_fd,
+        stderr=output.stderr.write_fd,
+    )
+    output.close_writers()
+    assert proc.wait() == 0
+    result = output.finish()
+
+    assert result["stdout_tail"] == "997\n19998\n19999\n"
+    assert result["stdout_log"] == str(tmp_path / "chatty.1.stdout")
+    assert os.path.exists(str(tmp_path / "chatty.1.stdout.1"))
+    assert os.path.exists(str(tmp_path / "chatty.1.stderr.2"))
+    assert not os.path.exists(str(tmp_path / "chatty.1.stderr.3"))
+    assert os.path.getsize(result["stderr_log"]) <= 30000
+
+
+@pytest.mark.unit
+def test_prune_logs_by_age_and_count(tmp_path):
+    now = time.time()
+    for age in range(5):
+        path = tmp_path / f"activity-{age}.stdout"
+        path.write_text("zambeze")
+        os.utime(path, (now - age * 3600, now - age * 3600))
+
+    # Older than 3.5 hours, then beyond the newest two.
+    assert prune_logs(str(tmp_path), max_age=3.5 * 3600, max_files=None) == 1
+    assert prune_logs(str(tmp_path), max_age=None, max_files=2) == 2
+    assert sorted(os.listdir(tmp_path)) == ["activity-0.stdout", "activity-1.stdout"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("warm", [False, True])
+def test_shell_plugin_reports_exit_code_and_output(tmp_path, warm):
+    plugins = Plugins()
+    plugins.configure(
+        {
+            "shell": {
+                "warm_workers": {"enabled": warm, "size": 1},
+                "output": {"directory": str(tmp_path)},
+            }
+        }
+    )
+    activity = _activity("ls", str(tmp_path / "missing"))
+
+    result = plugins.run(activity)
+
+    assert len(result) == 1
+    assert result[0]["returncode"] != 0
+    assert "missing" in result[0]["stderr_tail"]
+    failed_log = tmp_path / f"{activity.activity_id}.1.stderr"
+    assert result[0]["stderr_log"] == str(failed_log)
+
+    # A retry writes its own logs and keeps those of the failed attempt.
+    activity.attempt = 2
+    result = plugins.run(activity)
+    assert result[0]["stderr_log"] == str(tmp_path / f"{activity.activity_id}.2.stderr")
+    assert "missing" in failed_log.read_text()
+
+    activity = _activity("echo", "hello-zambeze")
+    result = plugins.run(activity)
+
+    assert result[0]["returncode"] == 0
+    assert result[0]["stdout_tail"] == "hello-zambeze\n"
@@ -0,0 +1,58 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration.plugins import Plugins
+
+
+def _configured_plugins(tmp_path, warm):
+    plugins = Plugins()
+    plugins.configure(
+        {
+            "shell": {
+                "warm_workers": {"enabled": warm, "size": 1},
+                "output": {"directory": str(tmp_path)},
+                "kill_grace": 1.0,
+            }
+        }
+    )
+    return plugins
+
+
+def _sleeper():
+    # The background sleep shares the command's process group.
+    activity = ShellActivity(
+        name="sleep", files=[], command="sleep", arguments="30 & sleep 30", shell=True
+    )
+    activity.activity_id = str(uuid.uuid4())
+    return activity
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("warm", [False, True])
+def test_shell_plugin_times_out(tmp_path, warm):
+    plugins = _configured_plugins(tmp_path, warm)
+
+    start = time.monotonic()
+    result = plugins.run(_sleeper(), {"timeout": 0.2})
+
+    assert result[0]["outcome"] == "TIMEOUT"
+    assert result[0]["returncode"] != 0
+    # Terminated with SIGTERM; the orphaned sleep did not hold up the output.
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("warm", [False, True])
+def test_shell_plugin_cancels(tmp_path, warm):
+    plugins = _configured_plugins(tmp_path, warm)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+
+    result = plugins.run(_sleeper(), {"cancel": cancel})
+
+    assert result[0]["outcome"] == "CANCELLED"
+    assert result[0]["returncode"] != 0
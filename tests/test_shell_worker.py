@@ -0,0 +1,121 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+from zambeze import ShellActivity
+from zambeze.orchestration.plugin_modules.shell.shell_worker import (
+    ShellWorkerPool,
+    _python_entry,
+)
+from zambeze.orchestration.plugins import Plugins
+
+
+@pytest.mark.unit
+def test_shell_worker_recognizes_python_entry_points():
+    env = {"PATH": os.path.dirname(sys.executable)}
+
+    assert _python_entry(f"{sys.executable} run.py a b", env) == (
+        "script",
+        "run.py",
+        ["run.py", "a", "b"],
+    )
+    assert _python_entry(f"{sys.executable} -m json.tool in", env) == (
+        "module",
+        "json.tool",
+        ["json.tool", "in"],
+    )
+    # Left to the shell: variables, other programs.
+    assert _python_entry(f"{sys.executable} run.py $NAME", env) is None
+    assert _python_entry("/bin/echo run.py", env) is None
+
+
+@pytest.mark.unit
+def test_shell_worker_pool_runs_commands(tmp_path):
+    script = tmp_path / "task.py"
+    script.write_text(
+        "import os, sys\n"
+        "with open('out.txt', 'w') as f:\n"
+        "    f.write(os.environ['NAME'] + ' ' + ' '.join(sys.argv[1:]))\n"
+        "sys.exit(3)\n"
+    )
+    env = {**os.environ, "NAME": "zambeze"}
+
+    pool = ShellWorkerPool(size=2)
+    try:
+        # Forked from the warm worker.
+        returncode, outcome = pool.run(
+            f"{sys.executable} {script} a b", env, cwd=str(tmp_path)
+        )
+        assert (returncode, outcome) == (3, "EXITED")
+        assert (tmp_path / "out.txt").read_text() == "zambeze a b"
+
+        # Handed to the shell.
+        returncode, _ = pool.run("echo $NAME > shell.txt", env, cwd=str(tmp_path))
+        assert returncode == 0
+        assert (tmp_path / "shell.txt").read_text() == "zambeze\n"
+
+        # The same worker is reused.
+        assert pool._spawned == 1
+    finally:
+        pool.close()
+
+
+@pytest.mark.unit
+def test_shell_plugin_run_on_warm_workers(tmp_path):
+    plugins = Plugins()
+    plugins.configure(
+        {
+            "shell": {
+                "warm_workers": {"enabled": True, "size": 1},
+                "output": {"directory": str(tmp_path)},
+            }
+        }
+    )
+
+    file_path = str(tmp_path / "warm.txt")
+    activity = ShellActivity(
+        name="Simple touch", files=[], command="touch", arguments=file_path
+    )
+    activity.message_id = str(uuid.uuid4())
+    activity.activity_id = str(uuid.uuid4())
+    activity.agent_id = str(uuid.uuid4())
+    activity.campaign_id = str(uuid.uuid4())
+
+    plugins.run(activity)
+
+    assert os.path.exists(file_path)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("warm", [False, True])
+def test_shell_plugin_executes_without_shell(tmp_path, warm):
+    plugins = Plugins()
+    plugins.configure(
+        {
+            "shell": {
+                "warm_workers": {"enabled": warm, "size": 1},
+                "output": {"directory": str(tmp_path)},
+            }
+        }
+    )
+
+    def run(command, arguments, shell=False):
+        activity = ShellActivity(
+            name="echo",
+            files=[],
+            command=command,
+            arguments=arguments,
+            env_vars={"NAME": "zambeze"},
+            shell=shell,
+        )
+        return plugins.run(activity)[0]
+
+    # Arguments reach the program as given.
+    assert run("echo", "$NAME  *")["stdout_tail"] == "$NAME *\n"
+    assert run("echo", "$NAME", shell=True)["stdout_tail"] == "zambeze\n"
+
+    result = run("no-such-zambeze-program", "")
+    assert result["returncode"] == 127
+    assert "no-such-zambeze-program" in result["stderr_tail"]
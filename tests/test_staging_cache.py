@@ -0,0 +1,108 @@
+import logging
+import os
+
+import pytest
+
+from zambeze.orchestration.data import staging_cache
+from zambeze.orchestration.data.local_transfer import stage_local_file
+from zambeze.orchestration.data.staging_cache import StagingCache
+
+logger = logging.getLogger(__name__)
+
+
+def _write(path, size):
+    path.write_bytes(b"z" * size)
+    return path
+
+
+@pytest.mark.unit
+def test_staging_cache_key_depends_on_source_state():
+    key = StagingCache.make_key("ep", "/data/ref.h5", size=10, mtime="2024-01-01")
+    assert key == StagingCache.make_key("ep", "/data/ref.h5", 10, "2024-01-01")
+    assert key != StagingCache.make_key("ep", "/data/ref.h5", 11, "2024-01-01")
+    assert key != StagingCache.make_key("other", "/data/ref.h5", 10, "2024-01-01")
+
+
+@pytest.mark.unit
+def test_staging_cache_hit_links_file(tmp_path):
+    cache = StagingCache(tmp_path / "cache", max_bytes=1024, logger=logger)
+    staged = _write(tmp_path / "ref.dat", 100)
+    key = StagingCache.make_key("ep", "/ref.dat", size=100, mtime=1)
+
+    dest = tmp_path / "work" / "ref.dat"
+    dest.parent.mkdir()
+    assert cache.materialize(key, dest) is False
+
+    cache.admit(key, staged)
+    assert key in cache
+    assert cache.materialize(key, dest) is True
+    assert dest.read_bytes() == staged.read_bytes()
+    assert os.stat(dest).st_ino == os.stat(staged).st_ino
+
+    # A new cache over the same directory finds the entry again.
+    reloaded = StagingCache(tmp_path / "cache", max_bytes=1024, logger=logger)
+    assert key in reloaded
+    assert reloaded.total_bytes == 100
+
+
+@pytest.mark.unit
+def test_staging_cache_evicts_least_recently_used(tmp_path):
+    cache = StagingCache(tmp_path / "cache", max_bytes=250, logger=logger)
+    keys = []
+    for name in ["a", "b", "c"]:
+        key = StagingCache.make_key("ep", f"/{name}", size=100, mtime=1)
+        cache.admit(key, _write(tmp_path / name, 100))
+        keys.append(key)
+        if name == "b":
+            # Touch "a" so that "b" becomes the least recently used entry.
+            assert cache.materialize(keys[0], tmp_path / "a_copy")
+
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert keys[2] in cache
+    assert cache.total_bytes == 200
+
+    # Files larger than the whole cache are never admitted.
+    big_key = StagingCache.make_key("ep", "/big", size=300, mtime=1)
+    cache.admit(big_key, _write(tmp_path / "big", 300))
+    assert big_key not in cache
+
+
+@pytest.mark.unit
+def test_staging_cache_drops_entries_changed_in_place(tmp_path):
+    cache = StagingCache(tmp_path / "cache", max_bytes=1024, logger=logger)
+    staged = _write(tmp_path / "ref.dat", 100)
+    key = StagingCache.make_key("ep", "/ref.dat", size=100, mtime=1)
+    cache.admit(key, staged)
+
+    # The activity keeps owning its input, which shares the entry's inode.
+    assert os.access(staged, os.W_OK)
+    with open(staged, "ab") as f:
+        f.write(b"changed")
+    os.utime(staged, ns=(0, 0))
+
+    assert cache.materialize(key, tmp_path / "copy.dat") is False
+    assert key not in cache
+    assert cache.total_bytes == 0
+    assert not (tmp_path / "copy.dat").exists()
+
+
+@pytest.mark.unit
+def test_staging_cache_stages_files_outside_its_lock(tmp_path, monkeypatch):
+    cache = StagingCache(tmp_path / "cache", max_bytes=1024, logger=logger)
+    staged = _write(tmp_path / "ref.dat", 100)
+    key = StagingCache.make_key("ep", "/ref.dat", size=100, mtime=1)
+
+    locked = []
+
+    def stage(src, dest, **kwargs):
+        locked.append(cache._lock.locked())
+        return stage_local_file(src, dest, **kwargs)
+
+    monkeypatch.setattr(staging_cache, "stage_local_file", stage)
+    cache.admit(key, staged)
+    assert cache.materialize(key, tmp_path / "copy.dat") is True
+
+    assert locked == [False, False]
+    assert (tmp_path / "copy.dat").read_bytes() == staged.read_bytes()
+    assert not list((tmp_path / "cache").glob("*.tmp"))
@@ -0,0 +1,105 @@
+import logging
+import time
+import uuid
+from types import SimpleNamespace
+
+import globus_sdk
+import pytest
+
+from zambeze.orchestration.data.transfer_client import (
+    LocalTransferSimulator,
+    make_transfer_client,
+)
+from zambeze.orchestration.data.transfer_hippo import TransferHippo
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EP = str(uuid.uuid4())
+LOCAL_EP = str(uuid.uuid4())
+
+
+def _transfer_data(source_path, destination_path):
+    data = globus_sdk.TransferData(
+        source_endpoint=SOURCE_EP, destination_endpoint=LOCAL_EP
+    )
+    data.add_item(source_path, destination_path)
+    return data
+
+
+@pytest.fixture
+def source_root(tmp_path):
+    root = tmp_path / "source"
+    (root / "data").mkdir(parents=True)
+    (root / "data" / "input.dat").write_bytes(b"z" * 4096)
+    return root
+
+
+@pytest.mark.unit
+def test_simulator_copies_files_with_latency_and_bandwidth(source_root, tmp_path):
+    simulator = LocalTransferSimulator(
+        endpoints={SOURCE_EP: str(source_root)},
+        latency=0.05,
+        bandwidth=40960,
+        logger=logger,
+    )
+    destination = tmp_path / "dest" / "input.dat"
+
+    start = time.monotonic()
+    task_id = simulator.submit_transfer(
+        _transfer_data("/data/input.dat", str(destination))
+    )["task_id"]
+    assert simulator.task_wait(task_id, timeout=5)
+    elapsed = time.monotonic() - start
+
+    task = simulator.get_task(task_id)
+    assert task["status"] == "SUCCEEDED"
+    assert task["bytes_transferred"] == 4096
+    assert destination.read_bytes() == b"z" * 4096
+    # 50 ms of latency plus 4096 bytes at 40 KiB/s.
+    assert elapsed >= 0.15
+    assert simulator.task_list(filter=f"task_id:{task_id}", limit=1) == [task]
+
+    (entry,) = simulator.operation_ls(SOURCE_EP, path="/data", filter="name:input.dat")
+    assert entry["size"] == 4096
+
+
+@pytest.mark.unit
+def test_simulator_injects_failures(source_root, tmp_path):
+    simulator = LocalTransferSimulator(
+        endpoints={SOURCE_EP: str(source_root)}, failure_rate=1.0, logger=logger
+    )
+    injected = simulator.submit_transfer(
+        _transfer_data("/data/input.dat", str(tmp_path / "a.dat"))
+    )["task_id"]
+    missing = simulator.submit_transfer(
+        _transfer_data("/data/missing.dat", str(tmp_path / "b.dat"))
+    )["task_id"]
+
+    assert simulator.task_wait(injected, timeout=5)
+    assert simulator.task_wait(missing, timeout=5)
+    assert simulator.get_task(injected)["nice_status"] == "SIMULATED_FAILURE"
+    assert simulator.get_task(missing)["nice_status"] == "FILE_NOT_FOUND"
+
+
+@pytest.mark.unit
+def test_transfer_hippo_runs_against_simulator(source_root, tmp_path):
+    globus_config = {
+        "local_ep": LOCAL_EP,
+        "simulator": {"enabled": True, "endpoints": {SOURCE_EP: str(source_root)}},
+    }
+    settings = SimpleNamespace(settings={"plugins": {"globus": globus_config}})
+    assert make_transfer_client(globus_config) is make_transfer_client(globus_config)
+
+    hippo = TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=settings,
+        logger=logger,
+        dest_dir=str(tmp_path),
+    )
+    hippo.load([f"globus://{SOURCE_EP}/data/input.dat"])
+    assert hippo.validate()
+    hippo.start_transfer()
+
+    assert isinstance(hippo.globus_transfer_client, LocalTransferSimulator)
+    assert hippo.all_succeeded(hippo.transfer_wait(initial_interval=0.01))
+    assert (tmp_path / "input.dat").read_bytes() == b"z" * 4096
@@ -0,0 +1,281 @@
+import logging
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from zambeze.orchestration.data import transfer_hippo
+from zambeze.orchestration.data.staging_cache import StagingCache
+from zambeze.orchestration.data.transfer_coordinator import TransferCoordinator
+from zambeze.orchestration.data.transfer_hippo import TransferHippo
+
+logger = logging.getLogger(__name__)
+
+LOCAL_EP = str(uuid.uuid4())
+
+
+class FakeTransferClient:
+    """Stands in for globus_sdk.TransferClient; records submitted tasks."""
+
+    def __init__(self, authorizer=None):
+        self.submitted = []
+        self.task_list_calls = 0
+        # task_id -> statuses returned by successive polls (last one sticks)
+        self.status_sequences = {}
+        # (endpoint_id, path, filter) of every listing
+        self.ls_calls = []
+        self._lock = threading.Lock()
+
+    def submit_transfer(self, data):
+        with self._lock:
+            task_id = str(uuid.uuid4())
+            self.submitted.append((task_id, dict(data)))
+        return {"task_id": task_id}
+
+    def _next_status(self, task_id):
+        sequence = self.status_sequences.get(task_id, ["SUCCEEDED"])
+        return sequence.pop(0) if len(sequence) > 1 else sequence[0]
+
+    def task_list(self, filter, limit):
+        self.task_list_calls += 1
+        task_ids = filter.split(":", 1)[1].split(",")
+        return [
+            {"task_id": task_id, "status": self._next_status(task_id)}
+            for task_id in task_ids
+        ]
+
+    def get_task(self, task_id):
+        return {"task_id": task_id, "status": self._next_status(task_id)}
+
+    def operation_ls(self, endpoint_id, path, filter):
+        self.ls_calls.append((endpoint_id, path, filter))
+        names = [filter.split(":", 1)[1]] if filter else ["ref.dat", "other.dat"]
+        return [
+            {"name": name, "size": 7, "last_modified": "2024-01-01 00:00:00"}
+            for name in names
+        ]
+
+
+@pytest.fixture
+def hippo(monkeypatch):
+    monkeypatch.setattr(transfer_hippo.globus_sdk, "TransferClient", FakeTransferClient)
+    settings = SimpleNamespace(settings={"plugins": {"globus": {"local_ep": LOCAL_EP}}})
+    return TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=settings,
+        logger=logger,
+        tokens={"globus": {"access_token": "token"}},
+    )
+
+
+@pytest.mark.unit
+def test_transfer_hippo_groups_by_source_endpoint(hippo):
+    ep_a = str(uuid.uuid4())
+    ep_b = str(uuid.uuid4())
+    hippo.load(
+        [
+            f"globus://{ep_a}/data/file1.txt",
+            f"globus://{ep_b}/data/file2.txt",
+            f"globus://{ep_a}/data/file3.txt",
+        ]
+    )
+    assert hippo.validate()
+
+    hippo.start_transfer()
+
+    submitted = hippo.globus_transfer_client.submitted
+    assert len(submitted) == 2
+    assert len(hippo.globus_task_ids) == 2
+
+    by_source = {data["source_endpoint"]: data for _, data in submitted}
+    assert set(by_source) == {ep_a, ep_b}
+    assert len(by_source[ep_a]["DATA"]) == 2
+    assert len(by_source[ep_b]["DATA"]) == 1
+    assert all(data["destination_endpoint"] == LOCAL_EP for _, data in submitted)
+
+    for task_id, task in hippo.globus_tasks.items():
+        assert task_id in hippo.globus_task_ids
+        assert task["destination_endpoint"] == LOCAL_EP
+        assert len(task["files"]) == (2 if task["source_endpoint"] == ep_a else 1)
+
+
+@pytest.mark.unit
+def test_transfer_hippo_stages_local_files(hippo, tmp_path):
+    local_file = tmp_path / "local.txt"
+    local_file.write_text("zambeze")
+    (tmp_path / "work").mkdir()
+    hippo._dest_dir = str(tmp_path / "work")
+    hippo.load([f"local://{local_file}"])
+
+    assert hippo.validate()
+    hippo.start_transfer()
+
+    assert hippo.globus_transfer_client is None
+    assert hippo.globus_task_ids == []
+    assert (tmp_path / "work" / "local.txt").read_text() == "zambeze"
+    assert len(hippo.local_transfers) == 1
+    assert hippo.local_transfers[0].bytes == len("zambeze")
+    # Inputs are copied by default, so activities cannot modify the source.
+    assert hippo.local_transfers[0].method != "hardlink"
+    (tmp_path / "work" / "local.txt").write_text("modified")
+    assert local_file.read_text() == "zambeze"
+
+
+def _submit_two_tasks(hippo):
+    hippo.load(
+        [
+            f"globus://{uuid.uuid4()}/data/file1.txt",
+            f"globus://{uuid.uuid4()}/data/file2.txt",
+        ]
+    )
+    hippo.start_transfer()
+    return hippo.globus_task_ids
+
+
+@pytest.mark.unit
+def test_transfer_hippo_wait_returns_per_task_outcomes(hippo):
+    slow_task, failed_task = _submit_two_tasks(hippo)
+    client = hippo.globus_transfer_client
+    client.status_sequences[slow_task] = ["ACTIVE", "ACTIVE", "SUCCEEDED"]
+    client.status_sequences[failed_task] = ["FAILED"]
+
+    outcomes = hippo.transfer_wait(initial_interval=0.001)
+
+    assert outcomes == {slow_task: "SUCCEEDED", failed_task: "FAILED"}
+    assert not hippo.all_succeeded(outcomes)
+    # One batched call per round rather than one call per task.
+    assert client.task_list_calls == 3
+
+
+@pytest.mark.unit
+def test_transfer_hippo_wait_honors_deadline(hippo):
+    stuck_task, done_task = _submit_two_tasks(hippo)
+    hippo.globus_transfer_client.status_sequences[stuck_task] = ["ACTIVE"]
+
+    outcomes = hippo.transfer_wait(timeout=0.05, initial_interval=0.01)
+
+    assert outcomes == {stuck_task: "TIMEOUT", done_task: "SUCCEEDED"}
+
+
+@pytest.mark.unit
+def test_transfer_hippo_reuses_staging_cache(hippo, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ep = str(uuid.uuid4())
+    cache = StagingCache(tmp_path / "cache", logger=logger)
+    hippo._staging_cache = cache
+    hippo.load([f"globus://{ep}/data/ref.dat"])
+    hippo.start_transfer()
+    assert len(hippo.globus_task_ids) == 1
+
+    # Pretend Globus delivered the file, then let the poller admit it.
+    (tmp_path / "ref.dat").write_text("zambeze")
+    assert hippo.all_succeeded(hippo.transfer_wait(initial_interval=0.001))
+
+    second = TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=hippo._settings,
+        logger=logger,
+        tokens=hippo.tokens,
+        staging_cache=cache,
+    )
+    (tmp_path / "ref.dat").unlink()
+    second.load([f"globus://{ep}/data/ref.dat"])
+    second.start_transfer()
+
+    assert second.globus_task_ids == []
+    assert second.cache_hits == [str(tmp_path / "ref.dat")]
+    assert (tmp_path / "ref.dat").read_text() == "zambeze"
+
+
+@pytest.mark.unit
+def test_transfer_hippo_lists_each_source_directory_once(hippo, tmp_path):
+    hippo._staging_cache = StagingCache(tmp_path / "cache", logger=logger)
+    hippo._dest_dir = str(tmp_path)
+    ep = str(uuid.uuid4())
+    hippo.load([f"globus://{ep}/data/ref.dat", f"globus://{ep}/data/other.dat"])
+    hippo.start_transfer()
+
+    assert hippo.globus_transfer_client.ls_calls == [(ep, "/data", "")]
+    assert len(hippo._cache_keys) == 2
+
+
+def _coordinated_hippo(hippo, coordinator, dest_dir):
+    return TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=hippo._settings,
+        logger=logger,
+        tokens=hippo.tokens,
+        dest_dir=str(dest_dir),
+        coordinator=coordinator,
+    )
+
+
+@pytest.mark.unit
+def test_transfer_hippo_merges_concurrent_transfers(hippo, tmp_path):
+    coordinator = TransferCoordinator(logger=logger)
+    source_url = f"globus://{uuid.uuid4()}/data/shared.dat"
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+
+    owner = _coordinated_hippo(hippo, coordinator, tmp_path / "a")
+    waiter = _coordinated_hippo(hippo, coordinator, tmp_path / "b")
+    owner.load([source_url])
+    waiter.load([source_url])
+    owner.start_transfer()
+    waiter.start_transfer()
+
+    assert len(owner.globus_task_ids) == 1
+    assert waiter.globus_transfer_client.submitted == []
+    assert coordinator.merged == 1
+
+    # Pretend Globus delivered the file for the owner.
+    (tmp_path / "a" / "shared.dat").write_text("zambeze")
+    assert owner.all_succeeded(owner.transfer_wait(initial_interval=0.001))
+    assert len(coordinator) == 0
+
+    assert waiter.transfer_wait() == {source_url: "SUCCEEDED"}
+    assert (tmp_path / "b" / "shared.dat").read_text() == "zambeze"
+
+
+@pytest.mark.unit
+def test_transfer_hippo_merged_transfer_failure(hippo, tmp_path):
+    coordinator = TransferCoordinator(logger=logger)
+    source_url = f"globus://{uuid.uuid4()}/data/shared.dat"
+
+    owner = _coordinated_hippo(hippo, coordinator, tmp_path)
+    waiter = _coordinated_hippo(hippo, coordinator, tmp_path)
+    owner.load([source_url])
+    waiter.load([source_url])
+    owner.start_transfer()
+    waiter.start_transfer()
+
+    (task_id,) = owner.globus_task_ids
+    owner.globus_transfer_client.status_sequences[task_id] = ["FAILED"]
+    owner.transfer_wait(initial_interval=0.001)
+
+    assert waiter.transfer_wait() == {source_url: "FAILED"}
+
+
+@pytest.mark.unit
+def test_transfer_hippo_fails_claims_when_owner_poll_raises(hippo, tmp_path):
+    coordinator = TransferCoordinator(logger=logger)
+    source_url = f"globus://{uuid.uuid4()}/data/shared.dat"
+
+    owner = _coordinated_hippo(hippo, coordinator, tmp_path)
+    waiter = _coordinated_hippo(hippo, coordinator, tmp_path)
+    owner.load([source_url])
+    waiter.load([source_url])
+    owner.start_transfer()
+    waiter.start_transfer()
+
+    def unavailable(filter, limit):
+        raise ConnectionError("Globus API unavailable")
+
+    owner.globus_transfer_client.task_list = unavailable
+    with pytest.raises(ConnectionError):
+        owner.transfer_wait(initial_interval=0.001)
+
+    assert len(coordinator) == 0
+    # Fails at once instead of waiting on a transfer nobody follows.
+    assert waiter.transfer_wait(timeout=5) == {source_url: "FAILED"}
@@ -0,0 +1,101 @@
+import logging
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from zambeze.orchestration.data.transfer_hippo import TransferHippo
+from zambeze.orchestration.data.transfer_metrics import (
+    TransferMetrics,
+    TransferRecord,
+    globus_timestamp,
+)
+from zambeze.orchestration.db.dao.dao_utils import create_local_db
+from zambeze.orchestration.db.dao.transfer_metric_dao import TransferMetricDAO
+
+logger = logging.getLogger(__name__)
+
+
+def _record(task_id, status="SUCCEEDED", nbytes=1000, seconds=2.0, source="ep-a"):
+    return TransferRecord(
+        task_id=task_id,
+        scheme="globus",
+        source_endpoint=source,
+        destination_endpoint="ep-local",
+        status=status,
+        files=2,
+        bytes=nbytes,
+        queued_at=100.0,
+        started_at=101.0,
+        ended_at=101.0 + seconds,
+    )
+
+
+@pytest.mark.unit
+def test_transfer_record_derived_values():
+    record = _record("t1")
+    assert record.queue_seconds == 1.0
+    assert record.seconds == 2.0
+    assert record.bytes_per_second == 500.0
+    assert record.latency_per_file == 1.5
+    assert globus_timestamp("2024-01-01T00:00:00+00:00", 0.0) == 1704067200.0
+    assert globus_timestamp(None, 7.0) == 7.0
+
+
+@pytest.mark.unit
+def test_transfer_metrics_aggregates_per_endpoint_pair():
+    metrics = TransferMetrics(window=2, logger=logger)
+    metrics.record(_record("t1", nbytes=4000))
+    metrics.record(_record("t2", status="FAILED", nbytes=0))
+    metrics.record(_record("t3", nbytes=2000))
+    metrics.record(_record("t4", source="ep-b"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["totals"] == {
+        "transfers": 4,
+        "failures": 1,
+        "files": 8,
+        "bytes": 7000,
+    }
+
+    pairs = {pair["source_endpoint"]: pair for pair in snapshot["pairs"]}
+    # Only the two most recent transfers of ep-a are in the window.
+    assert pairs["ep-a"]["transfers"] == 2
+    assert pairs["ep-a"]["failures"] == 1
+    assert pairs["ep-a"]["bytes_per_second"] == 500.0
+    assert pairs["ep-b"]["queue_seconds_median"] == 1.0
+
+
+@pytest.mark.unit
+def test_transfer_metrics_stored_in_local_db():
+    create_local_db()
+    dao = TransferMetricDAO(logger)
+    metrics = TransferMetrics(agent_id=str(uuid.uuid4()), dao=dao, logger=logger)
+    task_id = str(uuid.uuid4())
+
+    metrics.record(_record(task_id))
+
+    (row,) = dao.select_by_task_id(task_id)
+    assert row["bytes"] == 1000
+    assert row["started_at"] - row["queued_at"] == 1000
+
+
+@pytest.mark.unit
+def test_transfer_hippo_reports_local_staging(tmp_path):
+    metrics = TransferMetrics(logger=logger)
+    (tmp_path / "input.txt").write_text("zambeze")
+    (tmp_path / "work").mkdir()
+    hippo = TransferHippo(
+        agent_id=str(uuid.uuid4()),
+        settings=SimpleNamespace(settings={"plugins": {}}),
+        logger=logger,
+        dest_dir=str(tmp_path / "work"),
+        metrics=metrics,
+    )
+    hippo.load([f"local://{tmp_path / 'input.txt'}"])
+    hippo.start_transfer()
+
+    (pair,) = metrics.snapshot()["pairs"]
+    assert pair["scheme"] == "local"
+    assert pair["bytes"] == len("zambeze")
+    assert pair["failures"] == 0
@@ -0,0 +1,148 @@
+import logging
+from queue import Queue
+from types import SimpleNamespace
+
+import pytest
+
+from zambeze import TransferActivity
+from zambeze.orchestration.data.transfer_hippo import TransferHippo
+from zambeze.orchestration.executor import Executor
+from zambeze.orchestration.transfer_watcher import TransferWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class FakeHippo:
+    """Finishes after ``rounds`` polls with the given outcomes."""
+
+    def __init__(self, rounds, outcomes):
+        self.rounds = rounds
+        self.outcomes = outcomes
+        self.polls = 0
+        self.errors = 0
+        self.cancelled = False
+        self.abandoned = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def abandon_claims(self):
+        self.abandoned = True
+
+    def poll(self):
+        self.polls += 1
+        if self.polls <= self.errors:
+            raise ConnectionError("Globus API unreachable")
+        return self.outcomes if self.polls >= self.rounds else None
+
+    def transfer_wait(self, timeout=-1):
+        return {task_id: "TIMEOUT" for task_id in self.outcomes}
+
+    all_succeeded = staticmethod(TransferHippo.all_succeeded)
+
+
+@pytest.fixture
+def watcher():
+    watcher = TransferWatcher(Queue(), logger=logger, initial_interval=0.001)
+    watcher.start()
+    yield watcher
+    watcher.stop()
+    watcher.join(5)
+
+
+@pytest.mark.unit
+def test_transfer_watcher_emits_statuses(watcher):
+    slow = FakeHippo(rounds=3, outcomes={"task-a": "SUCCEEDED"})
+    failed = FakeHippo(rounds=1, outcomes={"task-b": "FAILED"})
+    watcher.watch("slow", slow)
+    watcher.watch("failed", failed)
+
+    statuses = [watcher.to_status_q.get(timeout=5) for _ in range(2)]
+
+    assert [status["activity_id"] for status in statuses] == ["failed", "slow"]
+    assert statuses[0]["status"] == "FAILED"
+    assert statuses[1]["status"] == "SUCCEEDED"
+    assert statuses[1]["result"] == {"task-a": "SUCCEEDED"}
+    assert slow.polls == 3
+
+
+@pytest.mark.unit
+def test_transfer_watcher_tolerates_poll_errors():
+    watcher = TransferWatcher(
+        Queue(), logger=logger, initial_interval=0.001, max_poll_errors=3
+    )
+    watcher.start()
+    flaky = FakeHippo(rounds=4, outcomes={"task-a": "SUCCEEDED"})
+    flaky.errors = 2
+    broken = FakeHippo(rounds=10**9, outcomes={"task-b": "SUCCEEDED"})
+    broken.errors = 10**9
+    watcher.watch("flaky", flaky)
+    watcher.watch("broken", broken)
+
+    statuses = {}
+    for _ in range(2):
+        status = watcher.to_status_q.get(timeout=5)
+        statuses[status["activity_id"]] = status
+    watcher.stop()
+    watcher.join(5)
+
+    # Fewer failed polls in a row than the limit are only retried.
+    assert statuses["flaky"]["status"] == "SUCCEEDED"
+    assert statuses["broken"]["status"] == "FAILED"
+    assert broken.polls == 3
+    # Given up on: its transfers and the activities merged onto them stop.
+    assert broken.cancelled and broken.abandoned
+    assert not flaky.cancelled and not flaky.abandoned
+
+
+@pytest.mark.unit
+def test_transfer_watcher_times_out(watcher):
+    stuck = FakeHippo(rounds=10**9, outcomes={"t": "X"})
+    finished = []
+    watcher.watch("stuck", stuck, timeout=0.01, on_finish=finished.append)
+
+    status = watcher.to_status_q.get(timeout=5)
+    assert finished == ["stuck"]
+
+    assert status["status"] == "FAILED"
+    assert status["msg"] == "ACTIVITY TIMED OUT."
+    assert status["details"] == {"t": "TIMEOUT"}
+    assert stuck.cancelled
+    assert watcher.watching == 0
+
+
+@pytest.mark.unit
+def test_transfer_watcher_cancels(watcher):
+    stuck = FakeHippo(rounds=10**9, outcomes={"t": "X"})
+    watcher.watch("stuck", stuck)
+    watcher.cancel("stuck")
+
+    status = watcher.to_status_q.get(timeout=5)
+
+    assert status["msg"] == "ACTIVITY CANCELLED."
+    assert stuck.cancelled
+
+
+@pytest.mark.unit
+def test_executor_transfer_activity_does_not_block(tmp_path):
+    settings = SimpleNamespace(
+        settings={"plugins": {"All": {"default_working_directory": str(tmp_path)}}}
+    )
+    executor = Executor(settings=settings, logger=logger, agent_id="agent")
+    executor._transfer_watcher.start()
+
+    (tmp_path / "input.txt").write_text("zambeze")
+    (tmp_path / "out").mkdir()
+    activity = TransferActivity(
+        name="copy",
+        source_file=f"local://{tmp_path / 'input.txt'}",
+        dest_directory=str(tmp_path / "out"),
+    )
+
+    executor._start_transfer_activity(activity)
+    status = executor.to_status_q.get(timeout=5)
+    executor._transfer_watcher.stop()
+
+    assert status["status"] == "SUCCEEDED"
+    assert status["activity_id"] == activity.activity_id
+    assert (tmp_path / "out" / "input.txt").read_text() == "zambeze"